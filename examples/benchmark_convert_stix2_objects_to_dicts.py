@@ -0,0 +1,85 @@
+import json
+import sys
+import time
+
+from stix2_explorer import converter
+import logging
+import urllib3
+
+from stix2_explorer.serialization import JSONEncoder
+
+# Disable warnings about insecure TLS connections.
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+logger = logging.getLogger(__name__)
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+MITRE_ATTACK_ENTERPRISE_URL = "https://raw.githubusercontent.com/mitre-attack/attack-stix-data/master/enterprise-attack/enterprise-attack.json"
+
+
+def convert_stix2_object_to_dict_via_json(o) -> dict:
+    """
+    The previous implementation of converter.convert_stix2_object_to_dict (i.e. a round trip through JSON).
+    """
+    if isinstance(o, dict):
+        return o
+    return json.loads(json.dumps(o, cls=JSONEncoder))
+
+
+def main(include: list[str], repeat: int):
+    src = converter.get_stix2_data_source(include)
+    objects = src.query()
+    logger.info("Loaded %d objects", len(objects))
+
+    # Check that both implementations return the same dicts.
+    mismatches = 0
+    for o in objects:
+        expected = convert_stix2_object_to_dict_via_json(o)
+        if converter.convert_stix2_object_to_dict(o) != expected:
+            logger.error("Mismatch: %s", o["id"])
+            mismatches += 1
+
+    if mismatches:
+        logger.error("%d objects were converted differently", mismatches)
+        sys.exit(1)
+    logger.info("All objects were converted identically")
+
+    for name, f in [
+        ("json", convert_stix2_object_to_dict_via_json),
+        ("direct", converter.convert_stix2_object_to_dict),
+    ]:
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for o in objects:
+                f(o)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+
+        logger.info("%s: %.3fs (%.2f µs/object)", name, best, 1e6 * best / len(objects))
+
+
+if __name__ == "__main__":
+
+    def cli():
+        import argparse
+
+        parser = argparse.ArgumentParser(
+            description="Compare STIX 2 object to dict conversion methods"
+        )
+        parser.add_argument(
+            "--include",
+            "-i",
+            type=str,
+            nargs="+",
+            default=[MITRE_ATTACK_ENTERPRISE_URL],
+            help="Path/URL to STIX 2 bundle(s)",
+        )
+        parser.add_argument("--repeat", "-n", type=int, default=3)
+        kwargs = vars(parser.parse_args())
+        main(**kwargs)
+
+    cli()
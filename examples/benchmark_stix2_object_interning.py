@@ -0,0 +1,105 @@
+import gc
+import json
+import tracemalloc
+from typing import Any, Callable, Tuple
+
+from stix2_explorer import converter
+from stix2_explorer.constants import (
+    MITRE_ATTACK_ENTERPRISE_TO_NIST_SP_800_53_URL,
+    MITRE_ATTACK_ENTERPRISE_URL,
+    MITRE_ATTACK_ICS_URL,
+    MITRE_ATTACK_MOBILE_URL,
+    MITRE_CAPEC_URL,
+    MITRE_MBC_URL,
+    NIST_SP_800_53_URL,
+)
+import logging
+import urllib3
+
+# Disable warnings about insecure TLS connections.
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+logger = logging.getLogger(__name__)
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+# The same content as --include-all.
+DEFAULT_INCLUDE = [
+    MITRE_ATTACK_ENTERPRISE_URL,
+    MITRE_ATTACK_MOBILE_URL,
+    MITRE_ATTACK_ICS_URL,
+    NIST_SP_800_53_URL,
+    MITRE_ATTACK_ENTERPRISE_TO_NIST_SP_800_53_URL,
+    MITRE_CAPEC_URL,
+    MITRE_MBC_URL,
+]
+
+
+def measure(f: Callable[[], Any]) -> Tuple[Any, int]:
+    """
+    Return the result of a function and how much memory it still occupies.
+    """
+    gc.collect()
+    tracemalloc.start()
+    result = f()
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current
+
+
+def main(include: list[str]):
+    rows = []
+    for src in include:
+        rows.extend(converter.iter_stix2_bundle_objects(src))
+
+    # Re-parse the merged corpus from JSON so that every repeated value is a separate string again.
+    blob = json.dumps(rows)
+    del rows
+    logger.info("Merged corpus: %.1f MB of JSON", len(blob) / 1e6)
+
+    plain, plain_size = measure(lambda: json.loads(blob))
+    interned, interned_size = measure(
+        lambda: list(converter.intern_stix2_objects(json.loads(blob)))
+    )
+    assert plain == interned
+    logger.info(
+        "Objects: %.1f MB -> %.1f MB interned (%d objects)",
+        plain_size / 1e6,
+        interned_size / 1e6,
+        len(plain),
+    )
+    del plain
+
+    edges, edges_size = measure(
+        lambda: [
+            edge
+            for decoder in converter.get_default_decoders()
+            for edge in decoder.iter_edges(interned)
+        ]
+    )
+    logger.info("Edges: %.1f MB (%d edges)", edges_size / 1e6, len(edges))
+
+
+if __name__ == "__main__":
+
+    def cli():
+        import argparse
+
+        parser = argparse.ArgumentParser(
+            description="Measure the memory used by STIX 2 objects with and without interning, and by the edges decoded from them"
+        )
+        parser.add_argument(
+            "--include",
+            "-i",
+            type=str,
+            nargs="+",
+            default=DEFAULT_INCLUDE,
+            help="Path/URL to STIX 2 bundle(s)",
+        )
+        kwargs = vars(parser.parse_args())
+        main(**kwargs)
+
+    cli()
@@ -0,0 +1,79 @@
+import gc
+import time
+import tracemalloc
+from typing import Optional
+
+from stix2_explorer import converter
+import logging
+import urllib3
+
+# Disable warnings about insecure TLS connections.
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+logger = logging.getLogger(__name__)
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+MITRE_ATTACK_ENTERPRISE_URL = "https://raw.githubusercontent.com/mitre-attack/attack-stix-data/master/enterprise-attack/enterprise-attack.json"
+
+
+def measure(include: list[str], projection: Optional[str]):
+    """
+    Load STIX 2 content with a projection and log how much memory the loaded objects occupy.
+    """
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    src = converter.get_stix2_data_source(include, projection=projection)
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    logger.info(
+        "%s: %d objects, %.1f MB resident, %.1f MB peak (%.1fs)",
+        projection or "none",
+        len(src.query()),
+        current / 1e6,
+        peak / 1e6,
+        elapsed,
+    )
+    return current
+
+
+def main(include: list[str], projections: list[str]):
+    baseline = measure(include, None)
+    for projection in projections:
+        current = measure(include, projection)
+        logger.info("%s: %.1fx less memory", projection, baseline / current)
+
+
+if __name__ == "__main__":
+
+    def cli():
+        import argparse
+
+        parser = argparse.ArgumentParser(
+            description="Compare the memory used by STIX 2 content loaded with and without field projections"
+        )
+        parser.add_argument(
+            "--include",
+            "-i",
+            type=str,
+            nargs="+",
+            default=[MITRE_ATTACK_ENTERPRISE_URL],
+            help="Path/URL to STIX 2 bundle(s)",
+        )
+        parser.add_argument(
+            "--projections",
+            "-p",
+            type=str,
+            nargs="+",
+            default=list(converter.PROJECTIONS),
+        )
+        kwargs = vars(parser.parse_args())
+        main(**kwargs)
+
+    cli()
@@ -1,7 +1,6 @@
 import sys
-from typing import Dict, Optional
-from stix2_explorer import converter
-from stix2.datastore import DataSource
+from typing import Optional
+from stix2_explorer import joins, provenance
 import polars as pl
 import urllib3
 
@@ -21,81 +20,41 @@ MITRE_ATTACK_ENTERPRISE_TO_NIST_SP_800_53_ID = (
 
 
 def main(output_path: Optional[str]):
-    mitre_attack_enterprise = converter.get_stix2_data_source(
-        MITRE_ATTACK_ENTERPRISE_URL
-    )
-    nist_sp_800_53 = converter.get_stix2_data_source(NIST_SP_800_53_URL)
-    mitre_attack_enterprise_to_nist_sp_800_53 = converter.get_stix2_data_source(
-        MITRE_ATTACK_ENTERPRISE_TO_NIST_SP_800_53_URL
+    # Each object is tagged with the dataset(s) it was loaded from.
+    rows, sources = provenance.load_stix2_objects_with_provenance(
+        {
+            MITRE_ATTACK_ENTERPRISE_ID: MITRE_ATTACK_ENTERPRISE_URL,
+            NIST_SP_800_53_ID: NIST_SP_800_53_URL,
+            MITRE_ATTACK_ENTERPRISE_TO_NIST_SP_800_53_ID: MITRE_ATTACK_ENTERPRISE_TO_NIST_SP_800_53_URL,
+        }
     )
+    engine = joins.JoinEngine(rows, provenance=sources)
+    df = pl.DataFrame(engine.join([joins.Hop()]))
+
+    # Objects which appear in both datasets (e.g. identities) are attributed to MITRE ATT&CK Enterprise.
+    def get_dataset(k: str) -> pl.Expr:
+        mask = pl.col(f"{k}_provenance")
+        return (
+            pl.when(mask & sources.registry.get_mask(MITRE_ATTACK_ENTERPRISE_ID) != 0)
+            .then(pl.lit(MITRE_ATTACK_ENTERPRISE_ID))
+            .when(mask & sources.registry.get_mask(NIST_SP_800_53_ID) != 0)
+            .then(pl.lit(NIST_SP_800_53_ID))
+            .alias(f"{k}_dataset")
+        )
 
-    # Keep track of where each object came from.
-    mitre_attack_enterprise_objects = {o["id"] for o in mitre_attack_enterprise.query()}
-    nist_sp_800_53_objects = {o["id"] for o in nist_sp_800_53.query()}
-
-    # The composite data source will be used to identify relationships across the entire graph.
-    composite_data_source = converter.get_stix2_data_source(
-        data_sources=[
-            mitre_attack_enterprise,
-            nist_sp_800_53,
-            mitre_attack_enterprise_to_nist_sp_800_53,
-        ]
+    df = df.select(
+        get_dataset("source_object"),
+        pl.all().exclude("^.*_provenance$"),
+        get_dataset("target_object"),
     )
-
-    rows = list(composite_data_source.query())
-    g = converter.convert_stix2_objects_to_digraph(rows)
-
-    rows = []
-    nodes = dict(g.nodes(data=True))
-    for source_object_id, target_object_id, data in g.edges(data=True):
-        source_object_external_id = None
-        try:
-            source_object_external_id = converter.get_external_id(
-                nodes[source_object_id]
-            )
-        except (KeyError, ValueError):
-            pass
-
-        target_object_external_id = None
-        try:
-            target_object_external_id = converter.get_external_id(
-                nodes[target_object_id]
-            )
-        except (KeyError, ValueError):
-            pass
-
-        if source_object_id in mitre_attack_enterprise_objects:
-            source_dataset = MITRE_ATTACK_ENTERPRISE_ID
-        elif source_object_id in nist_sp_800_53_objects:
-            source_dataset = NIST_SP_800_53_ID
-        else:
-            continue
-
-        if target_object_id in mitre_attack_enterprise_objects:
-            target_dataset = MITRE_ATTACK_ENTERPRISE_ID
-        elif target_object_id in nist_sp_800_53_objects:
-            target_dataset = NIST_SP_800_53_ID
-        else:
-            continue
-
-        relationship = data["label"]
-        row = {
-            "source_dataset": source_dataset,
-            "source_object_id": source_object_id,
-            "source_object_external_id": source_object_external_id,
-            "source_object_name": nodes[source_object_id].get("name"),
-            "source_object_type": converter.get_stix2_type_from_id(source_object_id),
-            "relationship": relationship,
-            "target_object_id": target_object_id,
-            "target_object_external_id": target_object_external_id,
-            "target_object_name": nodes[target_object_id].get("name"),
-            "target_object_type": converter.get_stix2_type_from_id(target_object_id),
-            "target_dataset": target_dataset,
+    df = df.drop_nulls(["source_object_dataset", "target_object_dataset"])
+    df = df.filter(df["source_object_dataset"] == NIST_SP_800_53_ID)
+    df = df.rename(
+        {
+            "source_object_dataset": "source_dataset",
+            "target_object_dataset": "target_dataset",
         }
-        rows.append(row)
-
-    df = pl.DataFrame(rows)
-    df = df.filter(df["source_dataset"] == NIST_SP_800_53_ID)
+    )
 
     if not output_path:
         output_path = sys.stdout
@@ -1,6 +1,6 @@
 import sys
 from typing import Optional
-from stix2_explorer import converter
+from stix2_explorer import converter, joins
 import polars as pl
 import urllib3
 
@@ -14,43 +14,9 @@ MITRE_CAPEC_URL = (
 
 def main(output_path: Optional[str]):
     mitre_capec = converter.get_stix2_data_source(MITRE_CAPEC_URL)
-    rows = list(mitre_capec.query())
-    g = converter.convert_stix2_objects_to_digraph(rows)
-
-    rows = []
-    nodes = dict(g.nodes(data=True))
-    for source_object_id, target_object_id, data in g.edges(data=True):
-        source_object_external_id = None
-        try:
-            source_object_external_id = converter.get_external_id(
-                nodes[source_object_id]
-            )
-        except (KeyError, ValueError):
-            pass
-
-        target_object_external_id = None
-        try:
-            target_object_external_id = converter.get_external_id(
-                nodes[target_object_id]
-            )
-        except (KeyError, ValueError):
-            pass
-
-        relationship = data["label"]
-        row = {
-            "source_object_id": source_object_id,
-            "source_object_external_id": source_object_external_id,
-            "source_object_name": nodes[source_object_id].get("name"),
-            "source_object_type": converter.get_stix2_type_from_id(source_object_id),
-            "relationship": relationship,
-            "target_object_id": target_object_id,
-            "target_object_external_id": target_object_external_id,
-            "target_object_name": nodes[target_object_id].get("name"),
-            "target_object_type": converter.get_stix2_type_from_id(target_object_id),
-        }
-        rows.append(row)
-
-    df = pl.DataFrame(rows)
+    rows = converter.convert_stix2_objects_to_dicts(mitre_capec.query())
+    engine = joins.JoinEngine(rows)
+    df = pl.DataFrame(engine.join([joins.Hop()]))
 
     if not output_path:
         output_path = sys.stdout
@@ -1,8 +1,8 @@
 import sys
-from typing import Iterator, Optional, Tuple
+from typing import Optional
 from neo4j import Driver, GraphDatabase
 
-from stix2_explorer import converter
+from stix2_explorer import converter, neo4j_export
 import logging
 import urllib3
 
@@ -15,46 +15,41 @@ logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
 )
 
-Triple = Tuple[str, str, str]
-
 
 def main(
     include: list[str],
     neo4j_uri: str,
     neo4j_username: Optional[str],
     neo4j_password: Optional[str],
+    batch_size: int,
+    concurrency: int,
+    manifest_path: Optional[str],
 ):
-    src = converter.get_stix2_data_source(include)
-
-    rows = list(src.query())
-    g = converter.convert_stix2_objects_to_digraph(rows)
-    triples = converter.convert_digraph_to_triples(g)
-
-    driver = GraphDatabase.driver(neo4j_uri, auth=(neo4j_username, neo4j_password))
-    if not test_connection(driver):
-        sys.exit(1)
+    rows = converter.iter_stix2_objects(
+        include, include_deprecated=True, include_revoked=True
+    )
 
-    insert_triples(driver, triples)
+    auth = (neo4j_username, neo4j_password) if neo4j_password else None
+    with GraphDatabase.driver(neo4j_uri, auth=auth) as driver:
+        if not test_connection(driver):
+            sys.exit(1)
 
-
-def insert_triples(driver: Driver, triples: Iterator[Triple], collection: str):
-    def insert_triple(tx, s: str, p: str, o: str):
-        q = (
-            "MERGE (s:Entity {name: $s}) "
-            "MERGE (o:Entity {name: $o}) "
-            "MERGE (s)-[r:RELATION {type: $p}]->(o)"
+        exporter = neo4j_export.Neo4jExporter(
+            driver, batch_size=batch_size, concurrency=concurrency
         )
-        tx.run(q, s=s, p=p, o=o)
-
-    triples = set(triples)
-    with driver.session() as session:
-        for s, p, o in triples:
-            session.write_transaction(insert_triple, s, p, o)
+        if manifest_path:
+            exporter.sync(rows, manifest_path)
+        else:
+            exporter.export(rows)
 
 
 def test_connection(driver: Driver) -> bool:
-    with driver.session() as session:
-        _ = session.run("RETURN 'Hello, Neo4j!' AS message").single()
+    try:
+        driver.verify_connectivity()
+    except Exception as e:
+        logger.error("Failed to connect to Neo4j: %s", e)
+        return False
+    return True
 
 
 if __name__ == "__main__":
@@ -81,7 +76,23 @@ if __name__ == "__main__":
         )
         parser.add_argument(
             "--neo4j-password",
-            default="password",
+            default=None,
+            help="Password (the Neo4j container in docker-compose.yml does not use authentication)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=neo4j_export.DEFAULT_BATCH_SIZE,
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=neo4j_export.DEFAULT_CONCURRENCY,
+            help="Number of parallel sessions",
+        )
+        parser.add_argument(
+            "--manifest-path",
+            help="Only push what changed since the last import (as recorded in this file)",
         )
         kwargs = vars(parser.parse_args())
         main(**kwargs)
@@ -0,0 +1,84 @@
+import asyncio
+import time
+
+from stix2_explorer import aio
+from stix2_explorer.constants import (
+    MITRE_ATTACK_ENTERPRISE_TO_NIST_SP_800_53_URL,
+    MITRE_ATTACK_ENTERPRISE_URL,
+    NIST_SP_800_53_URL,
+)
+import logging
+import urllib3
+
+# Disable warnings about insecure TLS connections.
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+logger = logging.getLogger(__name__)
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+DEFAULT_INCLUDE = [
+    MITRE_ATTACK_ENTERPRISE_URL,
+    NIST_SP_800_53_URL,
+    MITRE_ATTACK_ENTERPRISE_TO_NIST_SP_800_53_URL,
+]
+
+
+async def count_objects(include: list[str], object_type: str) -> int:
+    """
+    Count the objects of a given type (i.e. what a request handler in an async web app might do).
+    """
+    n = 0
+    async for _ in aio.aiter_stix2_objects(include, object_types=[object_type]):
+        n += 1
+    return n
+
+
+async def main(include: list[str], object_types: list[str]):
+    start = time.perf_counter()
+
+    # Every request shares the same in-flight load of the content.
+    counts = await asyncio.gather(
+        *[count_objects(include, object_type) for object_type in object_types]
+    )
+    for object_type, n in zip(object_types, counts):
+        logger.info("%s: %d objects", object_type, n)
+
+    g = await aio.aconvert_stix2_objects_to_digraph(include)
+    logger.info(
+        "Graph: %d nodes, %d edges (%.1fs)",
+        len(g.nodes),
+        len(g.edges),
+        time.perf_counter() - start,
+    )
+
+
+if __name__ == "__main__":
+
+    def cli():
+        import argparse
+
+        parser = argparse.ArgumentParser(
+            description="Query STIX 2 content concurrently from asyncio"
+        )
+        parser.add_argument(
+            "--include",
+            "-i",
+            type=str,
+            nargs="+",
+            default=DEFAULT_INCLUDE,
+            help="Path/URL to STIX 2 bundle(s)",
+        )
+        parser.add_argument(
+            "--object-types",
+            "-t",
+            type=str,
+            nargs="+",
+            default=["attack-pattern", "course-of-action", "relationship"],
+        )
+        kwargs = vars(parser.parse_args())
+        asyncio.run(main(**kwargs))
+
+    cli()
@@ -3,35 +3,15 @@ CREATE OR REPLACE TABLE objects AS (
         id,
         type,
         name
-    FROM (
-        SELECT 
-            id,
-            type,
-            name,
-        FROM (
-            SELECT
-                UNNEST(objects, recursive := true) AS object
-            FROM read_json_auto('data/mitre-attack-enterprise/enterprise-attack.json', maximum_object_size=1073741824)
-        )
-    ) 
-    WHERE type NOT IN ('relationship')
+    FROM 'data/mitre-attack-enterprise/objects.parquet'
 );
 
 CREATE OR REPLACE TABLE object_external_ids AS (
     SELECT 
-        id,
-        external_reference.external_id AS external_id,
-    FROM (
-        SELECT 
-            id,
-            UNNEST(external_references) AS external_reference
-        FROM (
-            SELECT
-                UNNEST(objects, recursive := true) AS object
-            FROM read_json_auto('data/mitre-attack-enterprise/enterprise-attack.json', maximum_object_size=1073741824)
-        )
-    )
-    WHERE external_reference.source_name = 'mitre-attack'
+        object_id AS id,
+        external_id,
+    FROM 'data/mitre-attack-enterprise/external_references.parquet'
+    WHERE source_name = 'mitre-attack'
 );
 
 ALTER TABLE objects ADD COLUMN external_id STRING;
@@ -0,0 +1,267 @@
+import asyncio
+import concurrent.futures
+import functools
+import threading
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+    Union,
+)
+
+import networkx as nx
+import requests
+from requests.adapters import HTTPAdapter
+from stix2.datastore import CompositeDataSource, DataSource
+
+from stix2_explorer import converter
+from stix2_explorer.constants import Triple
+from stix2_explorer.converter import Decoder
+
+T = TypeVar("T")
+
+DEFAULT_POOL_SIZE = 16
+DEFAULT_BATCH_SIZE = 1000
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+# Loads which are in progress, keyed by event loop, data source, and projection.
+_in_flight: Dict[Tuple[Any, ...], asyncio.Future] = {}
+
+
+def get_session() -> requests.Session:
+    """
+    Return the HTTP session (i.e. connection pool) which is shared by all asynchronous loads.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=DEFAULT_POOL_SIZE, pool_maxsize=DEFAULT_POOL_SIZE
+            )
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.verify = False
+            _session = session
+        return _session
+
+
+async def aget_stix2_data_source(
+    data_sources: Union[str, DataSource, Iterable[Union[str, DataSource]]],
+    projection: Optional[Union[str, Iterable[str]]] = None,
+    executor: Optional[concurrent.futures.Executor] = None,
+) -> Union[DataSource, CompositeDataSource]:
+    """
+    Asynchronous version of converter.get_stix2_data_source: data sources are fetched concurrently and parsed in an executor, and concurrent loads of the same data source share one in-flight load.
+    """
+    if isinstance(data_sources, str):
+        return await _aget_stix2_data_source(data_sources, projection, executor)
+    elif isinstance(data_sources, DataSource):
+        return data_sources
+
+    data_sources = await asyncio.gather(
+        *[_aget_stix2_data_source(ds, projection, executor) for ds in data_sources]
+    )
+    composite_data_source = CompositeDataSource()
+    composite_data_source.add_data_sources(list(data_sources))
+    return composite_data_source
+
+
+async def _aget_stix2_data_source(
+    src: Union[str, DataSource],
+    projection: Optional[Union[str, Iterable[str]]],
+    executor: Optional[concurrent.futures.Executor],
+) -> DataSource:
+    if isinstance(src, DataSource):
+        return src
+
+    if projection is not None and not isinstance(projection, str):
+        projection = tuple(sorted(projection))
+
+    loop = asyncio.get_running_loop()
+    key = (loop, src, projection)
+    future = _in_flight.get(key)
+    if future is None:
+        future = loop.run_in_executor(
+            executor, _load_stix2_data_source, src, projection
+        )
+        _in_flight[key] = future
+        future.add_done_callback(lambda _: _in_flight.pop(key, None))
+
+    # A caller which is cancelled must not cancel the load for everyone else.
+    return await asyncio.shield(future)
+
+
+def _load_stix2_data_source(
+    src: str, projection: Optional[Union[str, Iterable[str]]] = None
+) -> DataSource:
+    if src.startswith(("http://", "https://")):
+        response = get_session().get(src)
+        response.raise_for_status()
+        return converter.create_stix2_memory_source(
+            response.json()["objects"], projection=projection
+        )
+    return converter.get_stix2_data_source(src, projection=projection)
+
+
+async def aiter_stix2_objects(
+    data_sources: Union[str, DataSource, Iterable[Union[str, DataSource]]],
+    object_ids: Optional[Iterable[str]] = None,
+    object_types: Optional[Iterable[str]] = None,
+    object_names: Optional[Iterable[str]] = None,
+    decoders: Optional[Iterable[Decoder]] = None,
+    include_deprecated: bool = False,
+    include_revoked: bool = False,
+    projection: Optional[Union[str, Iterable[str]]] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    executor: Optional[concurrent.futures.Executor] = None,
+) -> AsyncIterator[dict]:
+    """
+    Asynchronous version of converter.iter_stix2_objects: objects are read in batches in an executor so that large queries don't block the event loop.
+    """
+    src = await aget_stix2_data_source(
+        data_sources, projection=projection, executor=executor
+    )
+    rows = converter.iter_stix2_objects(
+        src,
+        object_ids=object_ids,
+        object_types=object_types,
+        object_names=object_names,
+        decoders=decoders,
+        include_deprecated=include_deprecated,
+        include_revoked=include_revoked,
+        projection=projection,
+    )
+    async for row in aiter_batches(rows, batch_size=batch_size, executor=executor):
+        yield row
+
+
+async def aiter_batches(
+    rows: Iterable[T],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    executor: Optional[concurrent.futures.Executor] = None,
+) -> AsyncIterator[T]:
+    """
+    Advance a (blocking) iterator in an executor, a batch at a time, and yield the results.
+    """
+    loop = asyncio.get_running_loop()
+    rows = iter(rows)
+    while True:
+        batch = await loop.run_in_executor(executor, _next_batch, rows, batch_size)
+        if not batch:
+            return
+        for row in batch:
+            yield row
+
+
+def _next_batch(rows: Iterator[T], batch_size: int) -> List[T]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            break
+    return batch
+
+
+async def aconvert_stix2_objects_to_digraph(
+    data_sources: Union[str, DataSource, Iterable[Union[str, DataSource]]],
+    decoders: Optional[Iterable[Decoder]] = None,
+    include_deprecated: bool = False,
+    include_revoked: bool = False,
+    projection: Optional[Union[str, Iterable[str]]] = None,
+    executor: Optional[concurrent.futures.Executor] = None,
+) -> nx.DiGraph:
+    """
+    Load STIX 2 content and build a directed graph from it without blocking the event loop.
+    """
+    src = await aget_stix2_data_source(
+        data_sources, projection=projection, executor=executor
+    )
+    return await _run_in_executor(
+        executor,
+        _convert_stix2_objects_to_digraph,
+        src,
+        decoders=decoders,
+        include_deprecated=include_deprecated,
+        include_revoked=include_revoked,
+    )
+
+
+def _convert_stix2_objects_to_digraph(
+    src: DataSource,
+    decoders: Optional[Iterable[Decoder]],
+    include_deprecated: bool,
+    include_revoked: bool,
+) -> nx.DiGraph:
+    rows = converter.iter_stix2_objects(
+        src,
+        decoders=decoders,
+        include_deprecated=include_deprecated,
+        include_revoked=include_revoked,
+    )
+    return converter.convert_stix2_objects_to_digraph(rows, decoders=decoders)
+
+
+async def aconvert_stix2_objects_to_triples(
+    data_sources: Union[str, DataSource, Iterable[Union[str, DataSource]]],
+    node_labels: Optional[Union[str, Dict[str, str], Callable[[dict], str]]] = None,
+    decoders: Optional[Iterable[Decoder]] = None,
+    include_deprecated: bool = False,
+    include_revoked: bool = False,
+    projection: Optional[Union[str, Iterable[str]]] = None,
+    executor: Optional[concurrent.futures.Executor] = None,
+) -> List[Triple]:
+    """
+    Load STIX 2 content and convert it into (subject, predicate, object) triples without blocking the event loop.
+    """
+    src = await aget_stix2_data_source(
+        data_sources, projection=projection, executor=executor
+    )
+    return await _run_in_executor(
+        executor,
+        _convert_stix2_objects_to_triples,
+        src,
+        node_labels=node_labels,
+        decoders=decoders,
+        include_deprecated=include_deprecated,
+        include_revoked=include_revoked,
+    )
+
+
+def _convert_stix2_objects_to_triples(
+    src: DataSource,
+    node_labels: Optional[Union[str, Dict[str, str], Callable[[dict], str]]],
+    decoders: Optional[Iterable[Decoder]],
+    include_deprecated: bool,
+    include_revoked: bool,
+) -> List[Triple]:
+    rows = converter.iter_stix2_objects(
+        src,
+        decoders=decoders,
+        include_deprecated=include_deprecated,
+        include_revoked=include_revoked,
+    )
+    return list(
+        converter.convert_stix2_objects_to_triples(
+            rows, node_labels=node_labels, decoders=decoders
+        )
+    )
+
+
+async def _run_in_executor(
+    executor: Optional[concurrent.futures.Executor],
+    f: Callable[..., T],
+    *args,
+    **kwargs,
+) -> T:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, functools.partial(f, *args, **kwargs))
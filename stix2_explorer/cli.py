@@ -1,5 +1,4 @@
-import json
-from typing import Any, Iterable, Optional
+from typing import Optional, Tuple
 from stix2_explorer import converter
 import click
 
@@ -16,12 +15,30 @@ from stix2_explorer.constants import (
     MITRE_CAPEC_URL,
     MITRE_MBC_PATH,
     MITRE_MBC_URL,
+    MAX_RADIUS,
     NIST_SP_800_53_PATH,
     NIST_SP_800_53_URL,
 )
+from stix2_explorer.writers import (
+    COMPRESSION_TYPES,
+    write_csv,
+    open_output,
+    write_json,
+    write_jsonl,
+)
+
+# Commands which can be forwarded to a running server (see serve).
+SERVER_COMMANDS = ["list-objects", "list-relationships", "neighbours", "to-dot"]
 
 
 @click.group()
+@click.option(
+    "--include",
+    "-i",
+    "include",
+    multiple=True,
+    help="Path/URL to additional STIX 2 content (e.g. a bundle, directory, or SQLite store)",
+)
 @click.option("--include-all", is_flag=True)
 @click.option("--include-mitre-attack-enterprise", is_flag=True)
 @click.option("--include-mitre-attack-mobile", is_flag=True)
@@ -29,9 +46,19 @@ from stix2_explorer.constants import (
 @click.option("--include-nist-sp-800-53", is_flag=True)
 @click.option("--include-mitre-capec", is_flag=True)
 @click.option("--include-mitre-mbc", is_flag=True)
+@click.option(
+    "--projection",
+    help="Only load these fields (comma-separated) or the fields used by a profile (graph or matrix)",
+)
+@click.option(
+    "--no-server",
+    is_flag=True,
+    help="Don't forward commands to a running server (see serve)",
+)
 @click.pass_context
 def main(
     ctx: click.Context,
+    include: Tuple[str, ...],
     include_all: bool,
     include_mitre_attack_enterprise: bool,
     include_mitre_attack_mobile: bool,
@@ -39,8 +66,14 @@ def main(
     include_nist_sp_800_53: bool,
     include_mitre_capec: bool,
     include_mitre_mbc: bool,
+    projection: Optional[str],
+    no_server: bool,
 ):
     data_sources = []
+    ctx.obj = {}
+
+    if projection and projection not in converter.PROJECTIONS:
+        projection = [f.strip() for f in projection.split(",") if f.strip()]
 
     if include_all:
         include_mitre_attack_enterprise = True
@@ -50,27 +83,63 @@ def main(
         include_mitre_capec = True
         include_mitre_mbc = True
 
+    if ctx.invoked_subcommand in SERVER_COMMANDS + ["serve"]:
+        from stix2_explorer import server
+
+        # Built-in sources are identified by their local paths, so that updating a local copy changes the key.
+        key = server.get_server_key(
+            include=include,
+            mitre_attack_enterprise=include_mitre_attack_enterprise
+            and MITRE_ATTACK_ENTERPRISE_PATH,
+            mitre_attack_mobile=include_mitre_attack_mobile
+            and MITRE_ATTACK_MOBILE_PATH,
+            mitre_attack_ics=include_mitre_attack_ics and MITRE_ATTACK_ICS_PATH,
+            nist_sp_800_53=include_nist_sp_800_53 and NIST_SP_800_53_PATH,
+            mitre_attack_enterprise_to_nist_sp_800_53=include_mitre_attack_enterprise
+            and include_nist_sp_800_53
+            and MITRE_ATTACK_ENTERPRISE_TO_NIST_SP_800_53_PATH,
+            mitre_capec=include_mitre_capec and MITRE_CAPEC_PATH,
+            mitre_mbc=include_mitre_mbc and MITRE_MBC_PATH,
+            projection=projection,
+        )
+        ctx.obj["server_key"] = key
+
+        # If a server has already loaded the same content, there's no need to load it again.
+        if ctx.invoked_subcommand in SERVER_COMMANDS and not no_server:
+            client = server.get_client(key)
+            if client:
+                ctx.obj.update(data_sources=[], client=client)
+                return
+
     if include_mitre_attack_enterprise:
         data_source = converter.get_stix2_data_source_with_fallback(
-            MITRE_ATTACK_ENTERPRISE_PATH, MITRE_ATTACK_ENTERPRISE_URL
+            MITRE_ATTACK_ENTERPRISE_PATH,
+            MITRE_ATTACK_ENTERPRISE_URL,
+            projection=projection,
         )
         data_sources.append(data_source)
 
     if include_mitre_attack_mobile:
         data_source = converter.get_stix2_data_source_with_fallback(
-            MITRE_ATTACK_MOBILE_PATH, MITRE_ATTACK_MOBILE_URL
+            MITRE_ATTACK_MOBILE_PATH,
+            MITRE_ATTACK_MOBILE_URL,
+            projection=projection,
         )
         data_sources.append(data_source)
 
     if include_mitre_attack_ics:
         data_source = converter.get_stix2_data_source_with_fallback(
-            MITRE_ATTACK_ICS_PATH, MITRE_ATTACK_ICS_URL
+            MITRE_ATTACK_ICS_PATH,
+            MITRE_ATTACK_ICS_URL,
+            projection=projection,
         )
         data_sources.append(data_source)
 
     if include_nist_sp_800_53:
         data_source = converter.get_stix2_data_source_with_fallback(
-            NIST_SP_800_53_PATH, NIST_SP_800_53_URL
+            NIST_SP_800_53_PATH,
+            NIST_SP_800_53_URL,
+            projection=projection,
         )
         data_sources.append(data_source)
 
@@ -78,22 +147,32 @@ def main(
         data_source = converter.get_stix2_data_source_with_fallback(
             MITRE_ATTACK_ENTERPRISE_TO_NIST_SP_800_53_PATH,
             MITRE_ATTACK_ENTERPRISE_TO_NIST_SP_800_53_URL,
+            projection=projection,
         )
         data_sources.append(data_source)
 
     if include_mitre_capec:
         data_source = converter.get_stix2_data_source_with_fallback(
-            MITRE_CAPEC_PATH, MITRE_CAPEC_URL
+            MITRE_CAPEC_PATH,
+            MITRE_CAPEC_URL,
+            projection=projection,
         )
         data_sources.append(data_source)
 
     if include_mitre_mbc:
         data_source = converter.get_stix2_data_source_with_fallback(
-            MITRE_MBC_PATH, MITRE_MBC_URL
+            MITRE_MBC_PATH,
+            MITRE_MBC_URL,
+            projection=projection,
         )
         data_sources.append(data_source)
 
-    ctx.obj = {"data_sources": data_sources}
+    for path in include:
+        data_sources.append(
+            converter.get_stix2_data_source(path, projection=projection)
+        )
+
+    ctx.obj["data_sources"] = data_sources
 
 
 @main.command()
@@ -101,69 +180,588 @@ def main(
     "--output-format", "-f", type=click.Choice(["lines", "bundle"]), default="lines"
 )
 @click.option("--output-path", "-o")
+@click.option("--compression", type=click.Choice(COMPRESSION_TYPES))
 @click.option("--indent", type=int, default=4)
 @click.pass_context
 def list_objects(
-    ctx: click.Context, output_format: str, output_path: Optional[str], indent: int
+    ctx: click.Context,
+    output_format: str,
+    output_path: Optional[str],
+    compression: Optional[str],
+    indent: int,
 ):
-    rows = converter.iter_stix2_objects(ctx.obj["data_sources"])
+    client = ctx.obj.get("client")
+    if client:
+        rows = client.iter_objects()
+    else:
+        rows = converter.iter_stix2_objects(ctx.obj["data_sources"])
+
     if output_format == "bundle":
         bundle = converter.create_stix2_bundle(rows)
-        write_json(data=bundle, path=output_path, indent=indent)
+        write_json(
+            data=bundle, path=output_path, indent=indent, compression=compression
+        )
     else:
-        write_jsonl(rows=rows, path=output_path)
+        write_jsonl(rows=rows, path=output_path, compression=compression)
 
 
 @main.command()
 @click.option("--output-path", "-o")
+@click.option("--compression", type=click.Choice(COMPRESSION_TYPES))
 @click.option(
     "--node-label-type",
-    type=click.Choice(
-        ["id", "name", "type", "external-id"], default="id", show_default=True
-    ),
+    type=click.Choice(converter.NODE_LABEL_TYPES),
+    default=converter.NODE_LABEL_TYPE_ID,
+    show_default=True,
 )
 @click.pass_context
 def list_relationships(
     ctx: click.Context,
     output_path: Optional[str],
+    compression: Optional[str],
     node_label_type: str,
 ):
+    client = ctx.obj.get("client")
+    if client:
+        triples = client.iter_triples(node_label_type)
+    else:
+        rows = converter.iter_stix2_objects(ctx.obj["data_sources"])
+        triples = converter.convert_stix2_objects_to_triples(
+            rows, node_labels=node_label_type
+        )
+
+    write_csv(rows=triples, path=output_path, compression=compression)
+
+
+@main.command()
+@click.option("--output-dir", "-o", required=True)
+@click.option(
+    "--output-format", "-f", type=click.Choice(["parquet", "arrow"]), default="parquet"
+)
+@click.option("--include-deprecated", is_flag=True)
+@click.option("--include-revoked", is_flag=True)
+@click.pass_context
+def export_tables(
+    ctx: click.Context,
+    output_dir: str,
+    output_format: str,
+    include_deprecated: bool,
+    include_revoked: bool,
+):
+    from stix2_explorer import columnar
+
+    rows = converter.iter_stix2_objects(
+        ctx.obj["data_sources"],
+        include_deprecated=include_deprecated,
+        include_revoked=include_revoked,
+    )
+    tables = columnar.convert_stix2_objects_to_tables(rows)
+    columnar.write_tables(tables, output_dir, output_format=output_format)
+
+
+@main.command()
+@click.argument("query")
+@click.option(
+    "--output-format", "-f", type=click.Choice(["csv", "lines"]), default="csv"
+)
+@click.option("--output-path", "-o")
+@click.option("--compression", type=click.Choice(COMPRESSION_TYPES))
+@click.pass_context
+def sql(
+    ctx: click.Context,
+    query: str,
+    output_format: str,
+    output_path: Optional[str],
+    compression: Optional[str],
+):
+    """
+    Run a SQL query (or named query, e.g. mapping-stats) against the objects, external_references, triples, and mappings tables.
+    """
+    from stix2_explorer import sql as _sql
+
     rows = converter.iter_stix2_objects(ctx.obj["data_sources"])
-    triples = converter.convert_stix2_objects_to_triples(rows)
+    con = _sql.get_duckdb_connection_from_stix2_objects(rows)
+    columns, rows = _sql.execute(con, query)
+    if output_format == "lines":
+        rows = (dict(zip(columns, row)) for row in rows)
+        write_jsonl(rows=rows, path=output_path, compression=compression)
+    else:
+        write_csv(rows=rows, path=output_path, header=columns, compression=compression)
+
+
+@main.command()
+@click.option("--output-path", "-o", required=True)
+@click.pass_context
+def export_sqlite(ctx: click.Context, output_path: str):
+    """
+    Copy the selected STIX 2 content into a SQLite store which can be re-used with --include.
+    """
+    from stix2_explorer import sqlite_store
 
-    write_csv(rows=triples, path=output_path)
+    store = sqlite_store.create_sqlite_source(output_path, ctx.obj["data_sources"])
+    store.close()
 
 
-def write_csv(rows: Iterable[Iterable[str]], path: Optional[str]):
-    if path:
-        with open(path, "w") as output_file:
-            for row in rows:
-                output_file.write(",".join(row) + "\n")
+@main.command()
+@click.argument("query")
+@click.option("--output-path", "-o")
+@click.option(
+    "--node-label-type",
+    type=click.Choice(converter.NODE_LABEL_TYPES),
+    default=converter.NODE_LABEL_TYPE_ID,
+    show_default=True,
+)
+@click.pass_context
+def query(
+    ctx: click.Context,
+    query: str,
+    output_path: Optional[str],
+    node_label_type: str,
+):
+    """
+    Match triple patterns, e.g. "?g uses T1059" or "?s uses ?t . ?t related-to ?tactic".
+
+    Terms may be variables (?x), wildcards (*), STIX IDs, predicates, or external IDs.
+    """
+    from stix2_explorer import triple_store
+
+    rows = list(converter.iter_stix2_objects(ctx.obj["data_sources"]))
+    store = triple_store.convert_stix2_objects_to_triple_store(rows)
+
+    # External IDs which are shared by more than one object match all of them.
+    object_ids = converter.get_object_ids_by_external_id(rows)
+    patterns = triple_store.parse_patterns(query)
+    get_label = converter.get_node_label_function(rows, node_label_type)
+    results = (
+        {k: get_label(v) for (k, v) in bindings.items()}
+        for bindings in store.query(patterns, aliases=object_ids)
+    )
+    write_jsonl(rows=results, path=output_path)
+
+
+@main.command()
+@click.argument("query")
+@click.option("--limit", "-n", type=int, default=10, show_default=True)
+@click.option("--no-prefix", is_flag=True, help="Only match whole words")
+@click.option("--no-cache", is_flag=True, help="Don't save/load the search index")
+@click.option("--output-path", "-o")
+@click.pass_context
+def search(
+    ctx: click.Context,
+    query: str,
+    limit: int,
+    no_prefix: bool,
+    no_cache: bool,
+    output_path: Optional[str],
+):
+    """
+    Search names, aliases, descriptions, and external references, e.g. "credential dumping lsass".
+    """
+    from stix2_explorer import search as _search
+    from stix2_explorer.constants import CACHE_DIR
+
+    rows = list(converter.iter_stix2_objects(ctx.obj["data_sources"]))
+    index = _search.get_search_index(rows, cache_dir=None if no_cache else CACHE_DIR)
+    objects = {o["id"]: o for o in rows}
+
+    results = []
+    for result in index.search(query, limit=limit, prefix=not no_prefix):
+        o = objects[result.id]
+        try:
+            external_id = converter.get_external_id(o)
+        except (KeyError, ValueError):
+            external_id = None
+
+        results.append(
+            {
+                "id": result.id,
+                "type": o["type"],
+                "name": o.get("name"),
+                "external_id": external_id,
+                "score": round(result.score, 4),
+            }
+        )
+    write_jsonl(rows=results, path=output_path)
+
+
+@main.command()
+@click.argument("object_id")
+@click.option("--metric", type=click.Choice(["jaccard", "cosine"]), default="jaccard")
+@click.option("--limit", "-n", type=int, default=10, show_default=True)
+@click.option("--neighbour-type", "neighbour_types", multiple=True)
+@click.option("--no-cache", is_flag=True, help="Don't save/load the similarity matrix")
+@click.option("--output-path", "-o")
+@click.pass_context
+def similar(
+    ctx: click.Context,
+    object_id: str,
+    metric: str,
+    limit: int,
+    neighbour_types: Tuple[str, ...],
+    no_cache: bool,
+    output_path: Optional[str],
+):
+    """
+    List the groups/software (or techniques) with the most similar technique usage (or users) to an object, e.g. G0007.
+    """
+    from stix2_explorer import similarity
+    from stix2_explorer.constants import ATTACK_PATTERN, CACHE_DIR
+
+    rows = list(converter.iter_stix2_objects(ctx.obj["data_sources"]))
+    external_ids = converter.get_node_labels_by_external_id(rows)
+    object_ids = converter.get_object_ids_by_external_id(rows).get(object_id)
+    if object_ids and len(object_ids) > 1:
+        raise click.BadParameter(
+            f"{object_id} is the external ID of more than one object: {', '.join(object_ids)}",
+            param_hint="OBJECT_ID",
+        )
+    elif object_ids:
+        object_id = object_ids[0]
+
+    if converter.get_stix2_type_from_id(object_id) == ATTACK_PATTERN:
+        axis = similarity.TECHNIQUES
     else:
-        for row in rows:
-            print(",".join(row))
+        axis = similarity.ENTITIES
+
+    s = similarity.get_cached_similarity_matrix(
+        rows, metric=metric, axis=axis, cache_dir=None if no_cache else CACHE_DIR
+    )
+    neighbours = similarity.get_top_k_neighbours(
+        s, k=limit, object_ids=[object_id], neighbour_types=neighbour_types
+    )[object_id]
+
+    names = converter.get_node_labels(rows, "name")
+    results = (
+        {
+            "id": n.id,
+            "name": names.get(n.id),
+            "external_id": external_ids.get(n.id),
+            "score": round(n.score, 4),
+        }
+        for n in neighbours
+    )
+    write_jsonl(rows=results, path=output_path)
 
 
-def write_json(data: Any, path: Optional[str] = None, indent: Optional[int] = 4):
-    blob = json.dumps(data, indent=indent)
-    if path:
-        with open(path, "w") as output_file:
-            output_file.write(blob)
+@main.command()
+@click.option(
+    "--report",
+    type=click.Choice(["tactics", "uncovered", "minimum-controls"]),
+    default="tactics",
+    show_default=True,
+)
+@click.option(
+    "--control",
+    "-c",
+    "controls",
+    multiple=True,
+    help="Implemented control (e.g. AC-2)",
+)
+@click.option(
+    "--technique",
+    "-t",
+    "techniques",
+    multiple=True,
+    help="Technique in scope (e.g. T1059); defaults to all techniques",
+)
+@click.option(
+    "--include-mitre-attack-mitigations",
+    is_flag=True,
+    help="Treat ATT&CK mitigations as controls as well as NIST SP 800-53 controls",
+)
+@click.option("--output-path", "-o")
+@click.pass_context
+def coverage(
+    ctx: click.Context,
+    report: str,
+    controls: Tuple[str, ...],
+    techniques: Tuple[str, ...],
+    include_mitre_attack_mitigations: bool,
+    output_path: Optional[str],
+):
+    """
+    Report control coverage of ATT&CK techniques (e.g. per-tactic coverage for a set of implemented controls).
+    """
+    from stix2_explorer import coverage as _coverage
+
+    rows = list(converter.iter_stix2_objects(ctx.obj["data_sources"]))
+    external_ids = converter.get_node_labels_by_external_id(rows)
+
+    # External IDs which are shared by more than one object match all of them.
+    stix2_ids = converter.get_object_ids_by_external_id(rows)
+
+    control_ids = None
+    if not include_mitre_attack_mitigations:
+        control_ids = {o["id"] for o in rows if converter.is_likely_nist_sp_800_53(o)}
+
+    triples = converter.convert_stix2_objects_to_triples(rows)
+    m = _coverage.get_coverage_matrix(triples, control_ids=control_ids)
+
+    implemented = [i for v in controls for i in stix2_ids.get(v, [v])]
+    scope = [i for v in techniques for i in stix2_ids.get(v, [v])] or None
+    label = lambda v: external_ids.get(v, v)
+
+    if report == "minimum-controls":
+        result = {
+            "controls": list(
+                map(label, _coverage.get_minimum_control_set(m, technique_ids=scope))
+            )
+        }
+    elif report == "uncovered":
+        result = {
+            "techniques": list(
+                map(
+                    label,
+                    _coverage.get_uncovered_techniques(
+                        m, implemented, technique_ids=scope
+                    ),
+                )
+            )
+        }
     else:
-        print(blob)
+        result = {
+            "tactics": [
+                {
+                    "tactic": label(c.tactic_id),
+                    "covered": c.covered,
+                    "total": c.total,
+                    "percent": round(c.percent, 2),
+                }
+                for c in _coverage.get_tactic_coverage(
+                    m, implemented, technique_ids=scope
+                )
+            ]
+        }
+    write_json(data=result, path=output_path)
 
 
-def write_jsonl(rows: Iterable[dict], path: Optional[str]):
-    if path:
-        with open(path, "w") as output_file:
-            for row in rows:
-                output_file.write(json.dumps(row) + "\n")
+@main.command()
+@click.argument("old")
+@click.argument("new")
+@click.option("--summary", is_flag=True, help="Only report the number of changes")
+@click.option("--output-path", "-o")
+@click.option("--indent", type=int, default=4)
+def diff(
+    old: str,
+    new: str,
+    summary: bool,
+    output_path: Optional[str],
+    indent: int,
+):
+    """
+    Report the objects and relationships which were added, removed, modified, revoked, or deprecated between two releases (e.g. two ATT&CK bundles).
+    """
+    from stix2_explorer import diff as _diff
+
+    report = _diff.diff_stix2_data_sources(old, new)
+    result = report.get_summary() if summary else report.to_dict()
+    write_json(data=result, path=output_path, indent=indent)
+
+
+@main.command()
+@click.option("--output-dir", "-o", required=True)
+@click.option("--compression", type=click.Choice(["gzip"]))
+@click.pass_context
+def export_neo4j_admin(ctx: click.Context, output_dir: str, compression: Optional[str]):
+    """
+    Write node and relationship CSV files for bulk import with neo4j-admin (i.e. neo4j-admin database import full --nodes=nodes.csv --relationships=relationships.csv <database>).
+    """
+    from stix2_explorer import neo4j_export
+
+    rows = converter.iter_stix2_objects(ctx.obj["data_sources"])
+    neo4j_export.write_neo4j_admin_import_files(
+        rows, output_dir, compression=compression
+    )
+
+
+@main.command()
+@click.argument("url")
+@click.option(
+    "--incremental",
+    is_flag=True,
+    help="Only fetch objects added since the last incremental poll of the collection",
+)
+@click.option("--state-path", help="Where to save the time of the last poll")
+@click.option("--type", "-t", "object_types", multiple=True)
+@click.option("--user", envvar="TAXII_USER")
+@click.option("--password", envvar="TAXII_PASSWORD")
+@click.option("--output-path", "-o")
+@click.option("--compression", type=click.Choice(COMPRESSION_TYPES))
+def poll_taxii(
+    url: str,
+    incremental: bool,
+    state_path: Optional[str],
+    object_types: Tuple[str, ...],
+    user: Optional[str],
+    password: Optional[str],
+    output_path: Optional[str],
+    compression: Optional[str],
+):
+    """
+    Stream the objects in a TAXII 2.1 collection (e.g. https://example.com/api1/collections/<id>/) as JSON lines.
+    """
+    from stix2_explorer import taxii
+
+    src = taxii.TAXIICollectionSource(
+        url,
+        user=user,
+        password=password,
+        state_path=state_path or taxii.DEFAULT_STATE_PATH,
+    )
+    rows = src.iter_objects(incremental=incremental, type=list(object_types))
+    write_jsonl(rows=rows, path=output_path, compression=compression)
+
+
+@main.command()
+@click.argument("paths", nargs=-1, required=True)
+@click.option("--output-path", "-o")
+@click.option("--compression", type=click.Choice(COMPRESSION_TYPES))
+@click.option(
+    "--node-label-type",
+    type=click.Choice(converter.NODE_LABEL_TYPES),
+    default=converter.NODE_LABEL_TYPE_ID,
+    show_default=True,
+)
+@click.option(
+    "--memory-limit",
+    default="512MB",
+    show_default=True,
+    help="How much memory to use for sorting before spilling to disk",
+)
+@click.option("--temp-dir", help="Where to write sorted runs")
+@click.option("--include-deprecated", is_flag=True)
+@click.option("--include-revoked", is_flag=True)
+def list_relationships_out_of_core(
+    paths: Tuple[str, ...],
+    output_path: Optional[str],
+    compression: Optional[str],
+    node_label_type: str,
+    memory_limit: str,
+    temp_dir: Optional[str],
+    include_deprecated: bool,
+    include_revoked: bool,
+):
+    """
+    List the relationships in corpora which do not fit in memory (e.g. ~/src/cti-stix-common-objects/objects) by streaming one bundle at a time and sorting on disk.
+    """
+    from stix2_explorer import out_of_core
+
+    triples = out_of_core.convert_stix2_objects_to_triples(
+        paths,
+        node_labels=node_label_type,
+        include_deprecated=include_deprecated,
+        include_revoked=include_revoked,
+        memory_limit=out_of_core.parse_size(memory_limit),
+        temp_dir=temp_dir,
+    )
+    write_csv(rows=triples, path=output_path, compression=compression)
+
+
+@main.command()
+@click.option("--host", default="127.0.0.1", show_default=True)
+@click.option("--port", type=int, default=8750, show_default=True)
+@click.option("--socket", "socket_path", help="Listen on a Unix socket instead")
+@click.pass_context
+def serve(
+    ctx: click.Context,
+    host: str,
+    port: int,
+    socket_path: Optional[str],
+):
+    """
+    Load the selected content once and answer queries about it until interrupted.
+
+    Commands which select the same content (e.g. list-relationships) are forwarded to the server while it is running.
+    """
+    from stix2_explorer import server
+
+    corpus = server.Corpus.from_data_sources(ctx.obj["data_sources"])
+    corpus.warm()
+
+    httpd = server.create_server(
+        corpus,
+        ctx.obj["server_key"],
+        host=host,
+        port=port,
+        socket_path=socket_path,
+    )
+    click.echo(
+        f"Serving {len(corpus.objects)} objects on {server.get_server_url(httpd)}",
+        err=True,
+    )
+    server.serve(httpd)
+
+
+@main.command()
+@click.argument("object_ids", nargs=-1, required=True)
+@click.option(
+    "--radius", "-r", type=click.IntRange(1, MAX_RADIUS), default=1, show_default=True
+)
+@click.option(
+    "--label",
+    "labels",
+    multiple=True,
+    help="Only follow relationships with these labels (e.g. mitigates)",
+)
+@click.option(
+    "--node-label-type",
+    type=click.Choice(converter.NODE_LABEL_TYPES),
+    default=converter.NODE_LABEL_TYPE_ID,
+    show_default=True,
+)
+@click.option("--output-path", "-o")
+@click.option("--compression", type=click.Choice(COMPRESSION_TYPES))
+@click.pass_context
+def neighbours(
+    ctx: click.Context,
+    object_ids: Tuple[str, ...],
+    radius: int,
+    labels: Tuple[str, ...],
+    node_label_type: str,
+    output_path: Optional[str],
+    compression: Optional[str],
+):
+    """
+    List the relationships within a number of steps of one or more objects.
+    """
+    client = ctx.obj.get("client")
+    if client:
+        triples = client.iter_neighbour_triples(
+            object_ids, radius=radius, labels=labels, node_label_type=node_label_type
+        )
     else:
-        for row in rows:
-            print(json.dumps(row))
+        from stix2_explorer import server
+
+        corpus = server.Corpus.from_data_sources(ctx.obj["data_sources"])
+        triples = corpus.get_neighbour_triples(
+            object_ids, radius=radius, labels=labels, node_label_type=node_label_type
+        )
+
+    write_csv(rows=triples, path=output_path, compression=compression)
 
 
 @main.command()
+@click.option("--output-path", "-o")
+@click.option(
+    "--node-label-type",
+    type=click.Choice(converter.NODE_LABEL_TYPES),
+    default=converter.NODE_LABEL_TYPE_ID,
+    show_default=True,
+)
 @click.pass_context
-def to_dot(ctx: click.Context):
-    pass
+def to_dot(ctx: click.Context, output_path: Optional[str], node_label_type: str):
+    """
+    Render the relationships between objects as a DOT graph.
+    """
+    client = ctx.obj.get("client")
+    if client:
+        dot = client.get_dot(node_label_type)
+    else:
+        rows = converter.iter_stix2_objects(ctx.obj["data_sources"])
+        triples = converter.convert_stix2_objects_to_triples(
+            rows, node_labels=node_label_type
+        )
+        dot = converter.convert_triples_to_dot(triples)
+
+    with open_output(output_path) as file:
+        file.write(dot.encode("utf-8"))
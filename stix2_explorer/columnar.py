@@ -0,0 +1,213 @@
+from dataclasses import dataclass
+import os
+import re
+from typing import Dict, Iterable, List, Optional
+
+import pyarrow as pa
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+
+from stix2_explorer import converter, provenance as _provenance
+from stix2_explorer.converter import Decoder, EdgeBatch
+from stix2_explorer.provenance import Provenance
+
+OBJECTS = "objects"
+EXTERNAL_REFERENCES = "external_references"
+TRIPLES = "triples"
+
+PARQUET = "parquet"
+ARROW = "arrow"
+
+OUTPUT_FORMATS = [PARQUET, ARROW]
+
+TIMESTAMP = pa.timestamp("us", tz="UTC")
+
+# STIX 2.1 timestamps may have any number of fractional digits, but only microseconds are kept.
+_SUB_MICROSECOND_DIGITS = re.compile(r"(\.\d{6})\d+")
+
+# A bitmask of the data sources an object or triple came from (see stix2_explorer.provenance).
+PROVENANCE_FIELD = pa.field("provenance", pa.uint64())
+
+OBJECTS_SCHEMA = pa.schema(
+    [
+        ("id", pa.string()),
+        ("type", pa.string()),
+        ("spec_version", pa.string()),
+        ("created", TIMESTAMP),
+        ("modified", TIMESTAMP),
+        ("created_by_ref", pa.string()),
+        ("name", pa.string()),
+        ("aliases", pa.list_(pa.string())),
+        ("external_id", pa.string()),
+        ("revoked", pa.bool_()),
+        ("deprecated", pa.bool_()),
+    ]
+)
+
+EXTERNAL_REFERENCES_SCHEMA = pa.schema(
+    [
+        ("object_id", pa.string()),
+        ("source_name", pa.string()),
+        ("external_id", pa.string()),
+        ("url", pa.string()),
+    ]
+)
+
+TRIPLES_SCHEMA = pa.schema(
+    [
+        ("subject", pa.string()),
+        ("subject_type", pa.string()),
+        ("predicate", pa.string()),
+        ("object", pa.string()),
+        ("object_type", pa.string()),
+    ]
+)
+
+
+@dataclass()
+class Tables:
+    objects: pa.Table
+    external_references: pa.Table
+    triples: pa.Table
+
+    def items(self) -> Iterable[tuple]:
+        yield from (
+            (OBJECTS, self.objects),
+            (EXTERNAL_REFERENCES, self.external_references),
+            (TRIPLES, self.triples),
+        )
+
+
+def convert_stix2_objects_to_tables(
+    rows: Iterable[dict],
+    decoders: Optional[Iterable[Decoder]] = None,
+    provenance: Optional[Provenance] = None,
+) -> Tables:
+    """
+    Convert a stream of STIX 2 objects into Arrow tables of objects, external references, and triples in a single pass.
+
+    If provenance is given, the objects and triples tables include a provenance column.
+    """
+    rows = list(rows)
+    decoders = decoders or converter.get_default_decoders()
+
+    objects_schema = OBJECTS_SCHEMA
+    triples_schema = TRIPLES_SCHEMA
+    if provenance is not None:
+        objects_schema = objects_schema.append(PROVENANCE_FIELD)
+        triples_schema = triples_schema.append(PROVENANCE_FIELD)
+
+    objects = _get_columns(objects_schema)
+    external_references = _get_columns(EXTERNAL_REFERENCES_SCHEMA)
+    for o in rows:
+        stix2_id = o["id"]
+        stix2_type = o["type"]
+
+        for ref in o.get("external_references") or []:
+            external_references["object_id"].append(stix2_id)
+            external_references["source_name"].append(ref.get("source_name"))
+            external_references["external_id"].append(ref.get("external_id"))
+            external_references["url"].append(ref.get("url"))
+
+        if stix2_type == "relationship":
+            continue
+
+        try:
+            external_id = converter.get_external_id(o)
+        except (KeyError, ValueError):
+            external_id = None
+
+        objects["id"].append(stix2_id)
+        objects["type"].append(stix2_type)
+        objects["spec_version"].append(o.get("spec_version"))
+        objects["created"].append(o.get("created"))
+        objects["modified"].append(o.get("modified"))
+        objects["created_by_ref"].append(o.get("created_by_ref"))
+        objects["name"].append(o.get("name"))
+        objects["aliases"].append(o.get("aliases"))
+        objects["external_id"].append(external_id)
+        objects["revoked"].append(any(d.is_revoked(o) for d in decoders))
+        objects["deprecated"].append(any(d.is_deprecated(o) for d in decoders))
+        if provenance is not None:
+            objects["provenance"].append(provenance.get_mask(stix2_id))
+
+    triples = _get_columns(triples_schema)
+    if provenance is None:
+        batches = converter.convert_stix2_objects_to_edge_batches(
+            rows, decoders=decoders
+        )
+    else:
+        # Decode the edges once: the keys of the provenance masks are the de-duplicated triples.
+        edge_provenance = _provenance.get_edge_provenance(
+            _provenance.iter_edge_batches(rows, decoders=decoders), provenance
+        )
+        batch = EdgeBatch()
+        for k in edge_provenance:
+            batch.append(*k)
+        triples["provenance"] = list(edge_provenance.values())
+        batches = [batch]
+
+    for batch in batches:
+        triples["subject"].extend(batch.sources)
+        triples["subject_type"].extend(
+            map(converter.get_stix2_type_from_id, batch.sources)
+        )
+        triples["predicate"].extend(batch.predicates)
+        triples["object"].extend(batch.objects)
+        triples["object_type"].extend(
+            map(converter.get_stix2_type_from_id, batch.objects)
+        )
+
+    return Tables(
+        objects=_get_table(objects, objects_schema),
+        external_references=_get_table(external_references, EXTERNAL_REFERENCES_SCHEMA),
+        triples=_get_table(triples, triples_schema),
+    )
+
+
+def _get_columns(schema: pa.Schema) -> Dict[str, List]:
+    return {name: [] for name in schema.names}
+
+
+def _get_table(columns: Dict[str, List], schema: pa.Schema) -> pa.Table:
+    arrays = []
+    for field in schema:
+        if field.type == TIMESTAMP:
+            values = [
+                _SUB_MICROSECOND_DIGITS.sub(r"\1", v) if v else v
+                for v in columns[field.name]
+            ]
+            array = pa.array(values, type=pa.string()).cast(TIMESTAMP)
+        else:
+            array = pa.array(columns[field.name], type=field.type)
+        arrays.append(array)
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def write_tables(tables: Tables, directory: str, output_format: str = PARQUET):
+    """
+    Write each table to {directory}/{table}.parquet (or .arrow for Arrow IPC files).
+    """
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unsupported output format: {output_format}")
+
+    directory = converter.get_real_path(directory)
+    os.makedirs(directory, exist_ok=True)
+    for name, table in tables.items():
+        path = os.path.join(directory, f"{name}.{output_format}")
+        if output_format == PARQUET:
+            pq.write_table(table, path)
+        else:
+            feather.write_feather(table, path, compression="uncompressed")
+
+
+def read_tables(directory: str, file_format: str = PARQUET) -> Tables:
+    directory = converter.get_real_path(directory)
+    tables = {}
+    for name in (OBJECTS, EXTERNAL_REFERENCES, TRIPLES):
+        path = os.path.join(directory, f"{name}.{file_format}")
+        if file_format == PARQUET:
+            tables[name] = pq.read_table(path)
+        else:
+            tables[name] = feather.read_table(path, memory_map=True)
+    return Tables(**tables)
@@ -44,6 +44,15 @@ Quad = Tuple[str, str, str, str]
 
 DOT_INDENT = 4
 
+# Location of cached indexes (e.g. search indexes), keyed by corpus fingerprint
+CACHE_DIR = "~/.cache/stix2-explorer"
+
+# Where a running query server (i.e. tool serve) records its address
+SERVER_STATE_PATH = "~/.cache/stix2-explorer/server.json"
+
+# The most steps a neighbours query can follow from the objects it starts at
+MAX_RADIUS = 10
+
 # UUIDv5 namespace from STIX 2.1 specification
 # - See: https://docs.oasis-open.org/cti/stix/v2.1/csprd01/stix-v2.1-csprd01.html#_Toc16070594
 UUID_NAMESPACE = "00abedb4-aa42-466c-9c01-fed23315a9b7"
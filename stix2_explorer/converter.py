@@ -1,9 +1,11 @@
 import collections
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 import concurrent.futures
 import datetime
 import fnmatch
+import functools
 import glob
+import hashlib
 import itertools
 import os
 import re
@@ -12,6 +14,7 @@ import tempfile
 from typing import (
     Any,
     Callable,
+    FrozenSet,
     List,
     Optional,
     Tuple,
@@ -27,6 +30,8 @@ import networkx as nx
 import requests
 from stix2.base import _STIXBase
 from stix2.datastore import DataSource
+from stix2.datastore.filters import FilterSet, apply_common_filters
+from stix2.registry import class_for_type
 import json
 import networkx as nx
 
@@ -43,17 +48,111 @@ from stix2 import (
     MemorySource,
     CompositeDataSource,
 )
-from stix2_explorer.serialization import JSONEncoder
+from stix2_explorer.serialization import to_python
 
 logger = logging.getLogger(__name__)
 
 RELATED_TO = "related-to"
 
+NODE_LABEL_TYPE_ID = "id"
+NODE_LABEL_TYPE_NAME = "name"
+NODE_LABEL_TYPE_TYPE = "type"
+NODE_LABEL_TYPE_EXTERNAL_ID = "external-id"
+
+NODE_LABEL_TYPES = [
+    NODE_LABEL_TYPE_ID,
+    NODE_LABEL_TYPE_NAME,
+    NODE_LABEL_TYPE_TYPE,
+    NODE_LABEL_TYPE_EXTERNAL_ID,
+]
+
+# Fields whose values are repeated across many objects (e.g. STIX IDs are repeated in the refs of every relationship to or from an object).
+INTERNED_FIELDS = frozenset(
+    [
+        "id",
+        "type",
+        "spec_version",
+        "relationship_type",
+        "source_ref",
+        "target_ref",
+        "created_by_ref",
+        "x_mitre_modified_by_ref",
+        "x_mitre_data_source_ref",
+        "behavior_ref",
+        "x_mitre_version",
+        "x_mitre_attack_spec_version",
+    ]
+)
+
+# Timestamps are only interned for objects which are kept as dicts (parsing into STIX 2 objects replaces them with STIXdatetime values).
+INTERNED_TIMESTAMP_FIELDS = frozenset(["created", "modified"])
+INTERNED_LIST_FIELDS = frozenset(
+    [
+        "object_marking_refs",
+        "tactic_refs",
+        "objective_refs",
+        "x_mitre_domains",
+        "x_mitre_platforms",
+    ]
+)
+
+PROJECTION_GRAPH = "graph"
+PROJECTION_MATRIX = "matrix"
+
+# Fields which are kept by every projection (i.e. so that objects can still be de-duplicated and filtered by revocation and deprecation status).
+PROJECTION_BASE_FIELDS = frozenset(
+    [
+        "type",
+        "id",
+        "spec_version",
+        "created",
+        "modified",
+        "revoked",
+        "x_mitre_deprecated",
+        "x_capec_status",
+    ]
+)
+
+_PROJECTION_MATRIX_FIELDS = PROJECTION_BASE_FIELDS | frozenset(
+    [
+        "name",
+        "external_references",
+        "kill_chain_phases",
+        "relationship_type",
+        "source_ref",
+        "target_ref",
+        "tactic_refs",
+        "x_mitre_shortname",
+        "x_mitre_data_source_ref",
+        "objective_refs",
+        "behavior_ref",
+        "x_mitre_domains",
+        "x_capec_version",
+        "obj_defn",
+        "extensions",
+    ]
+)
+
+PROJECTIONS = {
+    PROJECTION_MATRIX: _PROJECTION_MATRIX_FIELDS,
+    PROJECTION_GRAPH: _PROJECTION_MATRIX_FIELDS
+    | frozenset(
+        [
+            "aliases",
+            "created_by_ref",
+            "object_marking_refs",
+            "x_mitre_modified_by_ref",
+        ]
+    ),
+}
+
 INCLUDE_IDENTITIES = False
 INCLUDE_MARKINGS = False
 
+DEFAULT_EDGE_BATCH_SIZE = 10000
 
-@dataclass()
+
+@dataclass(slots=True)
 class Node:
     id: str
     type: str
@@ -67,11 +166,19 @@ class Node:
         )
 
 
-@dataclass()
+@dataclass(slots=True)
 class Edge:
     source: str
     predicate: str
     object: str
+    # The ID of the object the edge was decoded from (e.g. a relationship).
+    origin: Optional[str] = None
+
+    def __post_init__(self):
+        # Each ID and predicate is shared by many edges, so only store one copy of each.
+        self.source = sys.intern(self.source)
+        self.predicate = sys.intern(self.predicate)
+        self.object = sys.intern(self.object)
 
     def to_triple(self) -> Tuple[str, str, str]:
         return self.source, self.predicate, self.object
@@ -84,6 +191,39 @@ class Edge:
         )
 
 
+@dataclass()
+class EdgeBatch:
+    """
+    A batch of edges stored as parallel columns (i.e. the source, predicate, object, and origin of the i-th edge are sources[i], predicates[i], objects[i], and origins[i]).
+    """
+
+    sources: List[str] = field(default_factory=list)
+    predicates: List[str] = field(default_factory=list)
+    objects: List[str] = field(default_factory=list)
+    origins: List[Optional[str]] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.sources)
+
+    def append(
+        self, source: str, predicate: str, object: str, origin: Optional[str] = None
+    ):
+        # Each ID and predicate is shared by many edges, so only store one copy of each.
+        self.sources.append(sys.intern(source))
+        self.predicates.append(sys.intern(predicate))
+        self.objects.append(sys.intern(object))
+        self.origins.append(origin)
+
+    def iter_triples(self) -> Iterator[Triple]:
+        return zip(self.sources, self.predicates, self.objects)
+
+    def iter_edges(self) -> Iterator[Edge]:
+        for s, p, o, origin in zip(
+            self.sources, self.predicates, self.objects, self.origins
+        ):
+            yield Edge(source=s, predicate=p, object=o, origin=origin)
+
+
 @dataclass()
 class Decoder:
     include_identities: bool = INCLUDE_IDENTITIES
@@ -95,12 +235,29 @@ class Decoder:
         """
         raise NotImplementedError()
 
+    def iter_edge_batches(
+        self, rows: Iterator[dict], batch_size: int = DEFAULT_EDGE_BATCH_SIZE
+    ) -> Iterator[EdgeBatch]:
+        """
+        Decode a stream of rows into batches of edges (by default, from the edges returned by iter_edges).
+
+        Every batch except the last holds at least batch_size edges (an object's edges are never split across batches).
+        """
+        batch = EdgeBatch()
+        for edge in self.iter_edges(rows):
+            batch.append(edge.source, edge.predicate, edge.object, edge.origin)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = EdgeBatch()
+        if batch:
+            yield batch
+
     def iter_triples(self, rows: Iterator[dict]) -> Iterator[Tuple[str, str, str]]:
         """
         Decode a stream of rows into a stream of triples.
         """
-        for edge in self.iter_edges(rows):
-            yield edge.to_triple()
+        for batch in self.iter_edge_batches(rows):
+            yield from batch.iter_triples()
 
     def is_deprecated(self, o: dict) -> bool:
         """
@@ -134,36 +291,48 @@ class GenericDecoder(Decoder):
     """
 
     def iter_edges(self, rows: Iterator[dict]) -> Iterator[Edge]:
+        for batch in self._iter_edge_batches(rows):
+            yield from batch.iter_edges()
+
+    def iter_edge_batches(
+        self, rows: Iterator[dict], batch_size: int = DEFAULT_EDGE_BATCH_SIZE
+    ) -> Iterator[EdgeBatch]:
+        # Subclasses which only override iter_edges are batched from their edges.
+        if type(self).iter_edges is not GenericDecoder.iter_edges:
+            return super().iter_edge_batches(rows, batch_size=batch_size)
+        return self._iter_edge_batches(rows, batch_size=batch_size)
+
+    def _iter_edge_batches(
+        self, rows: Iterator[dict], batch_size: int = DEFAULT_EDGE_BATCH_SIZE
+    ) -> Iterator[EdgeBatch]:
+        batch = EdgeBatch()
         for o in rows:
+            if len(batch.sources) >= batch_size:
+                yield batch
+                batch = EdgeBatch()
+
             stix2_id = o["id"]
             stix2_type = o["type"]
 
             if stix2_type == "relationship":
-                yield Edge(
-                    source=o["source_ref"],
-                    predicate=o["relationship_type"],
-                    object=o["target_ref"],
+                batch.append(
+                    o["source_ref"], o["relationship_type"], o["target_ref"], stix2_id
                 )
                 continue
 
             if self.include_identities:
                 created_by = o.get("created_by_ref")
                 if created_by:
-                    yield Edge(
-                        source=stix2_id,
-                        predicate=RELATED_TO,
-                        object=created_by,
-                    )
+                    batch.append(stix2_id, RELATED_TO, created_by, stix2_id)
 
             if self.include_markings:
                 marking_refs = o.get("object_marking_refs")
                 if marking_refs:
                     for marking_ref in marking_refs:
-                        yield Edge(
-                            source=stix2_id,
-                            predicate=RELATED_TO,
-                            object=marking_ref,
-                        )
+                        batch.append(stix2_id, RELATED_TO, marking_ref, stix2_id)
+
+        if batch:
+            yield batch
 
 
 @dataclass()
@@ -173,6 +342,20 @@ class MitreDecoder(Decoder):
     """
 
     def iter_edges(self, rows: Iterator[dict]) -> Iterator[Edge]:
+        for batch in self._iter_edge_batches(rows):
+            yield from batch.iter_edges()
+
+    def iter_edge_batches(
+        self, rows: Iterator[dict], batch_size: int = DEFAULT_EDGE_BATCH_SIZE
+    ) -> Iterator[EdgeBatch]:
+        # Subclasses which only override iter_edges are batched from their edges.
+        if type(self).iter_edges is not MitreDecoder.iter_edges:
+            return super().iter_edge_batches(rows, batch_size=batch_size)
+        return self._iter_edge_batches(rows, batch_size=batch_size)
+
+    def _iter_edge_batches(
+        self, rows: Iterator[dict], batch_size: int = DEFAULT_EDGE_BATCH_SIZE
+    ) -> Iterator[EdgeBatch]:
         rows = list(rows)
 
         kill_chain_phases_to_tactics = {}
@@ -181,7 +364,12 @@ class MitreDecoder(Decoder):
                 k = o["x_mitre_shortname"]
                 kill_chain_phases_to_tactics[k] = o["id"]
 
+        batch = EdgeBatch()
         for o in rows:
+            if len(batch.sources) >= batch_size:
+                yield batch
+                batch = EdgeBatch()
+
             stix2_type = o["type"]
             if stix2_type == "relationship":
                 continue
@@ -190,53 +378,33 @@ class MitreDecoder(Decoder):
 
             if stix2_type == "x-mitre-matrix":
                 for tactic_id in o["tactic_refs"]:
-                    yield Edge(
-                        source=tactic_id,
-                        predicate=RELATED_TO,
-                        object=stix2_id,
-                    )
+                    batch.append(tactic_id, RELATED_TO, stix2_id, stix2_id)
 
             elif stix2_type == "attack-pattern":
                 for k in o.get("kill_chain_phases", []):
-                    try:
-                        yield Edge(
-                            source=stix2_id,
-                            predicate=RELATED_TO,
-                            object=kill_chain_phases_to_tactics[k["phase_name"]],
-                        )
-                    except KeyError:
-                        continue
+                    tactic_id = kill_chain_phases_to_tactics.get(k.get("phase_name"))
+                    if tactic_id:
+                        batch.append(stix2_id, RELATED_TO, tactic_id, stix2_id)
 
             elif stix2_type == "x-mitre-data-component":
-                yield Edge(
-                    source=o["x_mitre_data_source_ref"],
-                    predicate=RELATED_TO,
-                    object=stix2_id,
+                batch.append(
+                    o["x_mitre_data_source_ref"], RELATED_TO, stix2_id, stix2_id
                 )
 
             elif stix2_type == "malware-behavior":
                 for ref in o["objective_refs"]:
-                    yield Edge(
-                        source=stix2_id,
-                        predicate=RELATED_TO,
-                        object=ref,
-                    )
+                    batch.append(stix2_id, RELATED_TO, ref, stix2_id)
 
             elif stix2_type == "malware-method":
-                yield Edge(
-                    source=stix2_id,
-                    predicate=RELATED_TO,
-                    object=o["behavior_ref"],
-                )
+                batch.append(stix2_id, RELATED_TO, o["behavior_ref"], stix2_id)
 
             if self.include_identities:
                 modified_by = o.get("x_mitre_modified_by_ref")
                 if modified_by:
-                    yield Edge(
-                        source=stix2_id,
-                        predicate=RELATED_TO,
-                        object=modified_by,
-                    )
+                    batch.append(stix2_id, RELATED_TO, modified_by, stix2_id)
+
+        if batch:
+            yield batch
 
     def is_deprecated(self, o: dict) -> bool:
         return (
@@ -270,10 +438,16 @@ def iter_stix2_objects(
     decoders: Optional[Iterable[Decoder]] = None,
     include_deprecated: bool = False,
     include_revoked: bool = False,
+    projection: Optional[Union[str, Iterable[str]]] = None,
 ) -> Iterator[dict]:
 
-    src = get_stix2_data_source(data_sources)
-    rows = map(convert_stix2_object_to_dict, src.query())
+    src = get_stix2_data_source(data_sources, projection=projection)
+    rows = _iter_stix2_data_source_objects(
+        src,
+        object_ids=object_ids,
+        object_types=object_types,
+        object_names=object_names,
+    )
 
     rows = filter_stix2_objects(
         rows=rows,
@@ -284,9 +458,49 @@ def iter_stix2_objects(
         include_deprecated=include_deprecated,
         include_revoked=include_revoked,
     )
+    if projection:
+        # Objects from data sources which were loaded without a projection (e.g. SQLite stores) are projected as they are read.
+        rows = project_stix2_objects(rows, projection)
     yield from rows
 
 
+def _iter_stix2_data_source_objects(
+    src: DataSource,
+    object_ids: Optional[Iterable[str]] = None,
+    object_types: Optional[Iterable[str]] = None,
+    object_names: Optional[Iterable[str]] = None,
+) -> Iterator[dict]:
+    """
+    Stream objects from a data source, pushing ID, type, and name filters down to data sources with indexes (e.g. SQLite).
+    """
+    from stix2_explorer.sqlite_store import SQLiteSource
+
+    if not isinstance(src, CompositeDataSource):
+        if isinstance(src, SQLiteSource):
+            yield from src.iter_objects(
+                object_ids=object_ids,
+                object_types=object_types,
+                object_names=object_names,
+            )
+        else:
+            yield from map(convert_stix2_object_to_dict, src.query())
+        return
+
+    # Objects which appear in more than one data source are only returned once.
+    seen = set()
+    for data_source in src.get_all_data_sources():
+        for o in _iter_stix2_data_source_objects(
+            data_source,
+            object_ids=object_ids,
+            object_types=object_types,
+            object_names=object_names,
+        ):
+            k = (o["id"], o.get("modified"))
+            if k not in seen:
+                seen.add(k)
+                yield o
+
+
 def filter_stix2_objects(
     rows: Iterable[Any],
     object_ids: Optional[Iterable[str]] = None,
@@ -347,11 +561,17 @@ def get_related_object_subgraph(
     radius: Optional[int] = 1,
 ) -> nx.DiGraph:
 
-    object_ids = object_ids or g.nodes()
+    object_ids = set(object_ids or g.nodes())
 
+    # Each step follows the edges of the nodes which were reached by the previous step.
     sg = nx.DiGraph()
+    seen = set()
     for _ in range(radius):
+        frontier = set()
         for object_id in object_ids:
+            if object_id not in g:
+                continue
+
             in_edges = g.in_edges(object_id, data=True)
             out_edges = g.out_edges(object_id, data=True)
 
@@ -361,6 +581,12 @@ def get_related_object_subgraph(
                 ):
                     continue
                 sg.add_edge(u, v, **data)
+                frontier.update((u, v))
+
+        seen.update(object_ids)
+        object_ids = frontier - seen
+        if not object_ids:
+            break
 
     return sg
 
@@ -397,9 +623,9 @@ def convert_stix2_objects_to_digraph(
 
     g = nx.DiGraph()
     for decoder in decoders:
-        for edge in decoder.iter_edges(rows):
-            edge_data = {edge_label_key: edge.predicate}
-            g.add_edge(edge.source, edge.object, **edge_data)
+        for batch in decoder.iter_edge_batches(rows):
+            edge_data = ({edge_label_key: p} for p in batch.predicates)
+            g.add_edges_from(zip(batch.sources, batch.objects, edge_data))
 
     for o in rows:
         if o["id"] in g:
@@ -438,8 +664,7 @@ def convert_stix2_objects_to_dicts(rows: Iterable[Any]) -> Iterable[dict]:
 
 def convert_stix2_object_to_dict(o: Any) -> dict:
     if isinstance(o, _STIXBase):
-        b = json.dumps(o, cls=JSONEncoder)
-        o = json.loads(b)
+        o = to_python(o)
     elif isinstance(o, dict):
         pass
     else:
@@ -451,10 +676,82 @@ def convert_stix2_objects_to_triples(
     rows: Iterable[dict],
     node_labels: Optional[Union[str, Dict[str, str], Callable[[dict], str]]] = None,
     decoders: Optional[Iterable[Decoder]] = None,
-) -> Iterable[Tuple[str, str, str]]:
+) -> Iterator[Triple]:
+    """
+    Decode a stream of STIX 2 objects into a stream of de-duplicated triples.
+
+    Node labels can be a label type (i.e. id, name, type, or external-id), a mapping of STIX IDs to labels, or a function which returns the label for an object. Nodes without a label are identified by their STIX ID.
+    """
+    for batch in convert_stix2_objects_to_edge_batches(
+        rows, node_labels=node_labels, decoders=decoders
+    ):
+        yield from batch.iter_triples()
+
+
+def convert_stix2_objects_to_edge_batches(
+    rows: Iterable[dict],
+    node_labels: Optional[Union[str, Dict[str, str], Callable[[dict], str]]] = None,
+    decoders: Optional[Iterable[Decoder]] = None,
+    batch_size: int = DEFAULT_EDGE_BATCH_SIZE,
+) -> Iterator[EdgeBatch]:
+    """
+    Decode a stream of STIX 2 objects into batches of de-duplicated edges (see convert_stix2_objects_to_triples for node labels).
 
-    g = convert_stix2_objects_to_digraph(rows, decoders=decoders)
-    return convert_digraph_to_triples(g)
+    Each edge has the origin of the first object it was decoded from.
+    """
+    rows = list(rows)
+    decoders = decoders or get_default_decoders()
+    get_label = None
+    if node_labels is not None and node_labels != NODE_LABEL_TYPE_ID:
+        get_label = get_node_label_function(rows, node_labels)
+
+    seen = set()
+    for decoder in decoders:
+        for batch in decoder.iter_edge_batches(rows, batch_size=batch_size):
+            sources = batch.sources
+            objects = batch.objects
+            if get_label is not None:
+                sources = map(get_label, sources)
+                objects = map(get_label, objects)
+
+            unique = EdgeBatch()
+            triples = zip(sources, batch.predicates, objects)
+            for triple, origin in zip(triples, batch.origins):
+                if triple not in seen:
+                    seen.add(triple)
+                    unique.append(*triple, origin)
+            if unique:
+                yield unique
+
+
+def get_node_label_function(
+    rows: Iterable[dict],
+    node_labels: Optional[Union[str, Dict[str, str], Callable[[dict], str]]] = None,
+) -> Callable[[str], str]:
+    """
+    Return a function which maps STIX IDs to node labels using a compact ID to label map.
+    """
+    if node_labels is None or node_labels == NODE_LABEL_TYPE_ID:
+        return lambda v: v
+    elif node_labels == NODE_LABEL_TYPE_TYPE:
+        return get_stix2_type_from_id
+    elif node_labels == NODE_LABEL_TYPE_NAME:
+        m = get_node_labels(rows, "name")
+    elif node_labels == NODE_LABEL_TYPE_EXTERNAL_ID:
+        m = get_node_labels_by_external_id(rows)
+    elif isinstance(node_labels, str):
+        raise ValueError(f"Unsupported node label type: {node_labels}")
+    elif callable(node_labels):
+        m = {}
+        for o in rows:
+            try:
+                m[o["id"]] = node_labels(o)
+            except (KeyError, ValueError):
+                continue
+    else:
+        m = node_labels
+
+    return lambda v: m.get(v) or v
 
 
 def convert_digraph_to_triples(
@@ -554,18 +851,23 @@ def convert_triples_to_dot(triples: Iterable[Triple]) -> str:
         "",
     ]
     triples = sorted(triples)
+
+    # Lines are de-duplicated with a set rather than by searching the list of lines, which is quadratic for large graphs.
+    seen = set(lines)
     for triple in triples:
         s, _, o = triple
         for v in (s, o):
             line = f'{indent}"{_get_dot_safe_string(v)}" [label="{v}"];'
-            if line not in lines:
+            if line not in seen:
+                seen.add(line)
                 lines.append(line)
 
     lines.append("")
     for triple in triples:
         s, p, o = triple
         line = f'{indent}"{_get_dot_safe_string(s)}" -> "{_get_dot_safe_string(o)}" [label="{p}"];'
-        if line not in lines:
+        if line not in seen:
+            seen.add(line)
             lines.append(line)
 
     lines.append("}")
@@ -605,6 +907,27 @@ def get_node_labels(rows: Iterable[dict], k: str) -> Dict[str, str]:
     return m
 
 
+def get_node_labels_by_external_id(rows: Iterable[dict]) -> Dict[str, str]:
+    m = {}
+    for o in rows:
+        try:
+            m[o["id"]] = get_external_id(o)
+        except (KeyError, ValueError):
+            continue
+    return m
+
+
+def get_object_ids_by_external_id(rows: Iterable[dict]) -> Dict[str, List[str]]:
+    """
+    Map external IDs to the IDs of every object with that external ID (e.g. when more than one bundle describes the same technique).
+    """
+    m = collections.defaultdict(list)
+    for stix2_id, external_id in get_node_labels_by_external_id(rows).items():
+        if stix2_id not in m[external_id]:
+            m[external_id].append(stix2_id)
+    return dict(m)
+
+
 def get_stix2_type_from_id(stix2_id: str) -> str:
     return stix2_id.split("--")[0]
 
@@ -614,22 +937,66 @@ def parse_timestamp(t: Optional[str]) -> Optional[datetime.datetime]:
         return datetime.datetime.fromisoformat(t)
 
 
+_MIN_TIMESTAMP = datetime.datetime.min.replace(tzinfo=datetime.timezone.utc)
+_FRACTIONAL_SECONDS = re.compile(r"\.(\d+)")
+
+
+def get_modified_timestamp(o: Any) -> datetime.datetime:
+    """
+    Return when an object was last modified as an aware datetime (or the earliest possible datetime if it has no modified timestamp), so that versions can be compared whatever the precision of their timestamps (e.g. ...:19Z is earlier than ...:19.735Z).
+    """
+    t = o.get("modified")
+    if not t:
+        return _MIN_TIMESTAMP
+    if not isinstance(t, datetime.datetime):
+        # STIX allows any number of fractional digits (and a trailing Z), but fromisoformat only accepts 3 or 6 digits on Python 3.10.
+        t = _FRACTIONAL_SECONDS.sub(lambda m: "." + m.group(1).ljust(6, "0")[:6], t)
+        if t.endswith(("Z", "z")):
+            t = t[:-1] + "+00:00"
+        t = datetime.datetime.fromisoformat(t)
+    if t.tzinfo is None:
+        t = t.replace(tzinfo=datetime.timezone.utc)
+    return t
+
+
 def get_uuid5(data: dict) -> str:
     namespace = uuid.UUID(UUID_NAMESPACE)
     blob = jcs.canonicalize(data).decode("utf-8")
     return str(uuid.uuid5(namespace, blob))
 
 
+def get_content_hash(data: dict) -> str:
+    """
+    Return the SHA-256 hash of the canonical (RFC 8785) JSON form of an object.
+    """
+    return hashlib.sha256(jcs.canonicalize(data)).hexdigest()
+
+
+def get_corpus_fingerprint(rows: Iterable[dict]) -> str:
+    """
+    Return a hash which identifies a set of STIX 2 objects by their IDs and modification times.
+    """
+    keys = sorted(f"{o['id']}|{o.get('modified') or ''}" for o in rows)
+    h = hashlib.sha256()
+    for k in keys:
+        h.update(k.encode("utf-8"))
+        h.update(b"\n")
+    return h.hexdigest()
+
+
 def get_stix2_data_source(
-    data_sources: Union[str, DataSource, Iterable[Union[str, DataSource]]]
+    data_sources: Union[str, DataSource, Iterable[Union[str, DataSource]]],
+    projection: Optional[Union[str, Iterable[str]]] = None,
 ) -> Union[DataSource, CompositeDataSource]:
 
     if isinstance(data_sources, str):
-        return _get_stix2_data_source(data_sources)
+        return _get_stix2_data_source(data_sources, projection=projection)
     elif isinstance(data_sources, (MemorySource, DataSource, CompositeDataSource)):
         return data_sources
     else:
-        data_sources = [_get_stix2_data_source(ds) for ds in data_sources]
+        data_sources = [
+            _get_stix2_data_source(ds, projection=projection) for ds in data_sources
+        ]
         composite_data_source = CompositeDataSource()
         composite_data_source.add_data_sources(data_sources)
         return composite_data_source
@@ -638,24 +1005,39 @@ def get_stix2_data_source(
 def get_stix2_data_source_with_fallback(
     data_sources: Union[str, DataSource, Iterable[Union[str, DataSource]]],
     fallback_data_sources: Union[str, DataSource, Iterable[Union[str, DataSource]]],
+    projection: Optional[Union[str, Iterable[str]]] = None,
 ):
     try:
-        return get_stix2_data_source(data_sources)
+        return get_stix2_data_source(data_sources, projection=projection)
     except ValueError:
-        return get_stix2_data_source(fallback_data_sources)
+        return get_stix2_data_source(fallback_data_sources, projection=projection)
 
 
-def _get_stix2_data_source(src: Union[str, DataSource]) -> DataSource:
+def _get_stix2_data_source(
+    src: Union[str, DataSource],
+    projection: Optional[Union[str, Iterable[str]]] = None,
+) -> DataSource:
     if isinstance(src, (MemorySource, DataSource)):
         return src
 
+    from stix2_explorer import git_source, taxii
+    from stix2_explorer.sqlite_store import SQLiteSource, is_sqlite_path
+
     if src.startswith(("http://", "https://")):
-        return _get_stix2_memory_source_from_web(src)
+        return _get_stix2_memory_source_from_web(src, projection=projection)
+    elif git_source.is_git_path(src):
+        return git_source.get_stix2_data_source(src, projection=projection)
+    elif taxii.is_taxii_url(src):
+        return taxii.get_stix2_data_source(src, projection=projection)
+    elif is_sqlite_path(src):
+        return SQLiteSource(src)
     else:
-        return _get_stix2_memory_source_from_files([src])
+        return _get_stix2_memory_source_from_files([src], projection=projection)
 
 
-def _get_stix2_memory_source_from_files(paths: Iterable[str]) -> MemoryStore:
+def _get_stix2_memory_source_from_files(
+    paths: Iterable[str], projection: Optional[Union[str, Iterable[str]]] = None
+) -> DataSource:
     paths = set(
         iter_file_paths(
             itertools.chain.from_iterable(
@@ -665,21 +1047,254 @@ def _get_stix2_memory_source_from_files(paths: Iterable[str]) -> MemoryStore:
     )
     with concurrent.futures.ThreadPoolExecutor() as executor:
         objects = []
-        for src in executor.map(_get_stix2_memory_source_from_file, paths):
+        f = functools.partial(_get_stix2_memory_source_from_file, projection=projection)
+        for src in executor.map(f, paths):
             objects.extend(src.query())
-        return MemorySource(objects)
+        return create_stix2_memory_source(objects, projection=projection)
 
 
-def _get_stix2_memory_source_from_file(path: str) -> MemoryStore:
+def _get_stix2_memory_source_from_file(
+    path: str, projection: Optional[Union[str, Iterable[str]]] = None
+) -> DataSource:
     with open(path, "rb") as file:
         stix_data = json.load(file)
-        return MemorySource(stix_data=stix_data)
+        return create_stix2_memory_source(stix_data, projection=projection)
 
 
-def _get_stix2_memory_source_from_web(url: str) -> MemoryStore:
+def _get_stix2_memory_source_from_web(
+    url: str, projection: Optional[Union[str, Iterable[str]]] = None
+) -> DataSource:
     response = requests.get(url, verify=False)
     response.raise_for_status()
-    return MemorySource(response.json()["objects"])
+    return create_stix2_memory_source(response.json()["objects"], projection=projection)
+
+
+def create_stix2_memory_source(
+    stix_data: Union[dict, List[Any]],
+    projection: Optional[Union[str, Iterable[str]]] = None,
+) -> DataSource:
+    """
+    Load STIX 2 content into memory (or, if a projection is given, only the fields which are kept by the projection).
+    """
+    rows = iter_stix2_json_objects(stix_data)
+    if projection:
+        # Parsing projected objects into STIX 2 objects would take more memory than the fields which were dropped, so they are kept as dicts.
+        return DictSource(project_stix2_objects(intern_stix2_objects(rows), projection))
+    return MemorySource(stix_data=list(intern_stix2_objects(rows, timestamps=False)))
+
+
+class DictSource(DataSource):
+    """
+    A read-only STIX 2 data source which keeps objects as dicts rather than parsing them into STIX 2 objects.
+    """
+
+    def __init__(self, stix_data: Iterable[dict] = ()):
+        super().__init__()
+        self.objects: Dict[str, Dict[str, dict]] = collections.defaultdict(dict)
+        for o in stix_data:
+            o = convert_stix2_object_to_dict(o)
+            self.objects[o["id"]][o.get("modified") or ""] = o
+
+    def get(self, stix_id: str, _composite_filters: Optional[FilterSet] = None):
+        for o in reversed(self.all_versions(stix_id, _composite_filters)):
+            return o
+
+    def all_versions(
+        self, stix_id: str, _composite_filters: Optional[FilterSet] = None
+    ) -> List[dict]:
+        versions = self.objects.get(stix_id, {})
+        rows = sorted(versions.values(), key=get_modified_timestamp)
+        return list(apply_common_filters(rows, self._get_filters(_composite_filters)))
+
+    def query(
+        self, query: Optional[Iterable] = None, _composite_filters=None
+    ) -> List[dict]:
+        rows = itertools.chain.from_iterable(v.values() for v in self.objects.values())
+        filters = self._get_filters(_composite_filters, query)
+        return list(apply_common_filters(rows, filters))
+
+    def _get_filters(
+        self,
+        _composite_filters: Optional[FilterSet] = None,
+        query: Optional[Iterable] = None,
+    ) -> FilterSet:
+        filters = FilterSet(query)
+        if self.filters:
+            filters.add(self.filters)
+        if _composite_filters:
+            filters.add(_composite_filters)
+        return filters
+
+
+def iter_stix2_bundle_objects(
+    src: str, projection: Optional[Union[str, Iterable[str]]] = None
+) -> Iterator[dict]:
+    """
+    Stream the objects in one or more STIX 2 bundles (i.e. a file, directory, or URL) as dictionaries without parsing them into STIX 2 objects.
+    """
+    rows = intern_stix2_objects(_iter_stix2_bundle_objects(src))
+    if projection:
+        rows = project_stix2_objects(rows, projection)
+    yield from rows
+
+
+def _iter_stix2_bundle_objects(src: str) -> Iterator[dict]:
+    from stix2_explorer import git_source, taxii
+
+    if src.startswith(("http://", "https://")):
+        response = requests.get(src, verify=False)
+        response.raise_for_status()
+        yield from response.json()["objects"]
+        return
+    elif git_source.is_git_path(src):
+        yield from git_source.iter_stix2_git_objects(src)
+        return
+    elif taxii.is_taxii_url(src):
+        yield from taxii.iter_stix2_taxii_objects(src)
+        return
+
+    paths = sorted(set(iter_file_paths(glob.glob(get_real_path(src)))))
+    for path in paths:
+        with open(path, "rb") as file:
+            yield from iter_stix2_json_objects(json.load(file))
+
+
+def iter_stix2_json_objects(stix_data: Union[dict, List[dict]]) -> Iterator[dict]:
+    """
+    Return the objects in a bundle, a list of objects, or a single object.
+    """
+    if isinstance(stix_data, list):
+        yield from stix_data
+    elif stix_data.get("type") == "bundle":
+        yield from stix_data.get("objects", [])
+    else:
+        yield stix_data
+
+
+def intern_stix2_objects(rows: Iterable[Any], timestamps: bool = True) -> Iterator[Any]:
+    for o in rows:
+        # STIX 2 objects are immutable (and were interned before they were parsed).
+        yield (
+            intern_stix2_object(o, timestamps=timestamps) if isinstance(o, dict) else o
+        )
+
+
+def intern_stix2_object(o: dict, timestamps: bool = True) -> dict:
+    """
+    Intern the IDs, references, types, and (optionally) timestamps of an object in place so that each distinct value is only stored once (e.g. a technique's ID and the refs of every relationship to it).
+    """
+    for k, v in o.items():
+        if k in INTERNED_FIELDS or (timestamps and k in INTERNED_TIMESTAMP_FIELDS):
+            if type(v) is str:
+                o[k] = sys.intern(v)
+        elif k in INTERNED_LIST_FIELDS:
+            if type(v) is list:
+                o[k] = [sys.intern(s) if type(s) is str else s for s in v]
+        elif k == "kill_chain_phases":
+            for phase in v:
+                for f in ("kill_chain_name", "phase_name"):
+                    if type(phase.get(f)) is str:
+                        phase[f] = sys.intern(phase[f])
+        elif k == "external_references":
+            for ref in v:
+                if type(ref.get("source_name")) is str:
+                    ref["source_name"] = sys.intern(ref["source_name"])
+    return o
+
+
+def get_projection_fields(projection: Union[str, Iterable[str]]) -> FrozenSet[str]:
+    """
+    Return the fields kept by a named projection (e.g. graph or matrix) or by a list of fields.
+    """
+    if isinstance(projection, str):
+        try:
+            return PROJECTIONS[projection]
+        except KeyError:
+            raise ValueError(
+                f"Unknown projection: {projection} (expected one of: {', '.join(sorted(PROJECTIONS))})"
+            )
+    return PROJECTION_BASE_FIELDS | frozenset(projection)
+
+
+def project_stix2_objects(
+    rows: Iterable[dict], projection: Union[str, Iterable[str]]
+) -> Iterator[dict]:
+    """
+    Drop every field which is not kept by a projection (e.g. descriptions) from a stream of objects.
+    """
+    fields = get_projection_fields(projection)
+    for o in rows:
+        yield project_stix2_object(o, fields)
+
+
+def project_stix2_object(o: dict, fields: FrozenSet[str]) -> dict:
+    """
+    Return a copy of an object with only the listed fields, and any fields which STIX 2 requires for its type.
+    """
+    fields = _get_projection_fields_for_type(fields, o.get("type"))
+    d = {}
+    for k, v in o.items():
+        if k not in fields:
+            continue
+
+        f = _NESTED_PROJECTIONS.get(k)
+        if f is not None:
+            v = f(v)
+            if not v:
+                continue
+        d[k] = v
+    return d
+
+
+@functools.lru_cache(maxsize=None)
+def _get_projection_fields_for_type(
+    fields: FrozenSet[str], stix2_type: Optional[str]
+) -> FrozenSet[str]:
+    # Objects are parsed as either STIX 2.0 or STIX 2.1, so keep the fields which either version requires.
+    required = set()
+    for version in ["2.0", "2.1"]:
+        cls = class_for_type(stix2_type, version, "objects")
+        if cls is not None:
+            required.update(k for k, p in cls._properties.items() if p.required)
+    return fields | frozenset(required)
+
+
+def _project_external_references(refs: List[dict]) -> List[dict]:
+    # Citations (i.e. references without an external ID or URL) are dropped, and so are the descriptions of the rest.
+    projected = []
+    for ref in refs:
+        if "external_id" in ref or "url" in ref:
+            projected.append(
+                {k: v for k, v in ref.items() if k in _EXTERNAL_REFERENCE_FIELDS}
+            )
+    return projected
+
+
+def _project_extensions(extensions: Dict[str, dict]) -> Dict[str, dict]:
+    # Only the parts of extensions which identify MITRE MBC objects are kept.
+    projected = {}
+    for k, ext in extensions.items():
+        ext = {f: v for f, v in ext.items() if f in _EXTENSION_FIELDS}
+        if "obj_defn" in ext:
+            ext["obj_defn"] = _project_obj_defn(ext["obj_defn"])
+        if ext:
+            projected[k] = ext
+    return projected
+
+
+def _project_obj_defn(obj_defn: dict) -> dict:
+    return {k: v for k, v in obj_defn.items() if k in _OBJ_DEFN_FIELDS}
+
+
+_EXTERNAL_REFERENCE_FIELDS = frozenset(["source_name", "external_id", "url"])
+_EXTENSION_FIELDS = frozenset(["extension_type", "obj_defn"])
+_OBJ_DEFN_FIELDS = frozenset(["source_name", "external_id"])
+
+_NESTED_PROJECTIONS: Dict[str, Callable[[Any], Any]] = {
+    "external_references": _project_external_references,
+    "extensions": _project_extensions,
+    "obj_defn": _project_obj_defn,
+}
 
 
 def iter_file_paths(paths: Iterable[str]) -> Iterator[str]:
@@ -0,0 +1,193 @@
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional
+
+from stix2_explorer import converter
+from stix2_explorer.constants import ATTACK_PATTERN, X_MITRE_TACTIC, Triple
+
+MITIGATES = "mitigates"
+
+
+@dataclass()
+class TacticCoverage:
+    tactic_id: str
+    covered: int
+    total: int
+
+    @property
+    def percent(self) -> float:
+        return 100.0 * self.covered / self.total if self.total else 0.0
+
+
+@dataclass()
+class CoverageMatrix:
+    """
+    Control to technique coverage stored as bitsets (Python integers).
+
+    Each control has a bitset over techniques (i.e. the techniques it mitigates), each technique has a bitset over controls, and each tactic has a bitset over techniques.
+    """
+
+    controls: List[str] = field(default_factory=list)
+    techniques: List[str] = field(default_factory=list)
+    control_bitsets: List[int] = field(default_factory=list)
+    technique_bitsets: List[int] = field(default_factory=list)
+    tactic_bitsets: Dict[str, int] = field(default_factory=dict)
+
+    def __post_init__(self):
+        self._control_positions = {v: i for i, v in enumerate(self.controls)}
+        self._technique_positions = {v: i for i, v in enumerate(self.techniques)}
+
+    @property
+    def all_techniques(self) -> int:
+        return (1 << len(self.techniques)) - 1
+
+    def get_technique_bitset(self, technique_ids: Optional[Iterable[str]]) -> int:
+        if technique_ids is None:
+            return self.all_techniques
+        return _get_bitset(technique_ids, self._technique_positions)
+
+    def get_control_bitset(self, control_ids: Iterable[str]) -> int:
+        return _get_bitset(control_ids, self._control_positions)
+
+    def get_covered_techniques(self, control_ids: Iterable[str]) -> int:
+        """
+        Return the bitset of techniques mitigated by any of the given controls.
+        """
+        covered = 0
+        for i in _iter_bits(self.get_control_bitset(control_ids)):
+            covered |= self.control_bitsets[i]
+        return covered
+
+    def get_techniques(self, bitset: int) -> List[str]:
+        return [self.techniques[i] for i in _iter_bits(bitset)]
+
+
+def get_coverage_matrix(
+    triples: Iterable[Triple],
+    control_ids: Optional[Iterable[str]] = None,
+    predicate: str = MITIGATES,
+) -> CoverageMatrix:
+    """
+    Build a coverage matrix from (control, mitigates, technique) and (technique, related-to, tactic) triples.
+    """
+    control_ids = set(control_ids) if control_ids is not None else None
+
+    edges = []
+    technique_tactics = []
+    controls = {}
+    techniques = {}
+    for s, p, o in triples:
+        o_type = converter.get_stix2_type_from_id(o)
+        if p == predicate and o_type == ATTACK_PATTERN:
+            if control_ids is not None and s not in control_ids:
+                continue
+            edges.append(
+                (
+                    controls.setdefault(s, len(controls)),
+                    techniques.setdefault(o, len(techniques)),
+                )
+            )
+        elif (
+            o_type == X_MITRE_TACTIC
+            and converter.get_stix2_type_from_id(s) == ATTACK_PATTERN
+        ):
+            technique_tactics.append((techniques.setdefault(s, len(techniques)), o))
+
+    control_bitsets = [0] * len(controls)
+    technique_bitsets = [0] * len(techniques)
+    for i, j in edges:
+        control_bitsets[i] |= 1 << j
+        technique_bitsets[j] |= 1 << i
+
+    tactic_bitsets = {}
+    for j, tactic_id in technique_tactics:
+        tactic_bitsets[tactic_id] = tactic_bitsets.get(tactic_id, 0) | 1 << j
+
+    return CoverageMatrix(
+        controls=list(controls),
+        techniques=list(techniques),
+        control_bitsets=control_bitsets,
+        technique_bitsets=technique_bitsets,
+        tactic_bitsets=tactic_bitsets,
+    )
+
+
+def get_minimum_control_set(
+    m: CoverageMatrix, technique_ids: Optional[Iterable[str]] = None
+) -> List[str]:
+    """
+    Return a small set of controls which covers the given techniques (greedy set cover).
+
+    Techniques which no control mitigates are ignored.
+    """
+    remaining = m.get_technique_bitset(technique_ids)
+    coverable = 0
+    for bitset in m.control_bitsets:
+        coverable |= bitset
+    remaining &= coverable
+
+    selected = []
+    while remaining:
+        i = max(
+            range(len(m.controls)),
+            key=lambda i: ((m.control_bitsets[i] & remaining).bit_count(), -i),
+        )
+        selected.append(m.controls[i])
+        remaining &= ~m.control_bitsets[i]
+    return selected
+
+
+def get_uncovered_techniques(
+    m: CoverageMatrix,
+    control_ids: Iterable[str],
+    technique_ids: Optional[Iterable[str]] = None,
+) -> List[str]:
+    """
+    Return the techniques which are not mitigated by any of the given (e.g. implemented) controls.
+    """
+    uncovered = m.get_technique_bitset(technique_ids) & ~m.get_covered_techniques(
+        control_ids
+    )
+    return m.get_techniques(uncovered)
+
+
+def get_tactic_coverage(
+    m: CoverageMatrix,
+    control_ids: Iterable[str],
+    technique_ids: Optional[Iterable[str]] = None,
+) -> List[TacticCoverage]:
+    """
+    Return the number of techniques in each tactic which are mitigated by any of the given controls.
+
+    Only the given techniques are counted, and tactics without any of them are omitted.
+    """
+    scope = m.get_technique_bitset(technique_ids)
+    covered = m.get_covered_techniques(control_ids)
+
+    result = []
+    for tactic_id, bitset in m.tactic_bitsets.items():
+        bitset &= scope
+        if bitset:
+            result.append(
+                TacticCoverage(
+                    tactic_id=tactic_id,
+                    covered=(bitset & covered).bit_count(),
+                    total=bitset.bit_count(),
+                )
+            )
+    return result
+
+
+def _get_bitset(values: Iterable[str], positions: Dict[str, int]) -> int:
+    bitset = 0
+    for v in values:
+        i = positions.get(v)
+        if i is not None:
+            bitset |= 1 << i
+    return bitset
+
+
+def _iter_bits(bitset: int) -> Iterable[int]:
+    while bitset:
+        low = bitset & -bitset
+        yield low.bit_length() - 1
+        bitset ^= low
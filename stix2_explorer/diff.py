@@ -0,0 +1,190 @@
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Iterable, List, Optional, Union
+
+from stix2.datastore import DataSource
+
+from stix2_explorer import converter
+from stix2_explorer.constants import Triple
+from stix2_explorer.converter import Decoder
+
+ADDED = "added"
+REMOVED = "removed"
+MODIFIED = "modified"
+REVOKED = "revoked"
+DEPRECATED = "deprecated"
+
+CHANGE_TYPES = [ADDED, REMOVED, MODIFIED, REVOKED, DEPRECATED]
+
+
+@dataclass()
+class ObjectChange:
+    id: str
+    type: str
+    name: Optional[str] = None
+    external_id: Optional[str] = None
+    old_modified: Optional[str] = None
+    new_modified: Optional[str] = None
+
+
+@dataclass()
+class ChangeReport:
+    """
+    The objects and relationships which were added, removed, modified, revoked, or deprecated between two releases.
+
+    Objects which were revoked or deprecated in the new release are only reported as revoked or deprecated (not as modified).
+    """
+
+    added: List[ObjectChange] = field(default_factory=list)
+    removed: List[ObjectChange] = field(default_factory=list)
+    modified: List[ObjectChange] = field(default_factory=list)
+    revoked: List[ObjectChange] = field(default_factory=list)
+    deprecated: List[ObjectChange] = field(default_factory=list)
+    added_edges: List[Triple] = field(default_factory=list)
+    removed_edges: List[Triple] = field(default_factory=list)
+
+    def get_summary(self) -> Dict[str, int]:
+        summary = {k: len(getattr(self, k)) for k in CHANGE_TYPES}
+        summary["added_edges"] = len(self.added_edges)
+        summary["removed_edges"] = len(self.removed_edges)
+        return summary
+
+    def to_dict(self) -> dict:
+        return {
+            "summary": self.get_summary(),
+            **{k: [asdict(c) for c in getattr(self, k)] for k in CHANGE_TYPES},
+            "added_edges": [list(t) for t in self.added_edges],
+            "removed_edges": [list(t) for t in self.removed_edges],
+        }
+
+
+@dataclass()
+class _Entry:
+    change: ObjectChange
+    row: Optional[dict]
+    revoked: bool
+    deprecated: bool
+
+
+def diff_stix2_objects(
+    old_rows: Iterable[dict],
+    new_rows: Iterable[dict],
+    decoders: Optional[Iterable[Decoder]] = None,
+) -> ChangeReport:
+    """
+    Compare two releases of a STIX 2 corpus (e.g. two versions of MITRE ATT&CK Enterprise).
+
+    Objects are matched by ID, and only the latest version of each object in either release is compared. Objects are only hashed when their modified timestamp is unchanged.
+    """
+    decoders = decoders or converter.get_default_decoders()
+
+    old_rows = _get_latest_versions(old_rows)
+    old = {}
+    for o in old_rows:
+        old[o["id"]] = _get_entry(o, decoders, include_row=True)
+    old_edges = _get_edges(old_rows, decoders)
+    del old_rows
+
+    new_rows = _get_latest_versions(new_rows)
+    report = ChangeReport()
+    for o in new_rows:
+        previous = old.pop(o["id"], None)
+        if previous is None:
+            change = _get_entry(o, decoders).change
+            change.old_modified, change.new_modified = None, change.old_modified
+            report.added.append(change)
+            continue
+
+        if o.get("modified") == previous.change.old_modified:
+            if converter.get_content_hash(o) == converter.get_content_hash(
+                previous.row
+            ):
+                continue
+
+        current = _get_entry(o, decoders)
+        current.change.old_modified = previous.change.old_modified
+        current.change.new_modified = o.get("modified")
+        if current.revoked and not previous.revoked:
+            report.revoked.append(current.change)
+        elif current.deprecated and not previous.deprecated:
+            report.deprecated.append(current.change)
+        else:
+            report.modified.append(current.change)
+
+    report.removed = [entry.change for entry in old.values()]
+
+    new_edges = _get_edges(new_rows, decoders)
+    report.added_edges = sorted(new_edges - old_edges)
+    report.removed_edges = sorted(old_edges - new_edges)
+    return report
+
+
+def diff_stix2_data_sources(
+    old_data_sources: Union[str, DataSource, Iterable[Union[str, DataSource]]],
+    new_data_sources: Union[str, DataSource, Iterable[Union[str, DataSource]]],
+    decoders: Optional[Iterable[Decoder]] = None,
+) -> ChangeReport:
+    """
+    Compare two releases, including deprecated and revoked objects.
+
+    If both releases are bundles (i.e. files, directories, or URLs), their objects are compared as-is, without being parsed into STIX 2 objects.
+    """
+    raw = all(map(_is_bundle_path, (old_data_sources, new_data_sources)))
+
+    def iter_objects(data_sources):
+        if raw:
+            return converter.iter_stix2_bundle_objects(data_sources)
+        return converter.iter_stix2_objects(
+            data_sources,
+            decoders=decoders,
+            include_deprecated=True,
+            include_revoked=True,
+        )
+
+    return diff_stix2_objects(
+        iter_objects(old_data_sources),
+        iter_objects(new_data_sources),
+        decoders=decoders,
+    )
+
+
+def _is_bundle_path(src) -> bool:
+    from stix2_explorer.sqlite_store import is_sqlite_path
+
+    return isinstance(src, str) and not is_sqlite_path(src)
+
+
+def _get_latest_versions(rows: Iterable[dict]) -> List[dict]:
+    latest = {}
+    for o in rows:
+        modified = converter.get_modified_timestamp(o)
+        previous = latest.get(o["id"])
+        if previous is None or modified >= previous[0]:
+            latest[o["id"]] = modified, o
+    return [o for (_, o) in latest.values()]
+
+
+def _get_entry(
+    o: dict, decoders: Iterable[Decoder], include_row: bool = False
+) -> _Entry:
+    try:
+        external_id = converter.get_external_id(o)
+    except (KeyError, ValueError):
+        external_id = None
+
+    change = ObjectChange(
+        id=o["id"],
+        type=o["type"],
+        name=o.get("name"),
+        external_id=external_id,
+        old_modified=o.get("modified"),
+    )
+    return _Entry(
+        change=change,
+        row=o if include_row else None,
+        revoked=any(d.is_revoked(o) for d in decoders),
+        deprecated=any(d.is_deprecated(o) for d in decoders),
+    )
+
+
+def _get_edges(rows: List[dict], decoders: Iterable[Decoder]) -> set:
+    return set(converter.convert_stix2_objects_to_triples(rows, decoders=decoders))
@@ -0,0 +1,209 @@
+import atexit
+import json
+import subprocess
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from stix2.datastore import DataSource
+
+from stix2_explorer import converter
+
+GIT_PATH_PREFIX = "git:"
+
+TREE = "tree"
+BLOB = "blob"
+
+
+def is_git_path(path: str) -> bool:
+    return path.startswith(GIT_PATH_PREFIX)
+
+
+def parse_git_path(path: str) -> Tuple[str, str, str]:
+    """
+    Split a path of the form git:<repository>@<ref>:<path> (e.g. git:~/src/cti@ATT&CK-v12.1:enterprise-attack) into a repository, ref, and path.
+    """
+    if not is_git_path(path):
+        raise ValueError(f"Invalid git path: {path}")
+
+    try:
+        repository, rest = path[len(GIT_PATH_PREFIX) :].split("@", 1)
+        ref, path = rest.split(":", 1)
+    except ValueError:
+        raise ValueError(
+            f"Invalid git path (expected git:<repository>@<ref>:<path>): {path}"
+        )
+    return repository, ref, path.strip("/")
+
+
+class GitRepository:
+    """
+    Reads objects from a local git repository through a single long-lived `git cat-file --batch` process (i.e. without checking anything out).
+    """
+
+    def __init__(self, path: str):
+        self.path = converter.get_real_path(path)
+
+        # `git cat-file --batch` exits immediately (and silently) outside of a repository.
+        result = subprocess.run(
+            ["git", "-C", self.path, "rev-parse", "--git-dir"],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        if result.returncode != 0:
+            raise ValueError(f"Not a git repository: {path}")
+
+        self._process = subprocess.Popen(
+            ["git", "-C", self.path, "cat-file", "--batch"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+        )
+        self._lock = threading.Lock()
+        self._hash_size = 20
+
+    def __enter__(self) -> "GitRepository":
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def read_object(self, name: str) -> Tuple[str, bytes]:
+        """
+        Return the type and contents of an object (e.g. v14.1:enterprise-attack/enterprise-attack.json or a SHA).
+        """
+        with self._lock:
+            if not self.running:
+                raise ValueError(f"Git process for {self.path} has exited")
+
+            self._process.stdin.write(name.encode("utf-8") + b"\n")
+            self._process.stdin.flush()
+
+            # Unknown names are reported as <name> missing (or ambiguous), where the name may contain spaces.
+            header = self._process.stdout.readline().decode("utf-8").rstrip("\n")
+            if header.endswith((" missing", " ambiguous")):
+                raise ValueError(f"Git object not found: {name}")
+
+            try:
+                sha, object_type, size = header.split(" ")
+                size = int(size)
+            except ValueError:
+                raise ValueError(f"Unexpected response from git for {name}: {header!r}")
+
+            self._hash_size = len(sha) // 2
+            data = self._process.stdout.read(size)
+            self._process.stdout.read(1)
+            return object_type, data
+
+    def iter_blobs(self, ref: str, path: str) -> Iterator[Tuple[str, bytes]]:
+        """
+        Return the path and contents of the file at a path, or of each file under a directory, as of a ref.
+        """
+        yield from self._iter_blobs(f"{ref}:{path}", path)
+
+    def _iter_blobs(self, name: str, path: str) -> Iterator[Tuple[str, bytes]]:
+        object_type, data = self.read_object(name)
+        if object_type == BLOB:
+            yield path, data
+        elif object_type == TREE:
+            for mode, filename, sha in _iter_tree_entries(data, self._hash_size):
+                # Skip submodules.
+                if mode == b"160000":
+                    continue
+                child = f"{path}/{filename}" if path else filename
+                yield from self._iter_blobs(sha, child)
+
+    def list_refs(self, pattern: str = "refs/tags") -> List[str]:
+        """
+        Return the names of the refs which match a pattern (e.g. refs/tags/v*), oldest first.
+        """
+        output = subprocess.check_output(
+            [
+                "git",
+                "-C",
+                self.path,
+                "for-each-ref",
+                "--sort=creatordate",
+                "--format=%(refname:short)",
+                pattern,
+            ]
+        )
+        return output.decode("utf-8").split()
+
+    @property
+    def running(self) -> bool:
+        return self._process.poll() is None
+
+    def close(self):
+        if self.running:
+            self._process.stdin.close()
+            self._process.wait()
+
+
+def _iter_tree_entries(data: bytes, hash_size: int) -> Iterator[Tuple[bytes, str, str]]:
+    # Tree entries are of the form: <mode> <filename>\0<binary object ID>
+    i = 0
+    while i < len(data):
+        j = data.index(b"\0", i)
+        mode, filename = data[i:j].split(b" ", 1)
+        sha = data[j + 1 : j + 1 + hash_size].hex()
+        yield mode, filename.decode("utf-8"), sha
+        i = j + 1 + hash_size
+
+
+_repositories: Dict[str, GitRepository] = {}
+_repositories_lock = threading.Lock()
+
+
+def get_git_repository(path: str) -> GitRepository:
+    """
+    Return a shared reader for a repository so that loading many refs re-uses one process.
+    """
+    path = converter.get_real_path(path)
+    with _repositories_lock:
+        repository = _repositories.get(path)
+
+        # Replace readers whose process has exited (e.g. after being closed).
+        if repository is None or not repository.running:
+            repository = _repositories[path] = GitRepository(path)
+        return repository
+
+
+@atexit.register
+def close_git_repositories():
+    with _repositories_lock:
+        for repository in _repositories.values():
+            repository.close()
+        _repositories.clear()
+
+
+def iter_stix2_git_objects(src: str) -> Iterator[dict]:
+    """
+    Stream the objects in the bundle(s) at a git path (i.e. git:<repository>@<ref>:<path>) as dictionaries.
+    """
+    repository, ref, path = parse_git_path(src)
+    for filename, data in get_git_repository(repository).iter_blobs(ref, path):
+        if not filename.endswith(".json"):
+            continue
+
+        yield from converter.iter_stix2_json_objects(json.loads(data))
+
+
+def get_stix2_data_source(
+    src: str, projection: Optional[Union[str, Iterable[str]]] = None
+) -> DataSource:
+    return converter.create_stix2_memory_source(
+        list(iter_stix2_git_objects(src)), projection=projection
+    )
+
+
+def get_git_paths(
+    repository: str,
+    path: str,
+    pattern: str = "refs/tags",
+    refs: Optional[List[str]] = None,
+) -> Dict[str, str]:
+    """
+    Return a mapping of refs (e.g. every release tag) to git paths for a bundle path.
+    """
+    if refs is None:
+        refs = get_git_repository(repository).list_refs(pattern)
+    return {ref: f"{GIT_PATH_PREFIX}{repository}@{ref}:{path}" for ref in refs}
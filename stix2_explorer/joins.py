@@ -0,0 +1,198 @@
+import collections
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from stix2_explorer import converter, provenance as _provenance, triple_store
+from stix2_explorer.converter import Decoder
+from stix2_explorer.provenance import Provenance
+
+OUTBOUND = "out"
+INBOUND = "in"
+
+DIRECTIONS = [OUTBOUND, INBOUND]
+
+DEFAULT_STEP_NAMES = ["source_object", "target_object"]
+
+
+@dataclass()
+class Hop:
+    """
+    One step of a join.
+
+    A hop follows edges (optionally only those with the given predicate) in the given direction, or - if an external reference source name is given - links objects to the objects whose external ID they reference (e.g. ATT&CK techniques to CAPEC attack patterns via "capec" external references).
+    """
+
+    predicate: Optional[str] = None
+    direction: str = OUTBOUND
+    types: Optional[Iterable[str]] = None
+    external_reference_source: Optional[str] = None
+
+    def __post_init__(self):
+        if self.direction not in DIRECTIONS:
+            raise ValueError(f"Unsupported direction: {self.direction}")
+        if self.types is not None:
+            self.types = set(self.types)
+
+
+class JoinEngine:
+    """
+    Joins chains of hops across one or more STIX 2 datasets using indexed adjacency.
+
+    Results are columnar: for each step there are {step}_id, {step}_external_id, {step}_name, and {step}_type columns, and for each hop there is a relationship column. If provenance is given, each step and hop also has a provenance (bitmask) column.
+    """
+
+    def __init__(
+        self,
+        rows: Iterable[dict],
+        decoders: Optional[Iterable[Decoder]] = None,
+        provenance: Optional[Provenance] = None,
+    ):
+        rows = list(rows)
+        self.provenance = provenance
+        self.edge_provenance = {}
+        if provenance is None:
+            self.store = triple_store.convert_stix2_objects_to_triple_store(
+                rows, decoders=decoders
+            )
+        else:
+            # Index the triples the provenance masks were gathered for, rather than decoding the rows again.
+            self.edge_provenance = _provenance.get_edge_provenance(
+                _provenance.iter_edge_batches(rows, decoders=decoders), provenance
+            )
+            self.store = triple_store.TripleStore()
+            self.store.add_triples(self.edge_provenance)
+        self.names = converter.get_node_labels(rows, "name")
+        self.external_ids = converter.get_node_labels_by_external_id(rows)
+        self.types = {o["id"]: o["type"] for o in rows if o["type"] != "relationship"}
+
+        self.objects_by_external_id = collections.defaultdict(list)
+        for object_id, external_id in self.external_ids.items():
+            self.objects_by_external_id[external_id].append(object_id)
+
+        self.external_references = collections.defaultdict(list)
+        self.referrers = collections.defaultdict(list)
+        for o in rows:
+            for ref in o.get("external_references") or []:
+                external_id = ref.get("external_id")
+                if not external_id:
+                    continue
+                k = (ref.get("source_name"), external_id)
+                self.external_references[o["id"]].append(k)
+                self.referrers[k].append(o["id"])
+
+    def join(
+        self,
+        hops: Iterable[Hop],
+        start_ids: Optional[Iterable[str]] = None,
+        start_types: Optional[Iterable[str]] = None,
+        step_names: Optional[List[str]] = None,
+    ) -> Dict[str, List]:
+        hops = list(hops)
+        if not hops:
+            raise ValueError("At least one hop is required")
+
+        if step_names is None:
+            if len(hops) == 1:
+                step_names = DEFAULT_STEP_NAMES
+            else:
+                step_names = [f"object_{i}" for i in range(len(hops) + 1)]
+        elif len(step_names) != len(hops) + 1:
+            raise ValueError("There must be one step name per hop plus one")
+
+        start_types = set(start_types) if start_types else None
+        if start_ids is None:
+            start_ids = self._iter_start_ids(hops[0])
+        ids = [[v for v in start_ids if self._has_type(v, start_types)]]
+
+        predicates = []
+        hop_provenance = []
+        for hop in hops:
+            parents = []
+            targets = []
+            hop_predicates = []
+            for i, v in enumerate(ids[-1]):
+                for p, o in self._iter_neighbours(v, hop):
+                    parents.append(i)
+                    hop_predicates.append(p)
+                    targets.append(o)
+
+            ids = [[column[i] for i in parents] for column in ids]
+            predicates = [[column[i] for i in parents] for column in predicates]
+            hop_provenance = [[column[i] for i in parents] for column in hop_provenance]
+            if self.provenance is not None:
+                sources = ids[-1]
+                if hop.direction == OUTBOUND:
+                    edges = zip(sources, hop_predicates, targets)
+                else:
+                    edges = zip(targets, hop_predicates, sources)
+                hop_provenance.append(
+                    [self.edge_provenance.get(edge, 0) for edge in edges]
+                )
+            ids.append(targets)
+            predicates.append(hop_predicates)
+
+        columns = {}
+        for i, name in enumerate(step_names):
+            column = ids[i]
+            columns[f"{name}_id"] = column
+            columns[f"{name}_external_id"] = [self.external_ids.get(v) for v in column]
+            columns[f"{name}_name"] = [self.names.get(v) for v in column]
+            columns[f"{name}_type"] = [self._get_type(v) for v in column]
+            if self.provenance is not None:
+                columns[f"{name}_provenance"] = [
+                    self.provenance.get_mask(v) for v in column
+                ]
+            if i < len(hops):
+                k = "relationship" if len(hops) == 1 else f"relationship_{i + 1}"
+                columns[k] = predicates[i]
+                if self.provenance is not None:
+                    columns[f"{k}_provenance"] = hop_provenance[i]
+        return columns
+
+    def _iter_start_ids(self, hop: Hop) -> Iterator[str]:
+        if hop.external_reference_source is not None:
+            yield from self.types
+            return
+
+        seen = set()
+        for s, _, o in self.store.match(p=hop.predicate):
+            v = s if hop.direction == OUTBOUND else o
+            if v not in seen:
+                seen.add(v)
+                yield v
+
+    def _iter_neighbours(self, v: str, hop: Hop) -> Iterator[Tuple[str, str]]:
+        if hop.external_reference_source is not None:
+            neighbours = self._iter_external_reference_neighbours(v, hop)
+        elif hop.direction == OUTBOUND:
+            neighbours = ((p, o) for _, p, o in self.store.match(s=v, p=hop.predicate))
+        else:
+            neighbours = ((p, s) for s, p, _ in self.store.match(p=hop.predicate, o=v))
+
+        for p, o in neighbours:
+            if self._has_type(o, hop.types):
+                yield p, o
+
+    def _iter_external_reference_neighbours(
+        self, v: str, hop: Hop
+    ) -> Iterator[Tuple[str, str]]:
+        p = hop.predicate or converter.RELATED_TO
+        source_name = hop.external_reference_source
+        if hop.direction == OUTBOUND:
+            for name, external_id in self.external_references.get(v, []):
+                if name == source_name:
+                    for o in self.objects_by_external_id.get(external_id, []):
+                        if o != v:
+                            yield p, o
+        else:
+            external_id = self.external_ids.get(v)
+            if external_id:
+                for o in self.referrers.get((source_name, external_id), []):
+                    if o != v:
+                        yield p, o
+
+    def _get_type(self, v: str) -> str:
+        return self.types.get(v) or converter.get_stix2_type_from_id(v)
+
+    def _has_type(self, v: str, types: Optional[Iterable[str]]) -> bool:
+        return types is None or self._get_type(v) in types
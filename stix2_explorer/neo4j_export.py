@@ -0,0 +1,437 @@
+import collections
+import concurrent.futures
+from dataclasses import dataclass, field
+import gzip
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from neo4j import Driver
+
+from stix2_explorer import converter
+from stix2_explorer.constants import Triple
+from stix2_explorer.converter import Decoder
+from stix2_explorer.writers import GZIP, iter_batches, write_csv
+
+logger = logging.getLogger(__name__)
+
+# Every node has this label (with a uniqueness constraint on its STIX ID) as well as a label for its STIX type (e.g. AttackPattern).
+OBJECT_LABEL = "Object"
+
+DEFAULT_BATCH_SIZE = 5000
+DEFAULT_CONCURRENCY = 4
+
+# Headers for `neo4j-admin database import` (the ID space keeps STIX IDs unique across files).
+NEO4J_ADMIN_NODES_HEADER = [
+    f"id:ID({OBJECT_LABEL})",
+    "type:string",
+    "name:string",
+    "external_id:string",
+    ":LABEL",
+]
+NEO4J_ADMIN_RELATIONSHIPS_HEADER = [
+    f":START_ID({OBJECT_LABEL})",
+    f":END_ID({OBJECT_LABEL})",
+    ":TYPE",
+]
+
+# neo4j-admin can read gzip-compressed files, but not zstd-compressed files.
+NEO4J_ADMIN_COMPRESSION_TYPES = [GZIP]
+
+
+def get_label(stix2_type: str) -> str:
+    """
+    Return the Neo4j label for a STIX 2 type (e.g. attack-pattern -> AttackPattern).
+    """
+    return "".join(s.capitalize() for s in re.split(r"[^A-Za-z0-9]+", stix2_type) if s)
+
+
+def get_relationship_type(predicate: str) -> str:
+    """
+    Return the Neo4j relationship type for a predicate (e.g. subtechnique-of -> SUBTECHNIQUE_OF).
+    """
+    return re.sub(r"[^A-Za-z0-9]+", "_", predicate).strip("_").upper()
+
+
+def iter_nodes(rows: Iterable[dict], triples: Iterable[Triple]) -> Iterator[dict]:
+    """
+    Return a node for each object and for each edge endpoint which is not one of the given objects (e.g. an identity which is only referenced).
+    """
+    seen = set()
+    for o in rows:
+        if o["type"] == "relationship" or o["id"] in seen:
+            continue
+        seen.add(o["id"])
+
+        try:
+            external_id = converter.get_external_id(o)
+        except (KeyError, ValueError):
+            external_id = None
+
+        yield {
+            "id": o["id"],
+            "type": o["type"],
+            "name": o.get("name"),
+            "external_id": external_id,
+        }
+
+    for s, _, o in triples:
+        for v in (s, o):
+            if v not in seen:
+                seen.add(v)
+                yield {
+                    "id": v,
+                    "type": converter.get_stix2_type_from_id(v),
+                    "name": None,
+                    "external_id": None,
+                }
+
+
+@dataclass()
+class ExportStats:
+    nodes: int = 0
+    relationships: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rate(self) -> float:
+        return (self.nodes + self.relationships) / self.seconds if self.seconds else 0.0
+
+
+@dataclass()
+class SyncStats:
+    created_nodes: int = 0
+    updated_nodes: int = 0
+    deleted_nodes: int = 0
+    created_relationships: int = 0
+    deleted_relationships: int = 0
+    seconds: float = 0.0
+
+
+@dataclass()
+class Manifest:
+    """
+    The content hash of each node and the set of edges which were last pushed to a Neo4j database.
+    """
+
+    nodes: Dict[str, str] = field(default_factory=dict)
+    edges: List[Triple] = field(default_factory=list)
+
+    def save(self, path: str):
+        path = converter.get_real_path(path)
+        directory = os.path.dirname(path) or "."
+        os.makedirs(directory, exist_ok=True)
+
+        # Write to a temporary file and rename it into place, so that an interrupted sync can't leave a partial manifest behind.
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as raw, gzip.open(
+                raw, "wt", encoding="utf-8"
+            ) as file:
+                json.dump(
+                    {"nodes": self.nodes, "edges": [list(e) for e in self.edges]},
+                    file,
+                    separators=(",", ":"),
+                )
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, path: str) -> "Manifest":
+        """
+        Load a manifest (or return an empty manifest if it does not exist, i.e. before the first push).
+        """
+        path = converter.get_real_path(path)
+        if not os.path.exists(path):
+            return cls()
+
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as file:
+                data = json.load(file)
+            return cls(nodes=data["nodes"], edges=[tuple(e) for e in data["edges"]])
+        except (OSError, ValueError, EOFError, KeyError, TypeError) as e:
+            # Starting again from an empty manifest would leave stale nodes and relationships in the database.
+            raise ValueError(f"Corrupt Neo4j manifest: {path} ({e})") from e
+
+
+class Neo4jExporter:
+    """
+    Writes STIX 2 objects and edges to Neo4j in batches (one UNWIND query per batch) across several sessions in parallel.
+    """
+
+    def __init__(
+        self,
+        driver: Driver,
+        database: Optional[str] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        concurrency: int = DEFAULT_CONCURRENCY,
+    ):
+        self.driver = driver
+        self.database = database
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+
+    def create_constraints(self):
+        self._run(
+            f"CREATE CONSTRAINT object_id IF NOT EXISTS "
+            f"FOR (n:{OBJECT_LABEL}) REQUIRE n.id IS UNIQUE"
+        )
+
+    def export(
+        self,
+        rows: Iterable[dict],
+        decoders: Optional[Iterable[Decoder]] = None,
+    ) -> ExportStats:
+        """
+        Write every object and edge, creating the uniqueness constraint first.
+        """
+        rows = list(rows)
+        triples = list(
+            converter.convert_stix2_objects_to_triples(rows, decoders=decoders)
+        )
+
+        start = time.time()
+        self.create_constraints()
+        stats = ExportStats(
+            nodes=self.write_nodes(iter_nodes(rows, triples)),
+            relationships=self.write_relationships(triples),
+        )
+        stats.seconds = time.time() - start
+        logger.info(
+            "Exported %d nodes and %d relationships in %.2fs (%.0f/s)",
+            stats.nodes,
+            stats.relationships,
+            stats.seconds,
+            stats.rate,
+        )
+        return stats
+
+    def sync(
+        self,
+        rows: Iterable[dict],
+        manifest_path: str,
+        decoders: Optional[Iterable[Decoder]] = None,
+    ) -> SyncStats:
+        """
+        Push only the nodes and relationships which changed since the last sync (as recorded in a local manifest), then update the manifest.
+        """
+        rows = list(rows)
+        triples = list(
+            converter.convert_stix2_objects_to_triples(rows, decoders=decoders)
+        )
+        nodes = list(iter_nodes(rows, triples))
+        hashes = {node["id"]: converter.get_content_hash(node) for node in nodes}
+
+        start = time.time()
+        manifest = Manifest.load(manifest_path)
+        if not manifest.nodes:
+            self.create_constraints()
+
+        changed = [
+            node
+            for node in nodes
+            if manifest.nodes.get(node["id"]) != hashes[node["id"]]
+        ]
+        deleted = [v for v in manifest.nodes if v not in hashes]
+        old_edges = set(manifest.edges)
+        new_edges = set(triples)
+
+        stats = SyncStats(
+            created_nodes=sum(
+                1 for node in changed if node["id"] not in manifest.nodes
+            ),
+            updated_nodes=sum(1 for node in changed if node["id"] in manifest.nodes),
+        )
+        stats.deleted_relationships = self.delete_relationships(old_edges - new_edges)
+        stats.deleted_nodes = self.delete_nodes(deleted)
+        self.write_nodes(changed)
+        stats.created_relationships = self.write_relationships(new_edges - old_edges)
+        stats.seconds = time.time() - start
+
+        Manifest(nodes=hashes, edges=sorted(new_edges)).save(manifest_path)
+        logger.info(
+            "Synced %d new, %d updated, and %d deleted nodes and %d new and %d deleted relationships in %.2fs",
+            stats.created_nodes,
+            stats.updated_nodes,
+            stats.deleted_nodes,
+            stats.created_relationships,
+            stats.deleted_relationships,
+            stats.seconds,
+        )
+        return stats
+
+    def write_nodes(self, nodes: Iterable[dict]) -> int:
+        """
+        Create or update nodes (grouped by label, since labels cannot be parameterised).
+        """
+        nodes_by_label = collections.defaultdict(list)
+        for node in nodes:
+            nodes_by_label[get_label(node["type"])].append(node)
+
+        queries = {
+            label: (
+                f"UNWIND $rows AS row "
+                f"MERGE (n:{OBJECT_LABEL} {{id: row.id}}) "
+                f"SET n:{label}, n += row"
+            )
+            for label in nodes_by_label
+        }
+        return self._run_batches("nodes", queries, nodes_by_label)
+
+    def write_relationships(self, triples: Iterable[Triple]) -> int:
+        """
+        Create relationships (grouped by relationship type) between existing nodes.
+        """
+        rows_by_type = collections.defaultdict(list)
+        for s, p, o in triples:
+            rows_by_type[get_relationship_type(p)].append({"s": s, "o": o})
+
+        queries = {
+            relationship_type: (
+                f"UNWIND $rows AS row "
+                f"MATCH (s:{OBJECT_LABEL} {{id: row.s}}) "
+                f"MATCH (o:{OBJECT_LABEL} {{id: row.o}}) "
+                f"MERGE (s)-[:{relationship_type}]->(o)"
+            )
+            for relationship_type in rows_by_type
+        }
+        return self._run_batches("relationships", queries, rows_by_type)
+
+    def delete_nodes(self, ids: Iterable[str]) -> int:
+        """
+        Delete nodes (and their relationships) by STIX ID.
+        """
+        query = (
+            f"UNWIND $rows AS row "
+            f"MATCH (n:{OBJECT_LABEL} {{id: row.id}}) "
+            f"DETACH DELETE n"
+        )
+        rows = [{"id": v} for v in ids]
+        return self._run_batches("deleted nodes", {None: query}, {None: rows})
+
+    def delete_relationships(self, triples: Iterable[Triple]) -> int:
+        rows_by_type = collections.defaultdict(list)
+        for s, p, o in triples:
+            rows_by_type[get_relationship_type(p)].append({"s": s, "o": o})
+
+        queries = {
+            relationship_type: (
+                f"UNWIND $rows AS row "
+                f"MATCH (:{OBJECT_LABEL} {{id: row.s}})-[r:{relationship_type}]->(:{OBJECT_LABEL} {{id: row.o}}) "
+                f"DELETE r"
+            )
+            for relationship_type in rows_by_type
+        }
+        return self._run_batches("deleted relationships", queries, rows_by_type)
+
+    def _run(self, query: str, **parameters):
+        with self.driver.session(database=self.database) as session:
+            session.run(query, **parameters).consume()
+
+    def _run_batches(
+        self,
+        kind: str,
+        queries: Dict[str, str],
+        rows_by_key: Dict[str, List[dict]],
+    ) -> int:
+        batches = [
+            (queries[k], batch)
+            for k, rows in rows_by_key.items()
+            for batch in iter_batches(rows, self.batch_size)
+        ]
+        total = sum(len(batch) for _, batch in batches)
+        progress = _Progress(kind, total)
+
+        def write(query: str, batch: List[dict]):
+            with self.driver.session(database=self.database) as session:
+                session.execute_write(lambda tx: tx.run(query, rows=batch).consume())
+            progress.update(len(batch))
+
+        with concurrent.futures.ThreadPoolExecutor(self.concurrency) as executor:
+            futures = [executor.submit(write, query, batch) for query, batch in batches]
+            for future in concurrent.futures.as_completed(futures):
+                future.result()
+        return total
+
+
+def write_neo4j_admin_import_files(
+    rows: Iterable[dict],
+    directory: str,
+    decoders: Optional[Iterable[Decoder]] = None,
+    compression: Optional[str] = None,
+) -> Tuple[str, str]:
+    """
+    Write nodes.csv and relationships.csv files for `neo4j-admin database import full` and return their paths.
+
+    Nodes have the same properties and labels as nodes written by Neo4jExporter. The files can be imported into an empty database with: neo4j-admin database import full --nodes=nodes.csv --relationships=relationships.csv <database>
+    """
+    if compression is not None and compression not in NEO4J_ADMIN_COMPRESSION_TYPES:
+        raise ValueError(f"Unsupported compression type for neo4j-admin: {compression}")
+
+    rows = list(rows)
+    directory = converter.get_real_path(directory)
+    os.makedirs(directory, exist_ok=True)
+    extension = ".csv.gz" if compression == GZIP else ".csv"
+    nodes_path = os.path.join(directory, f"nodes{extension}")
+    relationships_path = os.path.join(directory, f"relationships{extension}")
+
+    # Relationships are written as they are decoded; their endpoints are kept so that nodes can be created for objects which are only referenced.
+    endpoints = []
+
+    def iter_relationships() -> Iterator[List[str]]:
+        for s, p, o in converter.convert_stix2_objects_to_triples(
+            rows, decoders=decoders
+        ):
+            endpoints.append((s, p, o))
+            yield [s, o, get_relationship_type(p)]
+
+    write_csv(
+        rows=iter_relationships(),
+        path=relationships_path,
+        header=NEO4J_ADMIN_RELATIONSHIPS_HEADER,
+        compression=compression,
+    )
+    write_csv(
+        rows=(
+            [
+                node["id"],
+                node["type"],
+                node["name"],
+                node["external_id"],
+                f"{OBJECT_LABEL};{get_label(node['type'])}",
+            ]
+            for node in iter_nodes(rows, endpoints)
+        ),
+        path=nodes_path,
+        header=NEO4J_ADMIN_NODES_HEADER,
+        compression=compression,
+    )
+    return nodes_path, relationships_path
+
+
+class _Progress:
+    def __init__(self, kind: str, total: int):
+        self.kind = kind
+        self.total = total
+        self.done = 0
+        self.start = time.time()
+        self._lock = threading.Lock()
+
+    def update(self, n: int):
+        with self._lock:
+            self.done += n
+            elapsed = time.time() - self.start
+            logger.info(
+                "Wrote %d/%d %s (%.0f/s)",
+                self.done,
+                self.total,
+                self.kind,
+                self.done / elapsed if elapsed else 0.0,
+            )
@@ -0,0 +1,421 @@
+import heapq
+import itertools
+import json
+import logging
+import os
+import re
+import sys
+import tempfile
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import networkx as nx
+
+from stix2_explorer import converter
+from stix2_explorer.constants import Triple
+from stix2_explorer.converter import Decoder
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MEMORY_LIMIT = 512 * 1024 * 1024
+DEFAULT_CHUNK_SIZE = 1000
+
+# Objects which decoders need to see alongside every other object (i.e. tactics, which attack patterns reference by kill chain phase name).
+CONTEXT_TYPES = frozenset(["x-mitre-tactic"])
+
+# Index records are of the form: (id, modified, type, name, external ID, custom label)
+_ID, _MODIFIED, _TYPE, _NAME, _EXTERNAL_ID, _LABEL = range(6)
+
+_SIZE_UNITS = {"": 1, "k": 1024, "m": 1024**2, "g": 1024**3, "t": 1024**4}
+
+
+def parse_size(size: Union[str, int]) -> int:
+    """
+    Parse a size in bytes (e.g. 536870912, 512M, 512MB, or 4GiB).
+    """
+    if isinstance(size, int):
+        return size
+
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([kmgt]?)(?:i?b)?\s*", size.lower())
+    if not match:
+        raise ValueError(f"Invalid size: {size}")
+    number, unit = match.groups()
+    return int(float(number) * _SIZE_UNITS[unit])
+
+
+class ExternalSorter:
+    """
+    Sorts and de-duplicates more records (tuples of strings) than fit in memory by spilling sorted runs to temporary files and merging them.
+
+    Records are held in memory until their estimated size reaches the memory limit, at which point they are sorted and written to a run.
+    """
+
+    def __init__(
+        self,
+        memory_limit: int = DEFAULT_MEMORY_LIMIT,
+        directory: Optional[str] = None,
+    ):
+        self.memory_limit = memory_limit
+        self.directory = directory
+        self.records: List[tuple] = []
+        self.size = 0
+        self.runs: List[str] = []
+        self._tmp: Optional[tempfile.TemporaryDirectory] = None
+
+    def __enter__(self) -> "ExternalSorter":
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __iter__(self) -> Iterator[tuple]:
+        """
+        Return the records in sorted order without duplicates.
+        """
+        # Once anything has been spilled, spill the rest too so that the memory is free for the next stage.
+        if self.runs:
+            self.spill()
+        else:
+            self.records.sort()
+
+        runs = [self._read_run(path) for path in self.runs]
+        previous = None
+        for record in heapq.merge(*runs, self.records):
+            if record != previous:
+                yield record
+                previous = record
+
+    def add(self, record: tuple):
+        self.records.append(record)
+        self.size += sys.getsizeof(record) + sum(map(sys.getsizeof, record))
+        if self.size >= self.memory_limit:
+            self.spill()
+
+    def spill(self):
+        if not self.records:
+            return
+
+        if self._tmp is None:
+            self._tmp = tempfile.TemporaryDirectory(
+                prefix="stix2-explorer-", dir=self.directory
+            )
+
+        self.records.sort()
+        path = os.path.join(self._tmp.name, f"run-{len(self.runs)}.jsonl")
+        with open(path, "w", encoding="utf-8") as file:
+            previous = None
+            for record in self.records:
+                if record != previous:
+                    file.write(json.dumps(record))
+                    file.write("\n")
+                    previous = record
+
+        logger.debug("Spilled %d records to %s", len(self.records), path)
+        self.runs.append(path)
+        self.records = []
+        self.size = 0
+
+    def _read_run(self, path: str) -> Iterator[tuple]:
+        with open(path, encoding="utf-8") as file:
+            for line in file:
+                yield tuple(json.loads(line))
+
+    def close(self):
+        self.records = []
+        self.size = 0
+        self.runs = []
+        if self._tmp is not None:
+            self._tmp.cleanup()
+            self._tmp = None
+
+
+def iter_stix2_objects(
+    data_sources: Union[str, Iterable[str]],
+    decoders: Optional[Iterable[Decoder]] = None,
+    include_deprecated: bool = False,
+    include_revoked: bool = False,
+) -> Iterator[dict]:
+    """
+    Stream the objects in one or more files, directories, or URLs one bundle at a time (i.e. each bundle must fit in memory, but not the whole corpus).
+    """
+    if isinstance(data_sources, str):
+        data_sources = [data_sources]
+
+    for src in data_sources:
+        rows = converter.iter_stix2_bundle_objects(src)
+        yield from converter.filter_stix2_objects(
+            rows,
+            decoders=decoders,
+            include_deprecated=include_deprecated,
+            include_revoked=include_revoked,
+        )
+
+
+def convert_stix2_objects_to_triples(
+    data_sources: Union[str, Iterable[str]],
+    node_labels: Optional[Union[str, Dict[str, str], Callable[[dict], str]]] = None,
+    decoders: Optional[Iterable[Decoder]] = None,
+    include_deprecated: bool = False,
+    include_revoked: bool = False,
+    memory_limit: int = DEFAULT_MEMORY_LIMIT,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    temp_dir: Optional[str] = None,
+) -> Iterator[Triple]:
+    """
+    Like converter.convert_stix2_objects_to_triples, but with bounded memory: objects are streamed from disk (twice), and the ID index and edges are sorted, joined, and de-duplicated using sorted runs in a temporary directory.
+
+    Triples are returned in sorted order. Memory usage is kept to roughly the memory limit plus a chunk of objects.
+    """
+    decoders = decoders or converter.get_default_decoders()
+    with OutOfCoreCorpus(
+        data_sources,
+        decoders=decoders,
+        include_deprecated=include_deprecated,
+        include_revoked=include_revoked,
+        memory_limit=memory_limit,
+        chunk_size=chunk_size,
+        temp_dir=temp_dir,
+    ) as corpus:
+        yield from corpus.iter_triples(node_labels)
+
+
+def convert_stix2_objects_to_digraph(
+    data_sources: Union[str, Iterable[str]],
+    decoders: Optional[Iterable[Decoder]] = None,
+    edge_label_key: str = "label",
+    include_deprecated: bool = False,
+    include_revoked: bool = False,
+    memory_limit: int = DEFAULT_MEMORY_LIMIT,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    temp_dir: Optional[str] = None,
+) -> nx.DiGraph:
+    """
+    Like converter.convert_stix2_objects_to_digraph, but only the graph has to fit in memory, not the objects: nodes have type, name, and external_id attributes instead of every property of the object.
+    """
+    decoders = decoders or converter.get_default_decoders()
+    with OutOfCoreCorpus(
+        data_sources,
+        decoders=decoders,
+        include_deprecated=include_deprecated,
+        include_revoked=include_revoked,
+        memory_limit=memory_limit,
+        chunk_size=chunk_size,
+        temp_dir=temp_dir,
+    ) as corpus:
+        g = nx.DiGraph()
+        for s, p, o in corpus.iter_triples():
+            g.add_edge(s, o, **{edge_label_key: p})
+
+        for record in corpus.iter_latest_index_records():
+            stix2_id = record[_ID]
+            if stix2_id in g:
+                g.add_node(
+                    stix2_id,
+                    type=record[_TYPE],
+                    name=record[_NAME] or None,
+                    external_id=record[_EXTERNAL_ID] or None,
+                )
+        return g
+
+
+class OutOfCoreCorpus:
+    """
+    A corpus of STIX 2 content which is read from disk as needed rather than loaded into memory.
+
+    The first pass over the content builds a sorted ID index (and collects the few objects which decoders need to see alongside every other object), and the second decodes edges one chunk of objects at a time into sorted runs.
+    """
+
+    def __init__(
+        self,
+        data_sources: Union[str, Iterable[str]],
+        decoders: Optional[Iterable[Decoder]] = None,
+        include_deprecated: bool = False,
+        include_revoked: bool = False,
+        memory_limit: int = DEFAULT_MEMORY_LIMIT,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        temp_dir: Optional[str] = None,
+    ):
+        if isinstance(data_sources, str):
+            data_sources = [data_sources]
+        self.data_sources = list(data_sources)
+        self.decoders = list(decoders or converter.get_default_decoders())
+        self.include_deprecated = include_deprecated
+        self.include_revoked = include_revoked
+        self.chunk_size = chunk_size
+        self.temp_dir = temp_dir
+
+        # At most two sorters hold records in memory at once (i.e. one being read and one being written).
+        self.memory_limit = memory_limit // 2
+        self._sorters: List[ExternalSorter] = []
+        self._index: Optional[ExternalSorter] = None
+        self._edges: Optional[ExternalSorter] = None
+        self._context: List[dict] = []
+        self._custom_label: Optional[Callable[[dict], str]] = None
+
+    def __enter__(self) -> "OutOfCoreCorpus":
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        for sorter in self._sorters:
+            sorter.close()
+        self._sorters = []
+        self._index = None
+        self._edges = None
+
+    def iter_objects(self) -> Iterator[dict]:
+        return iter_stix2_objects(
+            self.data_sources,
+            decoders=self.decoders,
+            include_deprecated=self.include_deprecated,
+            include_revoked=self.include_revoked,
+        )
+
+    def iter_triples(
+        self,
+        node_labels: Optional[Union[str, Dict[str, str], Callable[[dict], str]]] = None,
+    ) -> Iterator[Triple]:
+        """
+        Return the de-duplicated triples in sorted order (see converter.convert_stix2_objects_to_triples for node labels).
+        """
+        if node_labels is None or node_labels == converter.NODE_LABEL_TYPE_ID:
+            yield from self._get_edges()
+            return
+        elif node_labels == converter.NODE_LABEL_TYPE_TYPE:
+            get_label = converter.get_stix2_type_from_id
+        elif isinstance(node_labels, dict):
+            get_label = lambda v: node_labels.get(v) or v
+        else:
+            yield from self._iter_indexed_triples(node_labels)
+            return
+
+        triples = self._new_sorter()
+        for s, p, o in self._get_edges():
+            triples.add((get_label(s), p, get_label(o)))
+        yield from triples
+
+    def _iter_indexed_triples(
+        self, node_labels: Union[str, Callable[[dict], str]]
+    ) -> Iterator[Triple]:
+        if node_labels == converter.NODE_LABEL_TYPE_NAME:
+            k = _NAME
+        elif node_labels == converter.NODE_LABEL_TYPE_EXTERNAL_ID:
+            k = _EXTERNAL_ID
+        elif callable(node_labels):
+            # Custom labels are computed while indexing.
+            if node_labels is not self._custom_label:
+                self._custom_label = node_labels
+                self._index = None
+            k = _LABEL
+        else:
+            raise ValueError(f"Unsupported node label type: {node_labels}")
+
+        def iter_labels() -> Iterator[Tuple[str, str]]:
+            for record in self.iter_latest_index_records():
+                yield record[_ID], record[k]
+
+        # Label the subjects (the edges are sorted by subject), then re-sort by object and label the objects.
+        by_object = self._new_sorter()
+        for (s, p, o), label in _merge_join(self._get_edges(), iter_labels()):
+            by_object.add((o, p, label or s))
+
+        triples = self._new_sorter()
+        for (o, p, s), label in _merge_join(by_object, iter_labels()):
+            triples.add((s, p, label or o))
+        by_object.close()
+        yield from triples
+
+    def iter_latest_index_records(self) -> Iterator[tuple]:
+        """
+        Return the index record of the latest version of each object, sorted by ID.
+        """
+        # Records are sorted by ID and then modification time, so the last record for an ID is the latest version.
+        for _, records in itertools.groupby(self._get_index(), key=lambda r: r[_ID]):
+            *_, latest = records
+            yield latest
+
+    def _get_index(self) -> ExternalSorter:
+        if self._index is None:
+            self._build_index()
+        return self._index
+
+    def _get_edges(self) -> ExternalSorter:
+        if self._edges is None:
+            self._build_edges()
+        return self._edges
+
+    def _build_index(self):
+        index = self._new_sorter()
+        self._context = []
+        total = 0
+        for o in self.iter_objects():
+            total += 1
+            try:
+                external_id = converter.get_external_id(o)
+            except (KeyError, ValueError):
+                external_id = None
+
+            label = None
+            if self._custom_label is not None:
+                try:
+                    label = self._custom_label(o)
+                except (KeyError, ValueError):
+                    label = None
+
+            index.add(
+                (
+                    o["id"],
+                    o.get("modified") or "",
+                    o["type"],
+                    o.get("name") or "",
+                    external_id or "",
+                    label or "",
+                )
+            )
+            if o["type"] in CONTEXT_TYPES:
+                self._context.append(o)
+
+        self._index = index
+        logger.info("Indexed %d objects (%d runs)", total, len(index.runs))
+
+    def _build_edges(self):
+        # The context (e.g. tactics) is collected while indexing.
+        self._get_index()
+
+        edges = self._new_sorter()
+        rows = self.iter_objects()
+        while True:
+            chunk = list(itertools.islice(rows, self.chunk_size))
+            if not chunk:
+                break
+
+            # Edges which are decoded from context objects more than once are removed when the runs are merged.
+            chunk = self._context + chunk
+            for decoder in self.decoders:
+                for batch in decoder.iter_edge_batches(chunk):
+                    for triple in batch.iter_triples():
+                        edges.add(triple)
+
+        self._edges = edges
+        logger.info("Decoded edges into %d runs", len(edges.runs))
+
+    def _new_sorter(self) -> ExternalSorter:
+        # Records which are still held in memory by earlier stages are spilled to make room for the new stage.
+        for sorter in self._sorters:
+            sorter.spill()
+
+        sorter = ExternalSorter(memory_limit=self.memory_limit, directory=self.temp_dir)
+        self._sorters.append(sorter)
+        return sorter
+
+
+def _merge_join(
+    records: Iterable[tuple], labels: Iterator[Tuple[str, str]]
+) -> Iterator[Tuple[tuple, Optional[str]]]:
+    # Both inputs are sorted by ID (i.e. the first field of each record).
+    label_id, label = next(labels, (None, None))
+    for record in records:
+        while label_id is not None and label_id < record[0]:
+            label_id, label = next(labels, (None, None))
+        yield record, label if label_id == record[0] else None
@@ -0,0 +1,145 @@
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Tuple, Union
+
+from stix2.datastore import DataSource
+
+from stix2_explorer import converter
+from stix2_explorer.constants import Triple
+from stix2_explorer.converter import Decoder, EdgeBatch
+
+# Provenance masks are stored as unsigned 64-bit integers in columnar outputs.
+MAX_SOURCES = 64
+
+
+@dataclass()
+class SourceRegistry:
+    """
+    Assigns each named data source a bit in a provenance mask.
+    """
+
+    names: List[str] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def register(self, name: str) -> int:
+        """
+        Return the bit assigned to a data source, registering it if necessary.
+        """
+        if name in self.names:
+            return self.names.index(name)
+        if len(self.names) >= MAX_SOURCES:
+            raise ValueError(f"Too many data sources (max: {MAX_SOURCES})")
+        self.names.append(name)
+        return len(self.names) - 1
+
+    def get_mask(self, names: Union[str, Iterable[str]]) -> int:
+        if isinstance(names, str):
+            names = [names]
+
+        mask = 0
+        for name in names:
+            try:
+                mask |= 1 << self.names.index(name)
+            except ValueError:
+                raise ValueError(f"Unknown data source: {name}")
+        return mask
+
+    def get_names(self, mask: int) -> List[str]:
+        return [name for i, name in enumerate(self.names) if mask >> i & 1]
+
+
+@dataclass()
+class Provenance:
+    """
+    The data sources each object was loaded from, as a bitmask into a source registry.
+    """
+
+    registry: SourceRegistry = field(default_factory=SourceRegistry)
+    objects: Dict[str, int] = field(default_factory=dict)
+
+    def add(self, object_id: str, bit: int):
+        self.objects[object_id] = self.objects.get(object_id, 0) | 1 << bit
+
+    def get_mask(self, object_id: Optional[str]) -> int:
+        return self.objects.get(object_id, 0)
+
+    def get_names(self, object_id: str) -> List[str]:
+        return self.registry.get_names(self.get_mask(object_id))
+
+    def is_from(self, object_id: str, names: Union[str, Iterable[str]]) -> bool:
+        return bool(self.get_mask(object_id) & self.registry.get_mask(names))
+
+
+def iter_stix2_objects_with_provenance(
+    data_sources: Union[
+        Mapping[str, Union[str, DataSource]], Iterable[Union[str, DataSource]]
+    ],
+    provenance: Optional[Provenance] = None,
+) -> Iterator[dict]:
+    """
+    Stream objects from one or more data sources, recording which data source(s) each object came from as it is loaded.
+
+    Data sources can be given as a mapping of names to paths/URLs/data sources, or as a list of paths/URLs (which are used as their names).
+    """
+    if provenance is None:
+        provenance = Provenance()
+
+    if not isinstance(data_sources, Mapping):
+        data_sources = {_get_data_source_name(ds): ds for ds in data_sources}
+
+    # Objects which appear in more than one data source are only returned once.
+    seen = set()
+    for name, data_source in data_sources.items():
+        bit = provenance.registry.register(name)
+        src = converter.get_stix2_data_source(data_source)
+        for o in converter._iter_stix2_data_source_objects(src):
+            provenance.add(o["id"], bit)
+
+            k = (o["id"], o.get("modified"))
+            if k not in seen:
+                seen.add(k)
+                yield o
+
+
+def load_stix2_objects_with_provenance(
+    data_sources: Union[
+        Mapping[str, Union[str, DataSource]], Iterable[Union[str, DataSource]]
+    ],
+) -> Tuple[List[dict], Provenance]:
+    provenance = Provenance()
+    rows = list(iter_stix2_objects_with_provenance(data_sources, provenance))
+    return rows, provenance
+
+
+def iter_edge_batches(
+    rows: Iterable[dict], decoders: Optional[Iterable[Decoder]] = None
+) -> Iterator[EdgeBatch]:
+    """
+    Decode a stream of STIX 2 objects into batches of edges which are not de-duplicated, so that every origin of each edge is kept.
+    """
+    rows = list(rows)
+    decoders = decoders or converter.get_default_decoders()
+    for decoder in decoders:
+        yield from decoder.iter_edge_batches(rows)
+
+
+def get_edge_provenance(
+    batches: Iterable[EdgeBatch], provenance: Provenance
+) -> Dict[Triple, int]:
+    """
+    Return the provenance mask of each edge in a stream of edge batches (i.e. of the relationship or object it was decoded from).
+
+    Edges which were decoded from more than one object carry the union of their provenance masks. Edges are returned in the order in which they were first seen, so the keys are the de-duplicated triples.
+    """
+    masks = {}
+    for batch in batches:
+        for k, origin in zip(batch.iter_triples(), batch.origins):
+            masks[k] = masks.get(k, 0) | provenance.get_mask(origin)
+    return masks
+
+
+def _get_data_source_name(data_source: Union[str, DataSource]) -> str:
+    if isinstance(data_source, str):
+        return data_source
+    return f"{type(data_source).__name__}-{data_source.id}"
@@ -0,0 +1,226 @@
+import bisect
+import collections
+from dataclasses import dataclass, field
+import gzip
+import json
+import math
+import os
+import re
+import tempfile
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from stix2_explorer import converter
+from stix2_explorer.constants import CACHE_DIR
+
+# Field weights (i.e. a match on a name or alias counts for more than a match in a description).
+DEFAULT_FIELD_WEIGHTS = {
+    "name": 3.0,
+    "aliases": 3.0,
+    "external_references": 2.0,
+    "description": 1.0,
+}
+
+K1 = 1.2
+B = 0.75
+
+MAX_PREFIX_EXPANSIONS = 50
+
+# Terms which only share a prefix with a query token score less than exact matches.
+PREFIX_MATCH_WEIGHT = 0.5
+
+_TOKEN_PATTERN = re.compile(r"\w+(?:\.\w+)*")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lower-case tokens (dotted identifiers such as T1003.001 and lsass.exe are kept whole).
+    """
+    return _TOKEN_PATTERN.findall(text.lower())
+
+
+def iter_field_values(o: dict, k: str) -> Iterator[str]:
+    if k == "external_references":
+        for ref in o.get(k) or []:
+            for v in (ref.get("external_id"), ref.get("description")):
+                if v:
+                    yield v
+    else:
+        v = o.get(k)
+        if isinstance(v, str):
+            yield v
+        elif isinstance(v, list):
+            yield from (s for s in v if isinstance(s, str))
+
+
+@dataclass()
+class SearchResult:
+    id: str
+    score: float
+
+
+@dataclass()
+class SearchIndex:
+    """
+    An inverted index over the names, aliases, descriptions, and external references of STIX 2 objects with BM25-style ranking.
+    """
+
+    fingerprint: Optional[str] = None
+    ids: List[str] = field(default_factory=list)
+    lengths: List[float] = field(default_factory=list)
+    postings: Dict[str, Dict[int, float]] = field(default_factory=dict)
+    terms: List[str] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def average_length(self) -> float:
+        return sum(self.lengths) / len(self.lengths) if self.lengths else 0.0
+
+    def search(
+        self, query: str, limit: Optional[int] = 10, prefix: bool = True
+    ) -> List[SearchResult]:
+        """
+        Rank objects against a free-text query.
+
+        Each query token matches terms which start with it (e.g. lsass matches lsass.exe) when prefix search is enabled.
+        """
+        n = len(self.ids)
+        avgdl = self.average_length or 1.0
+
+        scores = collections.defaultdict(float)
+        for token in set(tokenize(query)):
+            best = collections.defaultdict(float)
+            for term in self._expand(token, prefix=prefix):
+                postings = self.postings[term]
+                idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+                if term != token:
+                    idf *= PREFIX_MATCH_WEIGHT
+                for doc, tf in postings.items():
+                    norm = K1 * (1 - B + B * self.lengths[doc] / avgdl)
+                    score = idf * tf * (K1 + 1) / (tf + norm)
+                    if score > best[doc]:
+                        best[doc] = score
+
+            for doc, score in best.items():
+                scores[doc] += score
+
+        ranked = sorted(scores.items(), key=lambda x: (-x[1], self.ids[x[0]]))
+        if limit:
+            ranked = ranked[:limit]
+        return [SearchResult(id=self.ids[doc], score=score) for doc, score in ranked]
+
+    def _expand(self, token: str, prefix: bool) -> List[str]:
+        if not prefix:
+            return [token] if token in self.postings else []
+
+        terms = []
+        i = bisect.bisect_left(self.terms, token)
+        while i < len(self.terms) and self.terms[i].startswith(token):
+            terms.append(self.terms[i])
+            if len(terms) >= MAX_PREFIX_EXPANSIONS:
+                break
+            i += 1
+        return terms
+
+    def save(self, path: str):
+        data = {
+            "fingerprint": self.fingerprint,
+            "ids": self.ids,
+            "lengths": self.lengths,
+            "postings": {
+                term: [[doc, tf] for doc, tf in postings.items()]
+                for term, postings in self.postings.items()
+            },
+        }
+        path = converter.get_real_path(path)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+
+        # Write to a temporary file and rename it into place, so that a crash can't leave a partial index behind.
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as raw, gzip.open(
+                raw, "wt", encoding="utf-8"
+            ) as file:
+                json.dump(data, file, separators=(",", ":"))
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, path: str) -> "SearchIndex":
+        with gzip.open(converter.get_real_path(path), "rt", encoding="utf-8") as file:
+            data = json.load(file)
+
+        postings = {
+            term: {doc: tf for doc, tf in postings}
+            for term, postings in data["postings"].items()
+        }
+        return cls(
+            fingerprint=data["fingerprint"],
+            ids=data["ids"],
+            lengths=data["lengths"],
+            postings=postings,
+            terms=sorted(postings),
+        )
+
+
+def create_search_index(
+    rows: Iterable[dict],
+    field_weights: Optional[Dict[str, float]] = None,
+    fingerprint: Optional[str] = None,
+) -> SearchIndex:
+    field_weights = field_weights or DEFAULT_FIELD_WEIGHTS
+
+    index = SearchIndex(fingerprint=fingerprint)
+    postings = collections.defaultdict(dict)
+    for o in rows:
+        if o["type"] == "relationship":
+            continue
+
+        tfs = collections.defaultdict(float)
+        length = 0.0
+        for k, weight in field_weights.items():
+            for v in iter_field_values(o, k):
+                for token in tokenize(v):
+                    tfs[token] += weight
+                    length += weight
+
+        if not tfs:
+            continue
+
+        doc = len(index.ids)
+        index.ids.append(o["id"])
+        index.lengths.append(length)
+        for token, tf in tfs.items():
+            postings[token][doc] = tf
+
+    index.postings = dict(postings)
+    index.terms = sorted(postings)
+    return index
+
+
+def get_search_index(
+    rows: Iterable[dict], cache_dir: Optional[str] = CACHE_DIR
+) -> SearchIndex:
+    """
+    Return the search index for a corpus, re-using the copy saved to the cache directory if the corpus has not changed.
+    """
+    rows = list(rows)
+    fingerprint = converter.get_corpus_fingerprint(rows)
+    if not cache_dir:
+        return create_search_index(rows, fingerprint=fingerprint)
+
+    path = os.path.join(cache_dir, f"search-{fingerprint}.json.gz")
+    if os.path.exists(converter.get_real_path(path)):
+        try:
+            return SearchIndex.load(path)
+        except (OSError, ValueError, EOFError, KeyError):
+            # The cached copy is truncated or corrupt, so it is rebuilt and overwritten.
+            pass
+
+    index = create_search_index(rows, fingerprint=fingerprint)
+    index.save(path)
+    return index
@@ -1,5 +1,7 @@
+import collections.abc
 from dataclasses import dataclass
-from typing import Any
+import datetime
+from typing import Any, Callable, Dict
 
 from stix2.serialization import STIXJSONEncoder as _JSONEncoder
 from stix2.base import _STIXBase
@@ -11,11 +13,74 @@ class JSONEncoder(_JSONEncoder):
     def default(self, o: Any) -> Any:
         if isinstance(o, _STIXBase):
             return dict(o)
-        elif isinstance(o, STIXdatetime):
+        elif isinstance(o, datetime.datetime):
             return o.isoformat()
-        elif isinstance(o, set):
-            return list(o)
-        elif iter(o) == o:
+        elif isinstance(o, (set, collections.abc.Iterator)):
             return list(o)
         else:
-            return super().default(o)
\ No newline at end of file
+            return super().default(o)
+
+
+def to_python(o: Any) -> Any:
+    """
+    Convert STIX 2 objects (and any timestamps, sets, or iterators within them) into plain dicts, lists, strings, and numbers.
+
+    The result is the same as serializing with JSONEncoder and parsing the result, without the round trip through JSON.
+    """
+    f = _CONVERTERS.get(type(o))
+    if f is None:
+        f = _CONVERTERS[type(o)] = _get_converter(o)
+    return f(o)
+
+
+def _identity(o: Any) -> Any:
+    return o
+
+
+def _convert_stix2_object(o: _STIXBase) -> dict:
+    # STIX 2 objects are read-only mappings over an inner dict of properties.
+    return _convert_mapping(o._inner)
+
+
+def _convert_mapping(o: collections.abc.Mapping) -> dict:
+    d = {}
+    for k, v in o.items():
+        # Most values are strings, so avoid a function call for them.
+        d[k] = v if type(v) is str else to_python(v)
+    return d
+
+
+def _convert_iterable(o: Any) -> list:
+    return [v if type(v) is str else to_python(v) for v in o]
+
+
+def _convert_datetime(o: datetime.datetime) -> str:
+    return o.isoformat()
+
+
+def _get_converter(o: Any) -> Callable[[Any], Any]:
+    if isinstance(o, _STIXBase):
+        return _convert_stix2_object
+    elif isinstance(o, collections.abc.Mapping):
+        return _convert_mapping
+    elif isinstance(o, datetime.datetime):
+        return _convert_datetime
+    elif isinstance(o, (str, int, float)):
+        return _identity
+    elif isinstance(o, (list, tuple, set, collections.abc.Iterator)):
+        return _convert_iterable
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+# Converters by exact type (other types are added as they are seen).
+_CONVERTERS: Dict[type, Callable[[Any], Any]] = {
+    str: _identity,
+    int: _identity,
+    float: _identity,
+    bool: _identity,
+    type(None): _identity,
+    dict: _convert_mapping,
+    list: _convert_iterable,
+    tuple: _convert_iterable,
+    STIXdatetime: _convert_datetime,
+}
@@ -0,0 +1,576 @@
+import collections
+import glob
+import hashlib
+import http.client
+import http.server
+import json
+import logging
+import os
+import socket
+import socketserver
+import threading
+import urllib.parse
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, List, Optional
+
+import networkx as nx
+from stix2.datastore import DataSource
+
+from stix2_explorer import converter
+from stix2_explorer.constants import MAX_RADIUS, SERVER_STATE_PATH, Triple
+from stix2_explorer.writers import get_json_encoder, iter_batches
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8750
+DEFAULT_PAGE_SIZE = 1000
+MAX_PAGE_SIZE = 100000
+DEFAULT_TIMEOUT = 60
+
+# How many filtered lists (e.g. objects of a type) to keep, so that each page of them is a slice.
+MAX_CACHED_RESULTS = 64
+
+UNIX_SOCKET_SCHEME = "unix"
+
+
+class Corpus:
+    """
+    STIX 2 objects along with the indexes, graph, and triples derived from them, which are built once and kept in memory between queries.
+    """
+
+    def __init__(self, rows: Iterable[dict]):
+        self.objects = list(rows)
+        self.objects_by_id = {o["id"]: o for o in self.objects}
+
+        # Deprecated and revoked objects are hidden unless they are asked for (i.e. like converter.iter_stix2_objects).
+        self.current = list(converter.filter_stix2_objects(self.objects))
+        self._lock = threading.Lock()
+        self._graph: Optional[nx.DiGraph] = None
+        self._triples: Dict[str, List[Triple]] = {}
+        self._node_label_functions: Dict[str, Callable[[str], str]] = {}
+        self._dot: Dict[str, str] = {}
+        self._results: collections.OrderedDict = collections.OrderedDict()
+
+    @classmethod
+    def from_data_sources(cls, data_sources: List[DataSource]) -> "Corpus":
+        rows = converter.iter_stix2_objects(
+            data_sources, include_deprecated=True, include_revoked=True
+        )
+        return cls(rows)
+
+    def warm(self):
+        """
+        Build the graph and the triples (with STIX IDs as node labels) ahead of the first query.
+        """
+        self.get_graph()
+        self.get_triples()
+
+    def get_objects(
+        self,
+        object_ids: Optional[Iterable[str]] = None,
+        object_types: Optional[Iterable[str]] = None,
+        object_names: Optional[Iterable[str]] = None,
+        include_deprecated: bool = False,
+        include_revoked: bool = False,
+    ) -> List[dict]:
+        """
+        Return the objects which match the given filters (the result of each recent query is kept).
+        """
+        object_ids = frozenset(object_ids or [])
+        object_types = frozenset(object_types or [])
+        object_names = tuple(sorted(set(object_names or [])))
+        if not (object_ids or object_types or object_names):
+            if not (include_deprecated or include_revoked):
+                return self.current
+            elif include_deprecated and include_revoked:
+                return self.objects
+
+        def get_objects() -> List[dict]:
+            return list(
+                converter.filter_stix2_objects(
+                    self.objects,
+                    object_ids=object_ids,
+                    object_types=object_types,
+                    object_names=object_names,
+                    include_deprecated=include_deprecated,
+                    include_revoked=include_revoked,
+                )
+            )
+
+        k = (
+            "objects",
+            object_ids,
+            object_types,
+            object_names,
+            include_deprecated,
+            include_revoked,
+        )
+        return self._get_result(k, get_objects)
+
+    def get_object(self, object_id: str) -> Optional[dict]:
+        return self.objects_by_id.get(object_id)
+
+    def get_graph(self) -> nx.DiGraph:
+        with self._lock:
+            if self._graph is None:
+                self._graph = converter.convert_stix2_objects_to_digraph(self.current)
+            return self._graph
+
+    def get_triples(
+        self, node_label_type: str = converter.NODE_LABEL_TYPE_ID
+    ) -> List[Triple]:
+        with self._lock:
+            triples = self._triples.get(node_label_type)
+            if triples is None:
+                triples = self._triples[node_label_type] = list(
+                    converter.convert_stix2_objects_to_triples(
+                        self.current, node_labels=node_label_type
+                    )
+                )
+            return triples
+
+    def get_neighbour_triples(
+        self,
+        object_ids: Iterable[str],
+        radius: int = 1,
+        labels: Optional[Iterable[str]] = None,
+        node_label_type: str = converter.NODE_LABEL_TYPE_ID,
+    ) -> List[Triple]:
+        """
+        Return the (sorted) triples which are within a number of steps (at most MAX_RADIUS) of the given objects.
+        """
+        object_ids = frozenset(object_ids)
+        labels = tuple(sorted(set(labels or [])))
+        if not object_ids:
+            raise ValueError("At least one object ID is required")
+        if not 1 <= radius <= MAX_RADIUS:
+            raise ValueError(f"Radius must be between 1 and {MAX_RADIUS}: {radius}")
+
+        def get_neighbour_triples() -> List[Triple]:
+            sg = converter.get_related_object_subgraph(
+                self.get_graph(), object_ids=object_ids, labels=labels, radius=radius
+            )
+            get_label = self._get_node_label_function(node_label_type)
+            return sorted(
+                (get_label(s), p, get_label(o))
+                for (s, p, o) in converter.convert_digraph_to_triples(sg)
+            )
+
+        k = ("neighbours", object_ids, radius, labels, node_label_type)
+        return self._get_result(k, get_neighbour_triples)
+
+    def get_dot(self, node_label_type: str = converter.NODE_LABEL_TYPE_ID) -> str:
+        triples = self.get_triples(node_label_type)
+        with self._lock:
+            dot = self._dot.get(node_label_type)
+            if dot is None:
+                dot = self._dot[node_label_type] = converter.convert_triples_to_dot(
+                    triples
+                )
+            return dot
+
+    def _get_result(self, k: Hashable, f: Callable[[], List[Any]]) -> List[Any]:
+        with self._lock:
+            result = self._results.get(k)
+            if result is not None:
+                self._results.move_to_end(k)
+                return result
+
+        # Queries are answered outside of the lock, so a slow query doesn't hold up the others.
+        result = f()
+        with self._lock:
+            self._results[k] = result
+            while len(self._results) > MAX_CACHED_RESULTS:
+                self._results.popitem(last=False)
+        return result
+
+    def _get_node_label_function(self, node_label_type: str) -> Callable[[str], str]:
+        with self._lock:
+            f = self._node_label_functions.get(node_label_type)
+            if f is None:
+                f = self._node_label_functions[node_label_type] = (
+                    converter.get_node_label_function(self.current, node_label_type)
+                )
+            return f
+
+
+class RequestHandler(http.server.BaseHTTPRequestHandler):
+    """
+    Answers queries against the corpus of the server. Lists are returned as JSON lines, a page at a time (see the X-Next-Offset header).
+
+    - GET /health
+    - GET /objects?id=&type=&name=&include-deprecated=&include-revoked=&offset=&limit=
+    - GET /objects/<id>
+    - GET /triples?node-label-type=&offset=&limit=
+    - GET /neighbours?id=&radius=&label=&node-label-type=&offset=&limit=
+    - GET /dot?node-label-type=
+    """
+
+    server: "ServerMixin"
+
+    def do_GET(self):
+        url = urllib.parse.urlsplit(self.path)
+        path = urllib.parse.unquote(url.path).rstrip("/")
+        params = urllib.parse.parse_qs(url.query)
+        corpus = self.server.corpus
+        try:
+            if path == "/health":
+                self._send_json(
+                    {
+                        "status": "ok",
+                        "key": self.server.key,
+                        "objects": len(corpus.objects),
+                    }
+                )
+            elif path == "/objects":
+                rows = corpus.get_objects(
+                    object_ids=params.get("id"),
+                    object_types=params.get("type"),
+                    object_names=params.get("name"),
+                    include_deprecated=_get_bool(params, "include-deprecated"),
+                    include_revoked=_get_bool(params, "include-revoked"),
+                )
+                self._send_page(rows, params)
+            elif path.startswith("/objects/"):
+                o = corpus.get_object(path[len("/objects/") :])
+                if o is None:
+                    self._send_error(404, f"Object not found: {path}")
+                else:
+                    self._send_json(o)
+            elif path == "/triples":
+                rows = corpus.get_triples(_get_node_label_type(params))
+                self._send_page(rows, params)
+            elif path == "/neighbours":
+                rows = corpus.get_neighbour_triples(
+                    params.get("id", []),
+                    radius=_get_int(params, "radius", 1),
+                    labels=params.get("label"),
+                    node_label_type=_get_node_label_type(params),
+                )
+                self._send_page(rows, params)
+            elif path == "/dot":
+                dot = corpus.get_dot(_get_node_label_type(params))
+                self._send(200, "text/vnd.graphviz", dot.encode("utf-8"))
+            else:
+                self._send_error(404, f"Not found: {path}")
+        except ValueError as e:
+            self._send_error(400, str(e))
+
+    def _send_page(self, rows: List[Any], params: Dict[str, List[str]]):
+        offset = _get_int(params, "offset", 0)
+        limit = min(_get_int(params, "limit", DEFAULT_PAGE_SIZE), MAX_PAGE_SIZE)
+        if offset < 0 or limit < 1:
+            raise ValueError("Invalid offset or limit")
+
+        page = rows[offset : offset + limit]
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        if offset + limit < len(rows):
+            self.send_header("X-Next-Offset", str(offset + limit))
+        self.end_headers()
+
+        encode = get_json_encoder()
+        for batch in iter_batches(page, DEFAULT_PAGE_SIZE):
+            self.wfile.write(b"".join(encode(row) + b"\n" for row in batch))
+
+    def _send_json(self, o: Any):
+        self._send(200, "application/json", get_json_encoder()(o))
+
+    def _send_error(self, status: int, message: str):
+        self._send(status, "application/json", get_json_encoder()({"error": message}))
+
+    def _send(self, status: int, content_type: str, body: bytes):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def address_string(self) -> str:
+        # Clients of Unix sockets don't have an address.
+        return self.client_address[0] if self.client_address else UNIX_SOCKET_SCHEME
+
+    def log_message(self, format: str, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+class ServerMixin:
+    corpus: Corpus
+    key: str
+    daemon_threads = True
+
+
+class HTTPServer(ServerMixin, http.server.ThreadingHTTPServer):
+    pass
+
+
+class UnixHTTPServer(
+    ServerMixin, socketserver.ThreadingMixIn, socketserver.UnixStreamServer
+):
+    pass
+
+
+def create_server(
+    corpus: Corpus,
+    key: str,
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+    socket_path: Optional[str] = None,
+) -> ServerMixin:
+    """
+    Create a server which answers queries against the given corpus over HTTP, or over a Unix socket if a path is given.
+    """
+    if socket_path:
+        socket_path = converter.get_real_path(socket_path)
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        server = UnixHTTPServer(socket_path, RequestHandler)
+    else:
+        server = HTTPServer((host, port), RequestHandler)
+    server.corpus = corpus
+    server.key = key
+    return server
+
+
+def get_server_url(server: ServerMixin) -> str:
+    if isinstance(server, UnixHTTPServer):
+        return f"{UNIX_SOCKET_SCHEME}:{server.server_address}"
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}"
+
+
+def serve(
+    server: ServerMixin,
+    state_path: Optional[str] = SERVER_STATE_PATH,
+):
+    """
+    Serve queries until interrupted, recording the address of the server so that CLI commands can forward to it.
+    """
+    url = get_server_url(server)
+    state = {"url": url, "key": server.key, "pid": os.getpid()}
+    if state_path:
+        state_path = converter.get_real_path(state_path)
+        os.makedirs(os.path.dirname(state_path), exist_ok=True)
+        with open(state_path, "w") as file:
+            json.dump(state, file)
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if isinstance(server, UnixHTTPServer) and os.path.exists(server.server_address):
+            os.remove(server.server_address)
+
+        # Another server may have been started since.
+        if state_path and read_server_state(state_path) == state:
+            os.remove(state_path)
+
+
+def read_server_state(state_path: str = SERVER_STATE_PATH) -> Optional[dict]:
+    try:
+        with open(converter.get_real_path(state_path)) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def get_server_key(**sources: Any) -> str:
+    """
+    Identify a selection of STIX 2 content (i.e. the CLI's include options and projection) so that commands are only forwarded to a server which has loaded the same content.
+
+    Local paths (i.e. includes, and the paths of built-in sources) are identified by the size and modification time of every file they contain, so a server which loaded an older copy is not used. Remote content (e.g. a URL or TAXII collection) is identified by its URL alone: a server keeps the copy it loaded when it started until it is restarted.
+    """
+    key = {}
+    for k, v in sources.items():
+        if not v:
+            continue
+        elif k == "projection":
+            key[k] = v
+        elif isinstance(v, str):
+            key[k] = _get_source_key(v)
+        elif isinstance(v, (list, tuple)):
+            key[k] = [_get_source_key(src) for src in v]
+        else:
+            key[k] = v
+
+    data = json.dumps(key, sort_keys=True, default=list)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def _get_source_key(src: str) -> Any:
+    path = converter.get_real_path(src)
+    paths = sorted(set(converter.iter_file_paths(glob.glob(path))))
+    if not paths:
+        return src
+
+    files = []
+    for p in paths:
+        st = os.stat(p)
+        files.append([p, st.st_size, st.st_mtime_ns])
+    return [os.path.abspath(path), files]
+
+
+class Client:
+    """
+    A client for a running server, which pages through lists as they are read.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        page_size: int = MAX_PAGE_SIZE,
+        timeout: float = DEFAULT_TIMEOUT,
+    ):
+        self.url = url
+        self.page_size = page_size
+        self.timeout = timeout
+
+    def health(self) -> dict:
+        return self._get_json("/health")
+
+    def iter_objects(
+        self,
+        object_ids: Optional[Iterable[str]] = None,
+        object_types: Optional[Iterable[str]] = None,
+        object_names: Optional[Iterable[str]] = None,
+        include_deprecated: bool = False,
+        include_revoked: bool = False,
+    ) -> Iterator[dict]:
+        params = {
+            "id": list(object_ids or []),
+            "type": list(object_types or []),
+            "name": list(object_names or []),
+            "include-deprecated": _format_bool(include_deprecated),
+            "include-revoked": _format_bool(include_revoked),
+        }
+        return self._iter_pages("/objects", params)
+
+    def get_object(self, object_id: str) -> Optional[dict]:
+        try:
+            return self._get_json("/objects/" + urllib.parse.quote(object_id))
+        except LookupError:
+            return None
+
+    def iter_triples(
+        self, node_label_type: str = converter.NODE_LABEL_TYPE_ID
+    ) -> Iterator[Triple]:
+        params = {"node-label-type": node_label_type}
+        return map(tuple, self._iter_pages("/triples", params))
+
+    def iter_neighbour_triples(
+        self,
+        object_ids: Iterable[str],
+        radius: int = 1,
+        labels: Optional[Iterable[str]] = None,
+        node_label_type: str = converter.NODE_LABEL_TYPE_ID,
+    ) -> Iterator[Triple]:
+        params = {
+            "id": list(object_ids),
+            "radius": str(radius),
+            "label": list(labels or []),
+            "node-label-type": node_label_type,
+        }
+        return map(tuple, self._iter_pages("/neighbours", params))
+
+    def get_dot(self, node_label_type: str = converter.NODE_LABEL_TYPE_ID) -> str:
+        params = {"node-label-type": node_label_type}
+        with self._request("/dot", params) as response:
+            return response.read().decode("utf-8")
+
+    def _iter_pages(self, path: str, params: Dict[str, Any]) -> Iterator[Any]:
+        offset = 0
+        while True:
+            page = dict(params, offset=str(offset), limit=str(self.page_size))
+            with self._request(path, page) as response:
+                for line in response:
+                    yield json.loads(line)
+                next_offset = response.getheader("X-Next-Offset")
+
+            if next_offset is None:
+                return
+            offset = int(next_offset)
+
+    def _get_json(self, path: str) -> Any:
+        with self._request(path) as response:
+            return json.load(response)
+
+    def _request(
+        self, path: str, params: Optional[Dict[str, Any]] = None
+    ) -> http.client.HTTPResponse:
+        if params:
+            path += "?" + urllib.parse.urlencode(params, doseq=True)
+
+        connection = self._connect()
+        connection.request("GET", path)
+        response = connection.getresponse()
+        if response.status != 200:
+            error = json.load(response).get("error")
+            connection.close()
+            if response.status == 404:
+                raise LookupError(error)
+            raise ValueError(error)
+        return response
+
+    def _connect(self) -> http.client.HTTPConnection:
+        scheme, _, path = self.url.partition(":")
+        if scheme == UNIX_SOCKET_SCHEME:
+            return UnixHTTPConnection(path, timeout=self.timeout)
+        url = urllib.parse.urlsplit(self.url)
+        return http.client.HTTPConnection(url.hostname, url.port, timeout=self.timeout)
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path: str, timeout: float = DEFAULT_TIMEOUT):
+        super().__init__("localhost", timeout=timeout)
+        self.path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.path)
+
+
+def get_client(
+    key: str, state_path: str = SERVER_STATE_PATH, timeout: float = 1
+) -> Optional[Client]:
+    """
+    Return a client for the running server if it has loaded the content identified by the key.
+    """
+    state = read_server_state(state_path)
+    if not state or state.get("key") != key:
+        return None
+
+    client = Client(state["url"], timeout=timeout)
+    try:
+        health = client.health()
+    except (OSError, ValueError, LookupError):
+        return None
+    if health.get("key") != key:
+        return None
+
+    client.timeout = DEFAULT_TIMEOUT
+    return client
+
+
+def _get_int(params: Dict[str, List[str]], k: str, default: int) -> int:
+    try:
+        return int(params[k][0]) if k in params else default
+    except ValueError:
+        raise ValueError(f"Invalid {k}: {params[k][0]}")
+
+
+def _get_bool(params: Dict[str, List[str]], k: str) -> bool:
+    return k in params and params[k][0].lower() in ("1", "true", "yes")
+
+
+def _format_bool(v: bool) -> str:
+    return "true" if v else "false"
+
+
+def _get_node_label_type(params: Dict[str, List[str]]) -> str:
+    node_label_type = params.get("node-label-type", [converter.NODE_LABEL_TYPE_ID])[0]
+    if node_label_type not in converter.NODE_LABEL_TYPES:
+        raise ValueError(f"Unsupported node label type: {node_label_type}")
+    return node_label_type
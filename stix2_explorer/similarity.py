@@ -0,0 +1,237 @@
+from dataclasses import dataclass
+import os
+import tempfile
+from typing import Dict, Iterable, List, Optional
+import zipfile
+
+import numpy as np
+import scipy.sparse as sp
+
+from stix2_explorer import converter
+from stix2_explorer.constants import (
+    ATTACK_PATTERN,
+    CACHE_DIR,
+    CAMPAIGN,
+    INTRUSION_SET,
+    MALWARE,
+    TOOL,
+    Triple,
+)
+
+USES = "uses"
+
+JACCARD = "jaccard"
+COSINE = "cosine"
+
+METRICS = [JACCARD, COSINE]
+
+# Compare the entities which use techniques (e.g. groups to groups) or the techniques they use (i.e. techniques to techniques).
+ENTITIES = "entities"
+TECHNIQUES = "techniques"
+
+AXES = [ENTITIES, TECHNIQUES]
+
+DEFAULT_ENTITY_TYPES = (INTRUSION_SET, MALWARE, TOOL, CAMPAIGN)
+DEFAULT_TECHNIQUE_TYPES = (ATTACK_PATTERN,)
+
+
+@dataclass()
+class IncidenceMatrix:
+    """
+    A sparse binary matrix with a row per entity (e.g. intrusion set) and a column per technique it uses.
+    """
+
+    row_ids: List[str]
+    column_ids: List[str]
+    matrix: sp.csr_matrix
+
+    def transpose(self) -> "IncidenceMatrix":
+        return IncidenceMatrix(
+            row_ids=self.column_ids,
+            column_ids=self.row_ids,
+            matrix=self.matrix.T.tocsr(),
+        )
+
+
+@dataclass()
+class SimilarityMatrix:
+    ids: List[str]
+    matrix: sp.csr_matrix
+
+    def save(self, path: str):
+        path = converter.get_real_path(path)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+
+        # Write to a temporary file and rename it into place, so that a crash can't leave a partial matrix behind.
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                np.savez_compressed(
+                    file,
+                    ids=np.array(self.ids, dtype=str),
+                    data=self.matrix.data,
+                    indices=self.matrix.indices,
+                    indptr=self.matrix.indptr,
+                    shape=np.array(self.matrix.shape),
+                )
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, path: str) -> "SimilarityMatrix":
+        with np.load(converter.get_real_path(path), allow_pickle=False) as data:
+            matrix = sp.csr_matrix(
+                (data["data"], data["indices"], data["indptr"]),
+                shape=tuple(data["shape"]),
+            )
+            return cls(ids=data["ids"].tolist(), matrix=matrix)
+
+
+@dataclass()
+class Neighbour:
+    id: str
+    score: float
+
+
+def get_incidence_matrix(
+    triples: Iterable[Triple],
+    entity_types: Iterable[str] = DEFAULT_ENTITY_TYPES,
+    technique_types: Iterable[str] = DEFAULT_TECHNIQUE_TYPES,
+    predicate: str = USES,
+) -> IncidenceMatrix:
+    entity_types = set(entity_types)
+    technique_types = set(technique_types)
+
+    row_ids = {}
+    column_ids = {}
+    rows = []
+    columns = []
+    for s, p, o in triples:
+        if p != predicate:
+            continue
+        if converter.get_stix2_type_from_id(s) not in entity_types:
+            continue
+        if converter.get_stix2_type_from_id(o) not in technique_types:
+            continue
+        rows.append(row_ids.setdefault(s, len(row_ids)))
+        columns.append(column_ids.setdefault(o, len(column_ids)))
+
+    matrix = sp.csr_matrix(
+        (np.ones(len(rows), dtype=np.float32), (rows, columns)),
+        shape=(len(row_ids), len(column_ids)),
+    )
+    # Repeated edges are summed when the matrix is built, so clamp them back to 1.
+    matrix.data[:] = 1
+    return IncidenceMatrix(
+        row_ids=list(row_ids), column_ids=list(column_ids), matrix=matrix
+    )
+
+
+def get_similarity_matrix(
+    m: IncidenceMatrix, metric: str = JACCARD
+) -> SimilarityMatrix:
+    """
+    Compute the pairwise similarity of every row of an incidence matrix at once.
+    """
+    x = m.matrix
+    if metric == JACCARD:
+        intersection = (x @ x.T).tocsr()
+        sizes = np.asarray(x.sum(axis=1)).ravel()
+        rows = np.repeat(np.arange(intersection.shape[0]), np.diff(intersection.indptr))
+        union = sizes[rows] + sizes[intersection.indices] - intersection.data
+        intersection.data = intersection.data / union
+        s = intersection
+    elif metric == COSINE:
+        norms = np.sqrt(np.asarray(x.multiply(x).sum(axis=1)).ravel())
+        norms[norms == 0] = 1
+        y = sp.diags(1 / norms) @ x
+        s = (y @ y.T).tocsr()
+    else:
+        raise ValueError(f"Unsupported similarity metric: {metric}")
+
+    s.setdiag(0)
+    s.eliminate_zeros()
+    return SimilarityMatrix(ids=m.row_ids, matrix=s.astype(np.float32))
+
+
+def get_top_k_neighbours(
+    s: SimilarityMatrix,
+    k: int = 10,
+    object_ids: Optional[Iterable[str]] = None,
+    neighbour_types: Optional[Iterable[str]] = None,
+) -> Dict[str, List[Neighbour]]:
+    """
+    Return the k most similar objects to each object (or to each of the given objects).
+    """
+    positions = {v: i for i, v in enumerate(s.ids)}
+    if object_ids is None:
+        object_ids = s.ids
+
+    allowed = None
+    if neighbour_types:
+        neighbour_types = set(neighbour_types)
+        allowed = np.array(
+            [converter.get_stix2_type_from_id(v) in neighbour_types for v in s.ids],
+            dtype=bool,
+        )
+
+    m = s.matrix
+    result = {}
+    for object_id in object_ids:
+        i = positions.get(object_id)
+        if i is None:
+            result[object_id] = []
+            continue
+
+        start, end = m.indptr[i], m.indptr[i + 1]
+        indices = m.indices[start:end]
+        scores = m.data[start:end]
+        if allowed is not None:
+            mask = allowed[indices]
+            indices = indices[mask]
+            scores = scores[mask]
+
+        # Ties are broken by position (a partial sort would pick arbitrarily among ties at the k-th place).
+        order = np.lexsort((indices, -scores))[:k]
+        result[object_id] = [
+            Neighbour(id=s.ids[j], score=float(score))
+            for j, score in zip(indices[order], scores[order])
+        ]
+    return result
+
+
+def get_cached_similarity_matrix(
+    rows: Iterable[dict],
+    metric: str = JACCARD,
+    axis: str = ENTITIES,
+    cache_dir: Optional[str] = CACHE_DIR,
+) -> SimilarityMatrix:
+    """
+    Return the similarity matrix for a corpus, re-using the copy saved to the cache directory if the corpus has not changed.
+    """
+    if axis not in AXES:
+        raise ValueError(f"Unsupported axis: {axis}")
+
+    rows = list(rows)
+    path = None
+    if cache_dir:
+        fingerprint = converter.get_corpus_fingerprint(rows)
+        path = os.path.join(cache_dir, f"similarity-{fingerprint}-{axis}-{metric}.npz")
+        if os.path.exists(converter.get_real_path(path)):
+            try:
+                return SimilarityMatrix.load(path)
+            except (OSError, ValueError, EOFError, KeyError, zipfile.BadZipFile):
+                # The cached copy is truncated or corrupt, so it is rebuilt and overwritten.
+                pass
+
+    m = get_incidence_matrix(converter.convert_stix2_objects_to_triples(rows))
+    if axis == TECHNIQUES:
+        m = m.transpose()
+
+    s = get_similarity_matrix(m, metric=metric)
+    if path:
+        s.save(path)
+    return s
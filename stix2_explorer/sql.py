@@ -0,0 +1,119 @@
+from typing import Any, Iterable, Iterator, List, Optional, Tuple
+
+import duckdb
+
+from stix2_explorer import columnar
+from stix2_explorer.columnar import Tables
+from stix2_explorer.converter import Decoder
+
+MAPPINGS = "mappings"
+
+# One row per edge with the ID, external ID, name, and type of each endpoint (i.e. the same layout as data/*/mappings.csv).
+MAPPINGS_VIEW = """
+CREATE OR REPLACE VIEW mappings AS (
+    SELECT
+        t.subject AS source_object_id,
+        s.external_id AS source_object_external_id,
+        s.name AS source_object_name,
+        t.subject_type AS source_object_type,
+        t.predicate AS relationship,
+        t.object AS target_object_id,
+        o.external_id AS target_object_external_id,
+        o.name AS target_object_name,
+        t.object_type AS target_object_type,
+    FROM triples t
+    LEFT JOIN objects s ON t.subject = s.id
+    LEFT JOIN objects o ON t.object = o.id
+)
+"""
+
+MAPPING_STATS = """
+SELECT
+    source_object_type,
+    relationship,
+    target_object_type,
+    COUNT(*) AS total
+FROM mappings
+GROUP BY ALL
+ORDER BY total DESC
+"""
+
+CONTROLS_TO_TECHNIQUES = """
+WITH controls AS (
+    SELECT DISTINCT object_id AS id
+    FROM external_references
+    WHERE source_name IN ('NIST 800-53 Revision 4', 'NIST 800-53 Revision 5')
+),
+techniques_to_tactics AS (
+    -- Techniques which belong to more than one tactic have them joined into one row, so that there is one row per control and technique.
+    SELECT
+        source_object_id AS technique_id,
+        string_agg(target_object_external_id, '; ' ORDER BY target_object_external_id) AS tactic_id,
+        string_agg(target_object_name, '; ' ORDER BY target_object_external_id) AS tactic_name,
+    FROM mappings
+    WHERE source_object_type = 'attack-pattern' AND target_object_type = 'x-mitre-tactic'
+    GROUP BY source_object_id
+)
+SELECT
+    m.source_object_external_id AS control_id,
+    m.source_object_name AS control_name,
+    m.relationship,
+    m.target_object_external_id AS technique_id,
+    m.target_object_name AS technique_name,
+    t.tactic_id,
+    t.tactic_name,
+FROM mappings m
+JOIN controls c ON m.source_object_id = c.id
+LEFT JOIN techniques_to_tactics t ON m.target_object_id = t.technique_id
+WHERE m.target_object_type = 'attack-pattern'
+ORDER BY control_id, technique_id, tactic_id
+"""
+
+NAMED_QUERIES = {
+    "mapping-stats": MAPPING_STATS,
+    "controls-to-techniques": CONTROLS_TO_TECHNIQUES,
+}
+
+
+def get_duckdb_connection(
+    tables: Tables, connection: Optional[duckdb.DuckDBPyConnection] = None
+) -> duckdb.DuckDBPyConnection:
+    """
+    Register the objects, external_references, and triples tables (and the mappings view) with an in-process DuckDB connection.
+
+    The Arrow tables are registered as-is, so DuckDB scans them without copying.
+    """
+    con = connection or duckdb.connect()
+    for name, table in tables.items():
+        con.register(name, table)
+    con.execute(MAPPINGS_VIEW)
+    return con
+
+
+def get_duckdb_connection_from_stix2_objects(
+    rows: Iterable[dict],
+    decoders: Optional[Iterable[Decoder]] = None,
+    connection: Optional[duckdb.DuckDBPyConnection] = None,
+) -> duckdb.DuckDBPyConnection:
+    tables = columnar.convert_stix2_objects_to_tables(rows, decoders=decoders)
+    return get_duckdb_connection(tables, connection=connection)
+
+
+def execute(
+    con: duckdb.DuckDBPyConnection, query: str, batch_size: int = 10000
+) -> Tuple[List[str], Iterator[Tuple[Any, ...]]]:
+    """
+    Run a query (or named query) and return its column names and a stream of result rows.
+    """
+    query = NAMED_QUERIES.get(query, query)
+    cursor = con.execute(query)
+    columns = [d[0] for d in cursor.description]
+
+    def iter_rows() -> Iterator[Tuple[Any, ...]]:
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            yield from rows
+
+    return columns, iter_rows()
@@ -0,0 +1,321 @@
+import itertools
+import json
+import logging
+import os
+import sqlite3
+from typing import Any, Iterable, Iterator, List, Mapping, Optional, Tuple
+import urllib.parse
+
+from stix2.datastore import DataSource
+from stix2.datastore.filters import FilterSet, apply_common_filters
+
+from stix2_explorer import converter
+
+logger = logging.getLogger(__name__)
+
+SQLITE_FILE_EXTENSIONS = (".sqlite", ".sqlite3", ".db")
+
+# SQLite builds before 3.32 allow at most 999 parameters per statement, so longer lists of values are split across queries.
+MAX_VARIABLES = 999
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS objects (
+    id TEXT NOT NULL,
+    type TEXT NOT NULL,
+    modified TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (id, modified)
+);
+CREATE INDEX IF NOT EXISTS objects_type ON objects (type);
+CREATE INDEX IF NOT EXISTS objects_modified ON objects (modified);
+
+CREATE TABLE IF NOT EXISTS names (
+    object_rowid INTEGER NOT NULL,
+    name TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS names_name ON names (name);
+
+CREATE TABLE IF NOT EXISTS external_ids (
+    object_rowid INTEGER NOT NULL,
+    source_name TEXT,
+    external_id TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS external_ids_external_id ON external_ids (external_id);
+
+CREATE TABLE IF NOT EXISTS relationships (
+    object_rowid INTEGER NOT NULL,
+    relationship_type TEXT NOT NULL,
+    source_ref TEXT NOT NULL,
+    target_ref TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS relationships_source_ref ON relationships (source_ref, relationship_type);
+CREATE INDEX IF NOT EXISTS relationships_target_ref ON relationships (target_ref, relationship_type);
+"""
+
+# Filters which can be answered by an index (the rest are applied to the results).
+_INDEXED_PROPERTIES = {
+    "id": "o.id",
+    "type": "o.type",
+    "relationship_type": "r.relationship_type",
+    "source_ref": "r.source_ref",
+    "target_ref": "r.target_ref",
+}
+
+
+def is_sqlite_path(path: str) -> bool:
+    return path.lower().endswith(SQLITE_FILE_EXTENSIONS)
+
+
+class SQLiteSource(DataSource):
+    """
+    A STIX 2 data source (and sink) backed by a local SQLite file.
+
+    Objects are stored as JSON alongside indexes on ID, type, modified, names and aliases, external IDs, and relationship endpoints. Objects are returned as dicts and are only loaded into memory when they are read.
+    """
+
+    def __init__(self, path: str, batch_size: int = 1000, create: bool = False):
+        """
+        Open an existing file read-only, or (if create is set) open it for writing, creating the file and schema if needed.
+        """
+        super().__init__()
+        self.path = converter.get_real_path(path)
+        self.batch_size = batch_size
+        if create:
+            self.connection = sqlite3.connect(self.path, check_same_thread=False)
+            self.connection.executescript(SCHEMA)
+        else:
+            # Reading must not leave an empty database behind (e.g. for a mistyped path).
+            if not os.path.isfile(self.path):
+                raise ValueError(f"SQLite file not found: {path}")
+            uri = f"file:{urllib.parse.quote(self.path)}?mode=ro"
+            self.connection = sqlite3.connect(uri, uri=True, check_same_thread=False)
+
+    def close(self):
+        self.connection.close()
+
+    def add(self, stix_data: Any) -> int:
+        """
+        Add STIX objects (or bundles) to the store and return the number of new objects.
+        """
+        total = 0
+        with self.connection:
+            for o in _iter_stix2_objects(stix_data):
+                if self._add_object(converter.convert_stix2_object_to_dict(o)):
+                    total += 1
+        return total
+
+    def _add_object(self, o: dict) -> bool:
+        cursor = self.connection.execute(
+            "INSERT OR IGNORE INTO objects (id, type, modified, data) VALUES (?, ?, ?, ?)",
+            (o["id"], o["type"], o.get("modified") or "", json.dumps(o)),
+        )
+        if not cursor.rowcount:
+            return False
+
+        rowid = cursor.lastrowid
+        names = {name.lower() for name in converter.Decoder().iter_names(o)}
+        self.connection.executemany(
+            "INSERT INTO names (object_rowid, name) VALUES (?, ?)",
+            [(rowid, name) for name in names],
+        )
+        self.connection.executemany(
+            "INSERT INTO external_ids (object_rowid, source_name, external_id) VALUES (?, ?, ?)",
+            [
+                (rowid, ref.get("source_name"), ref["external_id"])
+                for ref in o.get("external_references") or []
+                if ref.get("external_id")
+            ],
+        )
+        if o["type"] == "relationship":
+            self.connection.execute(
+                "INSERT INTO relationships (object_rowid, relationship_type, source_ref, target_ref) VALUES (?, ?, ?, ?)",
+                (rowid, o["relationship_type"], o["source_ref"], o["target_ref"]),
+            )
+        return True
+
+    def get(self, stix_id: str, _composite_filters: Optional[FilterSet] = None):
+        for o in reversed(self.all_versions(stix_id, _composite_filters)):
+            return o
+
+    def all_versions(
+        self, stix_id: str, _composite_filters: Optional[FilterSet] = None
+    ) -> List[dict]:
+        # Timestamps of different precisions don't sort correctly as text, so versions are ordered once they are parsed.
+        rows = sorted(
+            self._select("o.id = ?", [stix_id]), key=converter.get_modified_timestamp
+        )
+        return list(apply_common_filters(rows, self._get_filters(_composite_filters)))
+
+    def query(
+        self, query: Optional[Iterable] = None, _composite_filters=None
+    ) -> List[dict]:
+        filters = self._get_filters(_composite_filters, query)
+
+        clauses = []
+        params = []
+        in_clauses = []
+        join_relationships = False
+        for f in filters:
+            column = _INDEXED_PROPERTIES.get(f.property)
+            if not column:
+                continue
+
+            values = f.value if isinstance(f.value, (list, tuple)) else [f.value]
+            if f.op == "=" or f.op == "in":
+                in_clauses.append((f"{column} IN ({{}})", values))
+            elif f.op == "!=" and len(params) + len(values) <= MAX_VARIABLES // 2:
+                clauses.append(f"{column} NOT IN ({', '.join('?' * len(values))})")
+                params.extend(values)
+            else:
+                # Everything else (e.g. long exclusion lists) is only applied by apply_common_filters.
+                continue
+            join_relationships |= column.startswith("r.")
+
+        rows = self._select_in(
+            clauses, params, in_clauses, join_relationships=join_relationships
+        )
+        return list(apply_common_filters(rows, filters))
+
+    def iter_objects(
+        self,
+        object_ids: Optional[Iterable[str]] = None,
+        object_types: Optional[Iterable[str]] = None,
+        object_names: Optional[Iterable[str]] = None,
+        external_ids: Optional[Iterable[str]] = None,
+    ) -> Iterator[dict]:
+        """
+        Stream objects matching the given IDs, types, names/aliases (glob patterns), and external IDs using the indexes.
+
+        Names are matched in the same way as converter.filter_stix2_objects (i.e. case-insensitive fnmatch patterns).
+        """
+        clauses = []
+        params = []
+        in_clauses = []
+        if object_ids:
+            in_clauses.append(("o.id IN ({})", object_ids))
+
+        if object_types:
+            in_clauses.append(("o.type IN ({})", object_types))
+
+        if object_names:
+            object_names = list(object_names)
+            patterns = [p.lower() for p in object_names]
+
+            # GLOB only treats * and ? in the same way as fnmatch, so patterns with character classes are only matched below.
+            if len(patterns) <= MAX_VARIABLES // 2 and not any(
+                "[" in p for p in patterns
+            ):
+                clauses.append(
+                    "o.rowid IN (SELECT object_rowid FROM names WHERE "
+                    + " OR ".join("name GLOB ?" for _ in patterns)
+                    + ")"
+                )
+                params.extend(patterns)
+
+        if external_ids:
+            in_clauses.append(
+                (
+                    "o.rowid IN (SELECT object_rowid FROM external_ids WHERE external_id IN ({}))",
+                    external_ids,
+                )
+            )
+
+        rows = self._select_in(clauses, params, in_clauses)
+        if object_names:
+            decoder = converter.Decoder()
+            rows = (
+                o
+                for o in rows
+                if converter.any_string_matches_any_pattern(
+                    decoder.iter_names(o), object_names
+                )
+            )
+        yield from rows
+
+    def _get_filters(
+        self,
+        _composite_filters: Optional[FilterSet] = None,
+        query: Optional[Iterable] = None,
+    ) -> FilterSet:
+        filters = FilterSet(query)
+        if self.filters:
+            filters.add(self.filters)
+        if _composite_filters:
+            filters.add(_composite_filters)
+        return filters
+
+    def _select_in(
+        self,
+        clauses: List[str],
+        params: List[Any],
+        in_clauses: List[Tuple[str, Iterable[Any]]],
+        join_relationships: bool = False,
+    ) -> Iterator[dict]:
+        """
+        Select the objects which match every clause, where each IN clause is a template (e.g. "o.id IN ({})") and a list of values.
+
+        Long lists of values are split into chunks and each combination of chunks is queried separately, so that no query has more than MAX_VARIABLES parameters (and no object is returned twice). The other clauses must use at most half of the parameters.
+        """
+        in_clauses = [(t, list(dict.fromkeys(values))) for (t, values) in in_clauses]
+        chunk_size = max(1, (MAX_VARIABLES - len(params)) // max(1, len(in_clauses)))
+        chunks = [
+            [values[i : i + chunk_size] for i in range(0, len(values), chunk_size)]
+            for (_, values) in in_clauses
+        ]
+        for combination in itertools.product(*chunks):
+            where = list(clauses)
+            where_params = list(params)
+            for (template, _), values in zip(in_clauses, combination):
+                where.append(template.format(", ".join("?" * len(values))))
+                where_params.extend(values)
+
+            yield from self._select(
+                " AND ".join(where) or None,
+                where_params,
+                join_relationships=join_relationships,
+            )
+
+    def _select(
+        self,
+        where: Optional[str] = None,
+        params: Iterable[Any] = (),
+        join_relationships: bool = False,
+    ) -> Iterator[dict]:
+        q = "SELECT o.data FROM objects o"
+        if join_relationships:
+            q += " JOIN relationships r ON r.object_rowid = o.rowid"
+        if where:
+            q += f" WHERE {where}"
+
+        cursor = self.connection.execute(q, list(params))
+        while True:
+            rows = cursor.fetchmany(self.batch_size)
+            if not rows:
+                return
+            for (data,) in rows:
+                yield json.loads(data)
+
+
+def _iter_stix2_objects(stix_data: Any) -> Iterator[Any]:
+    if isinstance(stix_data, Mapping):
+        if stix_data.get("type") == "bundle":
+            yield from stix_data.get("objects", [])
+        else:
+            yield stix_data
+    else:
+        for o in stix_data:
+            yield from _iter_stix2_objects(o)
+
+
+def create_sqlite_source(
+    path: str,
+    data_sources: Any,
+) -> SQLiteSource:
+    """
+    Copy the objects from one or more data sources into a SQLite file.
+    """
+    src = converter.get_stix2_data_source(data_sources)
+    store = SQLiteSource(path, create=True)
+    total = store.add(src.query())
+    logger.info("Added %d objects to %s", total, store.path)
+    return store
@@ -0,0 +1,165 @@
+import concurrent.futures
+import json
+import os
+import tempfile
+import threading
+import urllib.parse
+from typing import Dict, Iterable, Iterator, Optional, Tuple, Union
+
+from stix2.datastore import DataSource
+from taxii2client.common import _HTTPConnection
+from taxii2client.v21 import Collection
+
+from stix2_explorer import converter
+from stix2_explorer.constants import CACHE_DIR
+
+TAXII_URL_PREFIX = "taxii+"
+
+DEFAULT_PAGE_SIZE = 1000
+DEFAULT_STATE_PATH = os.path.join(CACHE_DIR, "taxii-state.json")
+
+DATE_ADDED_LAST_HEADER = "X-TAXII-Date-Added-Last"
+
+
+def is_taxii_url(src: str) -> bool:
+    return src.startswith((f"{TAXII_URL_PREFIX}http://", f"{TAXII_URL_PREFIX}https://"))
+
+
+class TAXIICollectionSource:
+    """
+    Streams objects from a TAXII 2.1 collection (e.g. taxii+https://example.com/api1/collections/<id>/).
+
+    Each page is requested while the previous page is being consumed. When polling incrementally, the date the last object was added to the collection is saved to a state file once all pages have been read, and only objects added after it are requested the next time.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        user: Optional[str] = None,
+        password: Optional[str] = None,
+        verify: bool = True,
+        per_request: int = DEFAULT_PAGE_SIZE,
+        state_path: Optional[str] = DEFAULT_STATE_PATH,
+    ):
+        if url.startswith(TAXII_URL_PREFIX):
+            url = url[len(TAXII_URL_PREFIX) :]
+        self.url = url
+        self.per_request = per_request
+        self.state_path = state_path
+
+        connection = _HTTPConnection(
+            user=user, password=password, verify=verify, version="2.1"
+        )
+        connection.session.hooks["response"].append(self._on_response)
+        self.collection = Collection(url, conn=connection)
+        self._date_added_last = threading.local()
+
+    def iter_objects(
+        self,
+        added_after: Optional[str] = None,
+        incremental: bool = False,
+        **filters,
+    ) -> Iterator[dict]:
+        """
+        Stream the objects in the collection (or, if incremental, only the objects added since the last poll).
+
+        Filters (e.g. type="attack-pattern") are passed to the server as match[] query parameters.
+        """
+        # Polls with different filters are tracked separately.
+        k = self._get_state_key(filters)
+        if incremental and added_after is None:
+            added_after = self._read_state().get(k)
+        if added_after:
+            filters["added_after"] = added_after
+
+        high_water_mark = added_after
+        for envelope, date_added_last in self._iter_envelopes(filters):
+            objects = envelope.get("objects", [])
+            if date_added_last:
+                high_water_mark = max(high_water_mark or "", date_added_last)
+            yield from objects
+
+        if incremental and high_water_mark:
+            self._write_state(k, high_water_mark)
+
+    def _get_state_key(self, filters: dict) -> str:
+        params = sorted(
+            (k, ",".join(sorted(v)) if isinstance(v, (list, tuple, set)) else str(v))
+            for k, v in filters.items()
+            if v and k != "added_after"
+        )
+        return f"{self.url}?{urllib.parse.urlencode(params)}" if params else self.url
+
+    def _write_state(self, k: str, added_after: str):
+        if not self.state_path:
+            return
+
+        state = self._read_state()
+        state[k] = added_after
+        path = converter.get_real_path(self.state_path)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+
+        # Write to a temporary file and rename it into place, so that a crash can't leave a partial state file behind.
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as file:
+                json.dump(state, file, indent=4)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    def _read_state(self) -> Dict[str, str]:
+        if not self.state_path:
+            return {}
+
+        path = converter.get_real_path(self.state_path)
+        if not os.path.exists(path):
+            return {}
+
+        try:
+            with open(path, "rb") as file:
+                return json.load(file)
+        except ValueError:
+            # Without a readable high-water mark, every object is requested again.
+            return {}
+
+    def _iter_envelopes(self, filters: dict) -> Iterator[Tuple[dict, Optional[str]]]:
+        # Pages are requested one at a time (each request needs the previous page's "next" token), so request the next page while the caller consumes the current one.
+        with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+            future = executor.submit(self._get_page, None, filters)
+            while future is not None:
+                envelope, date_added_last = future.result()
+                future = None
+                if envelope.get("more") and envelope.get("next"):
+                    future = executor.submit(self._get_page, envelope["next"], filters)
+                yield envelope, date_added_last
+
+    def _get_page(
+        self, next: Optional[str], filters: dict
+    ) -> Tuple[dict, Optional[str]]:
+        kwargs = dict(filters)
+        if next:
+            kwargs["next"] = next
+
+        self._date_added_last.value = None
+        envelope = self.collection.get_objects(limit=self.per_request, **kwargs)
+        return envelope, self._date_added_last.value
+
+    def _on_response(self, response, *args, **kwargs):
+        date_added_last = response.headers.get(DATE_ADDED_LAST_HEADER)
+        if date_added_last:
+            self._date_added_last.value = date_added_last
+
+
+def iter_stix2_taxii_objects(src: str) -> Iterator[dict]:
+    yield from TAXIICollectionSource(src, state_path=None).iter_objects()
+
+
+def get_stix2_data_source(
+    src: str, projection: Optional[Union[str, Iterable[str]]] = None
+) -> DataSource:
+    return converter.create_stix2_memory_source(
+        list(iter_stix2_taxii_objects(src)), projection=projection
+    )
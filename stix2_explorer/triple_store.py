@@ -0,0 +1,269 @@
+import collections
+import itertools
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from stix2_explorer import converter
+from stix2_explorer.constants import Triple
+from stix2_explorer.converter import Decoder
+
+WILDCARD = "*"
+VARIABLE_PREFIX = "?"
+
+Pattern = Tuple[str, str, str]
+Bindings = Dict[str, str]
+
+
+class SymbolTable:
+    """
+    Interns strings (e.g. STIX IDs and predicates) as small integers.
+    """
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.symbols: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def intern(self, symbol: str) -> int:
+        i = self.ids.get(symbol)
+        if i is None:
+            i = self.ids[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+        return i
+
+    def get_id(self, symbol: str) -> Optional[int]:
+        return self.ids.get(symbol)
+
+    def get_symbol(self, i: int) -> str:
+        return self.symbols[i]
+
+
+class TripleStore:
+    """
+    An in-memory triple store with SPO, POS, and OSP permutation indexes over interned IDs.
+
+    Patterns are (subject, predicate, object) tuples where each term is a constant, a variable (e.g. ?group), or a wildcard (*).
+    """
+
+    def __init__(self, symbols: Optional[SymbolTable] = None):
+        self.symbols = symbols or SymbolTable()
+        self.spo: Dict[int, Dict[int, Set[int]]] = collections.defaultdict(
+            lambda: collections.defaultdict(set)
+        )
+        self.pos: Dict[int, Dict[int, Set[int]]] = collections.defaultdict(
+            lambda: collections.defaultdict(set)
+        )
+        self.osp: Dict[int, Dict[int, Set[int]]] = collections.defaultdict(
+            lambda: collections.defaultdict(set)
+        )
+        self.total = 0
+
+    def __len__(self) -> int:
+        return self.total
+
+    def add(self, s: str, p: str, o: str) -> bool:
+        s, p, o = map(self.symbols.intern, (s, p, o))
+        objects = self.spo[s][p]
+        if o in objects:
+            return False
+
+        objects.add(o)
+        self.pos[p][o].add(s)
+        self.osp[o][s].add(p)
+        self.total += 1
+        return True
+
+    def add_triples(self, triples: Iterable[Triple]):
+        for s, p, o in triples:
+            self.add(s, p, o)
+
+    def match(
+        self,
+        s: Optional[str] = None,
+        p: Optional[str] = None,
+        o: Optional[str] = None,
+    ) -> Iterator[Triple]:
+        """
+        Return all triples matching a pattern where None matches any term.
+        """
+        get_symbol = self.symbols.get_symbol
+        for s, p, o in self._match_ids(*map(self._get_id, (s, p, o))):
+            yield get_symbol(s), get_symbol(p), get_symbol(o)
+
+    def count(
+        self,
+        s: Optional[str] = None,
+        p: Optional[str] = None,
+        o: Optional[str] = None,
+    ) -> int:
+        """
+        Return the number of triples matching a pattern where None matches any term.
+        """
+        return self._count_ids(*map(self._get_id, (s, p, o)))
+
+    def query(
+        self,
+        patterns: Iterable[Pattern],
+        aliases: Optional[Dict[str, List[str]]] = None,
+    ) -> Iterator[Bindings]:
+        """
+        Join one or more triple patterns and return the variable bindings for each solution.
+
+        Patterns are evaluated in order of selectivity (i.e. the pattern with the fewest matches given the variables bound so far goes first). Terms which are aliases (e.g. external IDs) match any of the terms they stand for.
+        """
+        patterns = [tuple(map(_parse_term, pattern)) for pattern in patterns]
+        for expanded in _expand_aliases(patterns, aliases or {}):
+            for bindings in self._join(expanded, {}):
+                yield {k: self.symbols.get_symbol(v) for k, v in bindings.items()}
+
+    def _join(
+        self, patterns: List[tuple], bindings: Dict[str, int]
+    ) -> Iterator[Dict[str, int]]:
+        if not patterns:
+            yield bindings
+            return
+
+        i = min(
+            range(len(patterns)),
+            key=lambda i: self._count_ids(*self._bind(patterns[i], bindings)),
+        )
+        pattern = patterns[i]
+        remaining = patterns[:i] + patterns[i + 1 :]
+
+        for triple in self._match_ids(*self._bind(pattern, bindings)):
+            solution = dict(bindings)
+            for (kind, value), term in zip(pattern, triple):
+                if kind != VARIABLE_PREFIX:
+                    continue
+                if solution.setdefault(value, term) != term:
+                    break
+            else:
+                yield from self._join(remaining, solution)
+
+    def _bind(
+        self, pattern: tuple, bindings: Dict[str, int]
+    ) -> Tuple[Optional[int], ...]:
+        ids = []
+        for kind, value in pattern:
+            if kind == VARIABLE_PREFIX:
+                ids.append(bindings.get(value))
+            elif kind == WILDCARD:
+                ids.append(None)
+            else:
+                i = self.symbols.get_id(value)
+                ids.append(-1 if i is None else i)
+        return tuple(ids)
+
+    def _get_id(self, term: Optional[str]) -> Optional[int]:
+        if term is None:
+            return None
+        i = self.symbols.get_id(term)
+        return -1 if i is None else i
+
+    def _match_ids(
+        self, s: Optional[int], p: Optional[int], o: Optional[int]
+    ) -> Iterator[Tuple[int, int, int]]:
+        if s is not None:
+            if p is not None:
+                objects = self.spo.get(s, {}).get(p, ())
+                if o is not None:
+                    if o in objects:
+                        yield s, p, o
+                else:
+                    for o in objects:
+                        yield s, p, o
+            elif o is not None:
+                for p in self.osp.get(o, {}).get(s, ()):
+                    yield s, p, o
+            else:
+                for p, objects in self.spo.get(s, {}).items():
+                    for o in objects:
+                        yield s, p, o
+        elif p is not None:
+            if o is not None:
+                for s in self.pos.get(p, {}).get(o, ()):
+                    yield s, p, o
+            else:
+                for o, subjects in self.pos.get(p, {}).items():
+                    for s in subjects:
+                        yield s, p, o
+        elif o is not None:
+            for s, predicates in self.osp.get(o, {}).items():
+                for p in predicates:
+                    yield s, p, o
+        else:
+            for s, m in self.spo.items():
+                for p, objects in m.items():
+                    for o in objects:
+                        yield s, p, o
+
+    def _count_ids(self, s: Optional[int], p: Optional[int], o: Optional[int]) -> int:
+        if s is not None:
+            if p is not None:
+                objects = self.spo.get(s, {}).get(p, ())
+                if o is not None:
+                    return int(o in objects)
+                return len(objects)
+            elif o is not None:
+                return len(self.osp.get(o, {}).get(s, ()))
+            return sum(map(len, self.spo.get(s, {}).values()))
+        elif p is not None:
+            if o is not None:
+                return len(self.pos.get(p, {}).get(o, ()))
+            return sum(map(len, self.pos.get(p, {}).values()))
+        elif o is not None:
+            return sum(map(len, self.osp.get(o, {}).values()))
+        return self.total
+
+
+def _parse_term(term: Optional[str]) -> Tuple[str, Optional[str]]:
+    if term is None or term == WILDCARD:
+        return WILDCARD, None
+    elif term.startswith(VARIABLE_PREFIX):
+        return VARIABLE_PREFIX, term[1:]
+    return "", term
+
+
+def _expand_aliases(
+    patterns: List[tuple], aliases: Dict[str, List[str]]
+) -> Iterator[List[tuple]]:
+    """
+    Return every combination of the terms which the aliases in the patterns stand for.
+    """
+    terms = []
+    for pattern in patterns:
+        for kind, value in pattern:
+            if kind == "" and value in aliases:
+                terms.append([(kind, v) for v in aliases[value]])
+            else:
+                terms.append([(kind, value)])
+
+    for combination in itertools.product(*terms):
+        yield [tuple(combination[i : i + 3]) for i in range(0, len(combination), 3)]
+
+
+def parse_patterns(query: str) -> List[Pattern]:
+    """
+    Parse a query of the form "?g uses ?t . ?t related-to x-mitre-tactic--..." into a list of triple patterns.
+    """
+    patterns = []
+    for clause in query.split(" . "):
+        terms = clause.split()
+        if not terms:
+            continue
+        if len(terms) != 3:
+            raise ValueError(f"Invalid triple pattern: {clause}")
+        patterns.append(tuple(terms))
+    return patterns
+
+
+def convert_stix2_objects_to_triple_store(
+    rows: Iterable[dict],
+    decoders: Optional[Iterable[Decoder]] = None,
+) -> TripleStore:
+    store = TripleStore()
+    store.add_triples(
+        converter.convert_stix2_objects_to_triples(rows, decoders=decoders)
+    )
+    return store
@@ -0,0 +1,189 @@
+from dataclasses import dataclass, field
+import gzip
+import json
+import os
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import networkx as nx
+
+from stix2_explorer import converter
+from stix2_explorer.converter import Decoder
+from stix2_explorer.writers import GZIP, write_json, write_jsonl
+
+OBJECTS_FILENAME = "objects.jsonl.gz"
+VERSIONS_FILENAME = "versions.json"
+
+
+@dataclass()
+class Version:
+    """
+    The changes between a version and the version before it (i.e. the objects which were added or changed, keyed by ID, and the IDs of the objects which were removed).
+    """
+
+    name: str
+    upserts: Dict[str, str] = field(default_factory=dict)
+    deletes: List[str] = field(default_factory=list)
+
+
+class VersionedStore:
+    """
+    Stores many versions of a STIX 2 corpus (e.g. every release of MITRE ATT&CK Enterprise) as a base snapshot plus per-version deltas.
+
+    Objects are stored once per distinct content hash and are shared between all of the versions which contain them.
+    """
+
+    def __init__(self):
+        self.objects: Dict[str, dict] = {}
+        self.versions: List[Version] = []
+        self._head: Dict[str, str] = {}
+
+    def __len__(self) -> int:
+        return len(self.versions)
+
+    @property
+    def names(self) -> List[str]:
+        return [v.name for v in self.versions]
+
+    def add_version(self, name: str, rows: Iterable[Any]) -> Version:
+        """
+        Add a version after the latest version, storing only the objects which changed.
+        """
+        if name in self.names:
+            raise ValueError(f"Version already exists: {name}")
+
+        latest = {}
+        for o in map(converter.convert_stix2_object_to_dict, rows):
+            modified = converter.get_modified_timestamp(o)
+            previous = latest.get(o["id"])
+            if previous is None or modified >= previous[0]:
+                latest[o["id"]] = modified, o
+
+        version = Version(name=name)
+        index = {}
+        for stix2_id, (_, o) in latest.items():
+            # Objects which are equal to their copy in the latest version are not re-hashed.
+            k = self._head.get(stix2_id)
+            if k is None or self.objects[k] != o:
+                k = converter.get_content_hash(o)
+            index[stix2_id] = k
+            if self._head.get(stix2_id) != k:
+                version.upserts[stix2_id] = k
+            self.objects.setdefault(k, o)
+
+        version.deletes = [v for v in self._head if v not in index]
+        self.versions.append(version)
+        self._head = index
+        return version
+
+    def get_index(self, version: Optional[str] = None) -> Dict[str, str]:
+        """
+        Return the content hash of each object as of a version (defaults to the latest version).
+        """
+        if version is None or (self.versions and version == self.versions[-1].name):
+            return dict(self._head)
+
+        if version not in self.names:
+            raise ValueError(f"Unknown version: {version}")
+
+        index = {}
+        for v in self.versions:
+            for stix2_id in v.deletes:
+                index.pop(stix2_id, None)
+            index.update(v.upserts)
+            if v.name == version:
+                break
+        return index
+
+    def iter_objects(self, version: Optional[str] = None) -> Iterator[dict]:
+        for k in self.get_index(version).values():
+            yield self.objects[k]
+
+    def iter_stix2_objects(
+        self,
+        version: Optional[str] = None,
+        object_ids: Optional[Iterable[str]] = None,
+        object_types: Optional[Iterable[str]] = None,
+        object_names: Optional[Iterable[str]] = None,
+        decoders: Optional[Iterable[Decoder]] = None,
+        include_deprecated: bool = False,
+        include_revoked: bool = False,
+    ) -> Iterator[dict]:
+        """
+        Like converter.iter_stix2_objects, but as of a version.
+        """
+        rows = self.iter_objects(version)
+        yield from converter.filter_stix2_objects(
+            rows=rows,
+            object_ids=object_ids,
+            object_types=object_types,
+            object_names=object_names,
+            decoders=decoders,
+            include_deprecated=include_deprecated,
+            include_revoked=include_revoked,
+        )
+
+    def get_digraph(
+        self,
+        version: Optional[str] = None,
+        decoders: Optional[Iterable[Decoder]] = None,
+    ) -> nx.DiGraph:
+        return converter.convert_stix2_objects_to_digraph(
+            self.iter_objects(version), decoders=decoders
+        )
+
+    def save(self, directory: str):
+        """
+        Write the shared objects to {directory}/objects.jsonl.gz and the version deltas to {directory}/versions.json.
+        """
+        directory = converter.get_real_path(directory)
+        os.makedirs(directory, exist_ok=True)
+        write_jsonl(
+            rows=([k, o] for k, o in self.objects.items()),
+            path=os.path.join(directory, OBJECTS_FILENAME),
+            compression=GZIP,
+        )
+        write_json(
+            data=[
+                {"name": v.name, "upserts": v.upserts, "deletes": v.deletes}
+                for v in self.versions
+            ],
+            path=os.path.join(directory, VERSIONS_FILENAME),
+            indent=None,
+        )
+
+    @classmethod
+    def load(cls, directory: str) -> "VersionedStore":
+        directory = converter.get_real_path(directory)
+        store = cls()
+        with gzip.open(os.path.join(directory, OBJECTS_FILENAME), "rb") as file:
+            for line in file:
+                k, o = json.loads(line)
+                store.objects[k] = o
+
+        with open(os.path.join(directory, VERSIONS_FILENAME), "rb") as file:
+            store.versions = [Version(**v) for v in json.load(file)]
+
+        for v in store.versions:
+            for stix2_id in v.deletes:
+                store._head.pop(stix2_id, None)
+            store._head.update(v.upserts)
+        return store
+
+
+def create_versioned_store(
+    versions: Dict[str, Any],
+    store: Optional[VersionedStore] = None,
+) -> VersionedStore:
+    """
+    Load versions of a corpus in order from a mapping of version names to paths/URLs/data sources.
+    """
+    store = store or VersionedStore()
+    for name, data_source in versions.items():
+        if isinstance(data_source, str):
+            rows = converter.iter_stix2_bundle_objects(data_source)
+        else:
+            rows = converter.iter_stix2_objects(
+                data_source, include_deprecated=True, include_revoked=True
+            )
+        store.add_version(name, rows)
+    return store
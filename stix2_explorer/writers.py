@@ -0,0 +1,202 @@
+import contextlib
+import csv
+import gzip
+import io
+import itertools
+import json
+import sys
+from typing import Any, BinaryIO, Callable, Iterable, Iterator, List, Optional
+
+from stix2_explorer.serialization import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+GZIP = "gzip"
+ZSTD = "zstd"
+
+COMPRESSION_TYPES = [GZIP, ZSTD]
+COMPRESSION_TYPES_BY_FILE_EXTENSION = {
+    ".gz": GZIP,
+    ".gzip": GZIP,
+    ".zst": ZSTD,
+    ".zstd": ZSTD,
+}
+
+DEFAULT_BUFFER_SIZE = 1024 * 1024
+DEFAULT_BATCH_SIZE = 1000
+
+
+def get_compression_type(
+    path: Optional[str], compression: Optional[str] = None
+) -> Optional[str]:
+    """
+    Return the compression type to use for the given path, preferring an explicit choice over the file extension.
+    """
+    if compression:
+        if compression not in COMPRESSION_TYPES:
+            raise ValueError(f"Unsupported compression type: {compression}")
+        return compression
+
+    if path:
+        for ext, compression in COMPRESSION_TYPES_BY_FILE_EXTENSION.items():
+            if path.lower().endswith(ext):
+                return compression
+    return None
+
+
+@contextlib.contextmanager
+def open_output(
+    path: Optional[str] = None,
+    compression: Optional[str] = None,
+    buffer_size: int = DEFAULT_BUFFER_SIZE,
+) -> Iterator[BinaryIO]:
+    """
+    Open a buffered binary output stream for a file or stdout with optional gzip/zstd compression.
+    """
+    compression = get_compression_type(path, compression)
+    with contextlib.ExitStack() as stack:
+        if path:
+            raw = stack.enter_context(open(path, "wb", buffering=buffer_size))
+        else:
+            raw = sys.stdout.buffer
+
+        if compression == GZIP:
+            raw = stack.enter_context(gzip.GzipFile(fileobj=raw, mode="wb"))
+        elif compression == ZSTD:
+            if zstandard is None:
+                raise ValueError("zstd compression requires the zstandard package")
+            raw = stack.enter_context(
+                zstandard.ZstdCompressor().stream_writer(raw, closefd=False)
+            )
+
+        file = io.BufferedWriter(_Unclosable(raw), buffer_size=buffer_size)
+        try:
+            yield file
+        finally:
+            file.flush()
+            if not path:
+                sys.stdout.buffer.flush()
+
+
+class _Unclosable(io.RawIOBase):
+    """
+    A raw stream adapter which forwards writes without closing the underlying stream (e.g. stdout).
+    """
+
+    def __init__(self, file: BinaryIO):
+        self._file = file
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        self._file.write(b)
+        return len(b)
+
+
+def get_json_encoder() -> Callable[[Any], bytes]:
+    """
+    Return a function which encodes a single row as compact JSON (using orjson if it is installed).
+    """
+    default = JSONEncoder().default
+    if orjson is not None:
+        return lambda o: orjson.dumps(o, default=default)
+
+    encoder = JSONEncoder(separators=(",", ":"))
+    return lambda o: encoder.encode(o).encode("utf-8")
+
+
+def iter_batches(rows: Iterable[Any], batch_size: int) -> Iterator[List[Any]]:
+    rows = iter(rows)
+    while True:
+        batch = list(itertools.islice(rows, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def write_csv(
+    rows: Iterable[Iterable[Any]],
+    path: Optional[str] = None,
+    header: Optional[Iterable[str]] = None,
+    compression: Optional[str] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+):
+    encode = get_csv_encoder()
+    with open_output(path, compression=compression) as file:
+        if header:
+            file.write(encode([header]))
+        for batch in iter_batches(rows, batch_size):
+            file.write(encode(batch))
+
+
+def get_csv_encoder() -> Callable[[List[Iterable[Any]]], bytes]:
+    """
+    Return a function which encodes a batch of rows as CSV.
+
+    Rows made up of strings without delimiters, quotes or line breaks are joined directly, everything else is quoted by the csv module.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+
+    def encode(rows: List[Iterable[Any]]) -> bytes:
+        lines = []
+        for row in rows:
+            # Rows may be generators, which can only be read once.
+            if not isinstance(row, (list, tuple)):
+                row = tuple(row)
+
+            try:
+                line = ",".join(row)
+            except TypeError:
+                line = None
+
+            if (
+                not line
+                or line.count(",") != len(row) - 1
+                or '"' in line
+                or "\n" in line
+                or "\r" in line
+            ):
+                writer.writerow(row)
+                line = buffer.getvalue()[:-1]
+                buffer.seek(0)
+                buffer.truncate()
+            lines.append(line)
+        lines.append("")
+        return "\n".join(lines).encode("utf-8")
+
+    return encode
+
+
+def write_json(
+    data: Any,
+    path: Optional[str] = None,
+    indent: Optional[int] = 4,
+    compression: Optional[str] = None,
+):
+    blob = json.dumps(data, indent=indent, cls=JSONEncoder)
+    with open_output(path, compression=compression) as file:
+        file.write(blob.encode("utf-8"))
+        file.write(b"\n")
+
+
+def write_jsonl(
+    rows: Iterable[Any],
+    path: Optional[str] = None,
+    compression: Optional[str] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+):
+    encode = get_json_encoder()
+    with open_output(path, compression=compression) as file:
+        for batch in iter_batches(rows, batch_size):
+            file.write(b"\n".join(map(encode, batch)))
+            file.write(b"\n")
@@ -0,0 +1,38 @@
+import os
+from typing import List
+
+import pytest
+
+from stix2_explorer import converter
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+
+ENTERPRISE_PATH = os.path.join(DATA_DIR, "enterprise.json")
+CONTROLS_PATH = os.path.join(DATA_DIR, "controls.json")
+MAPPINGS_PATH = os.path.join(DATA_DIR, "mappings.json")
+
+PATHS = [ENTERPRISE_PATH, CONTROLS_PATH, MAPPINGS_PATH]
+
+
+@pytest.fixture(autouse=True)
+def home(tmp_path, monkeypatch) -> str:
+    """
+    Keep caches and server state out of the real home directory.
+    """
+    path = str(tmp_path / "home")
+    monkeypatch.setenv("HOME", path)
+    return path
+
+
+@pytest.fixture(scope="session")
+def rows() -> List[dict]:
+    return list(converter.iter_stix2_objects(PATHS))
+
+
+@pytest.fixture(scope="session")
+def all_rows() -> List[dict]:
+    return list(
+        converter.iter_stix2_objects(
+            PATHS, include_deprecated=True, include_revoked=True
+        )
+    )
@@ -0,0 +1,123 @@
+import asyncio
+import threading
+
+import pytest
+
+from stix2_explorer import aio, converter
+from tests.conftest import ENTERPRISE_PATH, PATHS
+
+
+class Loads:
+    """
+    Records each load of a data source, which blocks until the test releases it.
+    """
+
+    def __init__(self):
+        self.sources = []
+        self.released = threading.Event()
+
+    def release(self):
+        self.released.set()
+
+    async def wait(self, n):
+        while len(self.sources) < n:
+            await asyncio.sleep(0.001)
+
+
+@pytest.fixture()
+def loads(monkeypatch):
+    loads = Loads()
+    load = aio._load_stix2_data_source
+
+    def record(src, projection=None):
+        loads.sources.append(src)
+        assert loads.released.wait(timeout=10)
+        return load(src, projection)
+
+    monkeypatch.setattr(aio, "_load_stix2_data_source", record)
+    return loads
+
+
+async def collect(rows):
+    return [row async for row in rows]
+
+
+@pytest.mark.parametrize("batch_size", [1, 7, aio.DEFAULT_BATCH_SIZE])
+def test_objects_match_sync_objects(rows, batch_size):
+    result = asyncio.run(collect(aio.aiter_stix2_objects(PATHS, batch_size=batch_size)))
+    assert result == rows
+
+    kwargs = {"object_types": ["attack-pattern"], "include_deprecated": True}
+    result = asyncio.run(
+        collect(aio.aiter_stix2_objects(PATHS, batch_size=batch_size, **kwargs))
+    )
+    assert result == list(converter.iter_stix2_objects(PATHS, **kwargs))
+
+
+def test_batches():
+    async def main():
+        return await collect(aio.aiter_batches(range(10), batch_size=3))
+
+    assert asyncio.run(main()) == list(range(10))
+
+
+def test_concurrent_loads_are_shared(loads):
+    async def main():
+        tasks = [
+            asyncio.ensure_future(aio.aget_stix2_data_source(ENTERPRISE_PATH))
+            for _ in range(8)
+        ]
+        await loads.wait(1)
+        loads.release()
+        return await asyncio.gather(*tasks)
+
+    data_sources = asyncio.run(main())
+    assert loads.sources == [ENTERPRISE_PATH]
+    assert all(ds is data_sources[0] for ds in data_sources)
+    assert aio._in_flight == {}
+
+
+def test_cancelled_caller_does_not_cancel_shared_load(loads):
+    async def main():
+        cancelled = asyncio.ensure_future(aio.aget_stix2_data_source(ENTERPRISE_PATH))
+        waiting = asyncio.ensure_future(aio.aget_stix2_data_source(ENTERPRISE_PATH))
+        await loads.wait(1)
+
+        cancelled.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+
+        loads.release()
+        return await waiting
+
+    ds = asyncio.run(main())
+    assert loads.sources == [ENTERPRISE_PATH]
+    assert ds.query() == converter.get_stix2_data_source(ENTERPRISE_PATH).query()
+
+
+def test_sequential_loads_are_not_shared(loads):
+    loads.release()
+
+    async def main():
+        await aio.aget_stix2_data_source(ENTERPRISE_PATH)
+        await aio.aget_stix2_data_source(ENTERPRISE_PATH)
+
+    asyncio.run(main())
+    assert loads.sources == [ENTERPRISE_PATH, ENTERPRISE_PATH]
+
+
+@pytest.mark.parametrize("node_labels", converter.NODE_LABEL_TYPES)
+def test_triples_match_sync_triples(rows, node_labels):
+    triples = asyncio.run(
+        aio.aconvert_stix2_objects_to_triples(PATHS, node_labels=node_labels)
+    )
+    assert triples == list(
+        converter.convert_stix2_objects_to_triples(rows, node_labels=node_labels)
+    )
+
+
+def test_digraph_matches_sync_digraph(rows):
+    g = asyncio.run(aio.aconvert_stix2_objects_to_digraph(PATHS))
+    expected = converter.convert_stix2_objects_to_digraph(rows)
+    assert dict(g.nodes(data=True)) == dict(expected.nodes(data=True))
+    assert sorted(g.edges(data=True)) == sorted(expected.edges(data=True))
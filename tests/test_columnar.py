@@ -0,0 +1,66 @@
+import datetime
+
+import pyarrow.parquet as pq
+import pytest
+
+from stix2_explorer import columnar, converter
+
+UTC = datetime.timezone.utc
+
+
+def get_identity(created, modified):
+    return {
+        "type": "identity",
+        "spec_version": "2.1",
+        "id": "identity--a8b1c7f6-8a3b-4e2c-9d8e-0f3c1b2a4d5e",
+        "created": created,
+        "modified": modified,
+        "name": "Example",
+        "identity_class": "organization",
+    }
+
+
+@pytest.mark.parametrize(
+    "timestamp, expected",
+    [
+        ("2020-01-01T00:00:00Z", datetime.datetime(2020, 1, 1, tzinfo=UTC)),
+        ("2020-01-01T00:00:00.1Z", datetime.datetime(2020, 1, 1, 0, 0, 0, 100000, UTC)),
+        (
+            "2020-01-01T00:00:00.123456Z",
+            datetime.datetime(2020, 1, 1, 0, 0, 0, 123456, UTC),
+        ),
+        (
+            "2020-01-01T00:00:00.123456789Z",
+            datetime.datetime(2020, 1, 1, 0, 0, 0, 123456, UTC),
+        ),
+        (
+            "2020-01-01T00:00:00.123456789012Z",
+            datetime.datetime(2020, 1, 1, 0, 0, 0, 123456, UTC),
+        ),
+    ],
+)
+def test_timestamps_of_any_precision(timestamp, expected):
+    rows = [get_identity(timestamp, "2021-06-01T12:30:00.000000001Z")]
+    tables = columnar.convert_stix2_objects_to_tables(rows)
+    [o] = tables.objects.to_pylist()
+    assert o["created"] == expected
+    assert o["modified"] == datetime.datetime(2021, 6, 1, 12, 30, tzinfo=UTC)
+    assert tables.objects.schema.field("created").type == columnar.TIMESTAMP
+
+
+def test_tables_match_rows(rows, tmp_path):
+    tables = columnar.convert_stix2_objects_to_tables(rows)
+    objects = tables.objects.to_pylist()
+    expected = [o for o in rows if o["type"] != "relationship"]
+    assert [o["id"] for o in objects] == [o["id"] for o in expected]
+    for row, o in zip(expected, objects):
+        assert o["created"] == converter.parse_timestamp(row["created"])
+        assert o["modified"] == converter.parse_timestamp(row["modified"])
+
+    triples = tables.triples.to_pydict()
+    assert sorted(zip(triples["subject"], triples["predicate"], triples["object"])) == (
+        sorted(converter.convert_stix2_objects_to_triples(rows))
+    )
+
+    columnar.write_tables(tables, str(tmp_path))
+    assert pq.read_table(tmp_path / "objects.parquet").equals(tables.objects)
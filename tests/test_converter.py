@@ -0,0 +1,176 @@
+from typing import Iterator
+
+import pytest
+
+from stix2_explorer import converter
+from stix2_explorer.converter import Edge, GenericDecoder, MitreDecoder
+from tests.conftest import ENTERPRISE_PATH
+
+
+class CustomDecoder(GenericDecoder):
+    """
+    A decoder which only overrides iter_edges (i.e. the documented extension point).
+    """
+
+    def iter_edges(self, rows: Iterator[dict]) -> Iterator[Edge]:
+        rows = list(rows)
+        yield from super().iter_edges(rows)
+        for o in rows:
+            if o["type"] == "attack-pattern":
+                yield Edge(o["id"], "custom", o["id"], o["id"])
+
+
+def get_expected_triples(rows, decoders, node_labels=None):
+    """
+    Decode triples one edge at a time (i.e. without batches).
+    """
+    get_label = converter.get_node_label_function(rows, node_labels)
+    triples = []
+    for decoder in decoders:
+        for edge in decoder.iter_edges(rows):
+            triple = (get_label(edge.source), edge.predicate, get_label(edge.object))
+            if triple not in triples:
+                triples.append(triple)
+    return triples
+
+
+def test_custom_decoder_edges_are_kept(rows):
+    decoders = [CustomDecoder(), MitreDecoder()]
+    edges = list(decoders[0].iter_edges(rows))
+    assert any(e.predicate == "custom" for e in edges)
+
+    triples = list(converter.convert_stix2_objects_to_triples(rows, decoders=decoders))
+    assert triples == get_expected_triples(rows, decoders)
+    assert sum(p == "custom" for (_, p, _) in triples) == sum(
+        o["type"] == "attack-pattern" for o in rows
+    )
+
+    g = converter.convert_stix2_objects_to_digraph(rows, decoders=decoders)
+    assert sorted(converter.convert_digraph_to_triples(g)) == sorted(triples)
+
+
+def test_builtin_decoders_batch_directly(rows):
+    for decoder in converter.get_default_decoders():
+        batched = [t for b in decoder.iter_edge_batches(rows) for t in b.iter_triples()]
+        edges = [e.to_triple() for e in decoder.iter_edges(rows)]
+        assert batched == edges
+        assert batched == list(decoder.iter_triples(rows))
+
+
+@pytest.mark.parametrize("batch_size", [1, 7, converter.DEFAULT_EDGE_BATCH_SIZE])
+def test_edge_batches_are_split_by_size(rows, batch_size):
+    for decoder in converter.get_default_decoders():
+        batches = list(decoder.iter_edge_batches(rows, batch_size=batch_size))
+        assert all(len(b) for b in batches)
+        triples = [t for b in batches for t in b.iter_triples()]
+        assert triples == list(decoder.iter_triples(rows))
+
+
+@pytest.mark.parametrize("node_labels", [None] + converter.NODE_LABEL_TYPES)
+def test_triples_match_edges(rows, node_labels):
+    decoders = converter.get_default_decoders()
+    triples = list(
+        converter.convert_stix2_objects_to_triples(
+            rows, node_labels=node_labels, decoders=decoders
+        )
+    )
+    assert triples == get_expected_triples(rows, decoders, node_labels)
+    assert len(triples) == len(set(triples))
+
+
+def test_triples_match_digraph(rows):
+    triples = converter.convert_stix2_objects_to_triples(rows)
+    g = converter.convert_stix2_objects_to_digraph(rows)
+    assert sorted(triples) == sorted(converter.convert_digraph_to_triples(g))
+
+
+def test_deprecated_and_revoked_objects_are_filtered(rows, all_rows):
+    assert len(rows) < len(all_rows)
+    assert not any(o.get("x_mitre_deprecated") or o.get("revoked") for o in rows)
+
+
+def test_related_object_subgraph_stops_when_nothing_is_left(rows):
+    g = converter.convert_stix2_objects_to_digraph(rows)
+    object_ids = [o["id"] for o in rows[:3]]
+
+    # Steps which reach nothing new are skipped, so a huge radius is as cheap as one which reaches every node.
+    sg = converter.get_related_object_subgraph(g, object_ids=object_ids, radius=10**9)
+    expected = converter.get_related_object_subgraph(
+        g, object_ids=object_ids, radius=len(g)
+    )
+    assert sorted(sg.edges(data="label")) == sorted(expected.edges(data="label"))
+
+
+def get_shared_refs(rows):
+    """
+    Return the source_ref values of two relationships from the same object.
+    """
+    refs = {}
+    for o in rows:
+        if o["type"] == "relationship":
+            refs.setdefault(o["source_ref"], []).append(o["source_ref"])
+    return next(v[:2] for v in refs.values() if len(v) > 1)
+
+
+@pytest.mark.parametrize("projection", [None, converter.PROJECTION_GRAPH])
+def test_refs_are_interned(projection):
+    rows = list(converter.iter_stix2_bundle_objects(ENTERPRISE_PATH, projection))
+    a, b = get_shared_refs(rows)
+    assert a is b
+
+    src = converter.get_stix2_data_source(ENTERPRISE_PATH, projection=projection)
+    rows = src.query()
+    a, b = get_shared_refs(rows)
+    assert a is b
+
+    # Timestamps are only interned when objects are kept as dicts.
+    created = [o["created"] for o in rows]
+    if projection:
+        assert all(type(t) is str for t in created)
+        assert len({id(t) for t in created}) == len(set(created))
+    else:
+        assert all(type(o["created"]) is not str for o in rows if type(o) is not dict)
+
+
+def test_edges_are_interned():
+    def copy(s):
+        return "".join(list(s))
+
+    s, p, o = "attack-pattern--1", "uses", "malware--2"
+    positional = Edge(copy(s), copy(p), copy(o), "relationship--3")
+    keyword = Edge(source=copy(s), predicate=copy(p), object=copy(o))
+    assert positional.to_triple() == keyword.to_triple() == (s, p, o)
+    assert positional.origin == "relationship--3"
+    assert keyword.origin is None
+    for a, b in zip(positional, keyword):
+        assert a is b
+
+    batch = converter.EdgeBatch()
+    batch.append(copy(s), copy(p), copy(o), "relationship--3")
+    [edge] = batch.iter_edges()
+    assert edge == positional
+    assert edge.source is positional.source
+
+
+@pytest.mark.parametrize(
+    "earlier, later",
+    [
+        ("2020-01-01T00:00:19Z", "2020-01-01T00:00:19.735Z"),
+        ("2020-01-01T00:00:19.7Z", "2020-01-01T00:00:19.735Z"),
+        ("2020-01-01T00:00:19.123456Z", "2020-01-01T00:00:19.123457891Z"),
+        ("2020-01-01T00:00:19.999Z", "2020-01-01T00:00:20Z"),
+        ("2020-01-01T01:00:00+00:00", "2020-01-01T02:00:00.5+01:00"),
+        (None, "1970-01-01T00:00:00Z"),
+    ],
+)
+def test_modified_timestamps_are_compared_as_times(earlier, later):
+    earlier = converter.get_modified_timestamp({"modified": earlier})
+    later = converter.get_modified_timestamp({"modified": later})
+    assert earlier < later
+
+
+def test_modified_timestamps_of_stix2_objects():
+    src = converter.get_stix2_data_source(ENTERPRISE_PATH)
+    for o in src.query():
+        expected = converter.get_modified_timestamp({"modified": str(o["modified"])})
+        assert converter.get_modified_timestamp(o) == expected
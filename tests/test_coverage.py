@@ -0,0 +1,119 @@
+import copy
+import json
+import uuid
+
+import pytest
+from click.testing import CliRunner
+
+from stix2_explorer import converter, coverage
+from stix2_explorer.cli import main
+from tests.conftest import CONTROLS_PATH, PATHS
+
+
+def get_args(*paths):
+    args = []
+    for path in paths:
+        args += ["-i", path]
+    return args
+
+
+def get_mitigated(triples, control_id):
+    return sorted(o for (s, p, o) in triples if s == control_id and p == "mitigates")
+
+
+@pytest.fixture(scope="module")
+def triples(rows):
+    return list(converter.convert_stix2_objects_to_triples(rows))
+
+
+@pytest.fixture(scope="module")
+def external_ids(rows):
+    return converter.get_node_labels_by_external_id(rows)
+
+
+@pytest.fixture(scope="module")
+def stix2_ids(external_ids):
+    return {v: k for (k, v) in external_ids.items()}
+
+
+@pytest.fixture()
+def duplicate_control_bundle(tmp_path, triples, external_ids, stix2_ids):
+    """
+    A bundle with a second copy of control AC-1 (under a different ID), which mitigates a technique the original doesn't.
+    """
+    with open(CONTROLS_PATH) as file:
+        objects = json.load(file)["objects"]
+    control = copy.deepcopy(next(o for o in objects if o["id"] == stix2_ids["AC-1"]))
+    control["id"] = f"course-of-action--{uuid.UUID(int=3, version=4)}"
+
+    mitigated = get_mitigated(triples, stix2_ids["AC-1"])
+    technique_id = next(
+        o
+        for (s, p, o) in triples
+        if p == "mitigates" and o not in mitigated and o.startswith("attack-pattern")
+    )
+    relationship = {
+        "type": "relationship",
+        "id": f"relationship--{uuid.UUID(int=4, version=4)}",
+        "spec_version": "2.1",
+        "created": "2023-01-01T00:00:00.000Z",
+        "modified": "2023-01-01T00:00:00.000Z",
+        "relationship_type": "mitigates",
+        "source_ref": control["id"],
+        "target_ref": technique_id,
+    }
+    path = tmp_path / "duplicate.json"
+    path.write_text(json.dumps({"type": "bundle", "objects": [control, relationship]}))
+    return str(path), [external_ids[o] for o in mitigated + [technique_id]]
+
+
+def test_tactic_coverage_is_scoped_to_techniques(triples, stix2_ids):
+    m = coverage.get_coverage_matrix(triples)
+    control_ids = [stix2_ids["AC-1"]]
+    technique_ids = m.techniques[:5]
+
+    result = coverage.get_tactic_coverage(m, control_ids, technique_ids=technique_ids)
+    covered = set(get_mitigated(triples, stix2_ids["AC-1"]))
+    tactics = [
+        (s, o)
+        for (s, p, o) in triples
+        if s in technique_ids and o.startswith("x-mitre-tactic")
+    ]
+    assert sorted((c.tactic_id, c.total) for c in result) == sorted(
+        (t, sum(1 for (_, o) in tactics if o == t)) for t in {o for (_, o) in tactics}
+    )
+    assert sum(c.covered for c in result) == sum(
+        1 for (s, _) in tactics if s in covered
+    )
+
+    # Without a scope, every technique is counted.
+    result = coverage.get_tactic_coverage(m, control_ids)
+    assert sum(c.total for c in result) == sum(
+        bitset.bit_count() for bitset in m.tactic_bitsets.values()
+    )
+
+
+def test_coverage_command_scopes_tactics(triples, stix2_ids):
+    runner = CliRunner()
+    args = get_args(*PATHS) + ["coverage", "-c", "AC-1", "-t", "T1001"]
+    result = runner.invoke(main, args)
+    assert result.exit_code == 0, result.output
+    tactics = json.loads(result.output)["tactics"]
+
+    technique_id = stix2_ids["T1001"]
+    expected = sum(
+        1 for (s, p, o) in triples if s == technique_id and o.startswith("x-mitre")
+    )
+    assert expected > 0
+    assert sum(t["total"] for t in tactics) == expected
+
+
+def test_coverage_command_expands_shared_external_ids(duplicate_control_bundle):
+    path, techniques = duplicate_control_bundle
+    runner = CliRunner()
+    args = get_args(*PATHS, path) + ["coverage", "--report", "uncovered", "-c", "AC-1"]
+    for technique in techniques:
+        args += ["-t", technique]
+    result = runner.invoke(main, args)
+    assert result.exit_code == 0, result.output
+    assert json.loads(result.output) == {"techniques": []}
@@ -0,0 +1,119 @@
+import copy
+import json
+
+import pytest
+
+from stix2_explorer import converter, diff
+from tests.conftest import ENTERPRISE_PATH
+
+MODIFIED = "2030-01-01T00:00:00.000Z"
+
+
+@pytest.fixture(scope="module")
+def objects():
+    with open(ENTERPRISE_PATH) as file:
+        return json.load(file)["objects"]
+
+
+def get_technique(objects, i=0):
+    return [o for o in objects if o["type"] == "attack-pattern"][i]
+
+
+def write_bundle(path, objects):
+    path.write_text(json.dumps({"type": "bundle", "objects": objects}))
+    return str(path)
+
+
+def test_identical_releases(objects):
+    report = diff.diff_stix2_objects(objects, copy.deepcopy(objects))
+    assert not any(report.get_summary().values())
+
+
+def test_changes(objects):
+    new = copy.deepcopy(objects)
+    modified = get_technique(new, 0)
+    modified["description"] = "Changed"
+    modified["modified"] = MODIFIED
+
+    # An object which changed without a new modified timestamp is still reported.
+    silently_modified = get_technique(new, 1)
+    silently_modified["description"] = "Changed"
+
+    revoked = get_technique(new, 2)
+    revoked["revoked"] = True
+    revoked["modified"] = MODIFIED
+
+    removed = get_technique(new, 4)
+    new.remove(removed)
+
+    added = copy.deepcopy(get_technique(objects, 5))
+    added["id"] = "attack-pattern--00000000-0000-4000-8000-000000000001"
+    new.append(added)
+
+    report = diff.diff_stix2_objects(objects, new)
+    assert [c.id for c in report.modified] == [modified["id"], silently_modified["id"]]
+    assert [c.id for c in report.revoked] == [revoked["id"]]
+    assert [c.id for c in report.removed] == [removed["id"]]
+    assert [c.id for c in report.added] == [added["id"]]
+    assert report.modified[0].new_modified == MODIFIED
+    assert report.added[0].old_modified is None
+    assert report.removed_edges
+    assert report.added_edges
+
+
+def test_objects_are_only_hashed_when_modified_is_unchanged(objects, monkeypatch):
+    new = copy.deepcopy(objects)
+    for o in new:
+        if "modified" in o:
+            o["modified"] = MODIFIED
+    unchanged = sum(1 for o in new if "modified" not in o)
+
+    hashed = []
+    get_content_hash = converter.get_content_hash
+
+    def count(o):
+        hashed.append(o["id"])
+        return get_content_hash(o)
+
+    monkeypatch.setattr(converter, "get_content_hash", count)
+    report = diff.diff_stix2_objects(objects, new)
+    assert len(report.modified) + len(report.revoked) + len(report.deprecated) == (
+        len(objects) - unchanged
+    )
+    assert len(hashed) == 2 * unchanged
+
+
+def test_versions_are_deduplicated(objects, tmp_path):
+    technique = get_technique(objects, 0)
+    latest = copy.deepcopy(technique)
+    latest["description"] = "Changed"
+    latest["modified"] = MODIFIED
+
+    # Both versions of the object are in the new release (e.g. in two bundles).
+    old_path = write_bundle(tmp_path / "old.json", objects)
+    new_path = write_bundle(tmp_path / "new.json", [latest] + objects)
+
+    report = diff.diff_stix2_data_sources(old_path, new_path)
+    assert report.added == []
+    assert [c.id for c in report.modified] == [technique["id"]]
+    assert report.modified[0].old_modified == technique["modified"]
+    assert report.modified[0].new_modified == MODIFIED
+
+    # A release which contains both versions is unchanged when compared with itself.
+    report = diff.diff_stix2_data_sources(new_path, new_path)
+    assert not any(report.get_summary().values())
+
+    report = diff.diff_stix2_objects(objects + [latest], objects + [latest])
+    assert not any(report.get_summary().values())
+
+
+def test_latest_version_is_found_whatever_the_precision(objects):
+    technique = get_technique(objects, 0)
+    older = dict(technique, modified="2030-01-01T00:00:19Z")
+    newer = dict(technique, modified="2030-01-01T00:00:19.735Z", name="Newer")
+
+    # As strings, "...:19Z" sorts after "...:19.735Z".
+    for versions in ([older, newer], [newer, older]):
+        report = diff.diff_stix2_objects([older], versions)
+        assert [c.id for c in report.modified] == [technique["id"]]
+        assert report.modified[0].new_modified == newer["modified"]
@@ -0,0 +1,120 @@
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from stix2_explorer import converter, git_source
+from tests.conftest import CONTROLS_PATH, ENTERPRISE_PATH
+
+
+def git(path, *args):
+    subprocess.run(
+        ["git", "-C", path, *args],
+        check=True,
+        stdout=subprocess.DEVNULL,
+        env=dict(
+            os.environ,
+            GIT_AUTHOR_NAME="test",
+            GIT_AUTHOR_EMAIL="test@example.com",
+            GIT_COMMITTER_NAME="test",
+            GIT_COMMITTER_EMAIL="test@example.com",
+        ),
+    )
+
+
+@pytest.fixture()
+def repository(tmp_path):
+    """
+    A repository with the enterprise bundle tagged v1 and both bundles tagged v2.
+    """
+    path = str(tmp_path / "cti")
+    os.makedirs(os.path.join(path, "bundles"))
+    git(path, "init", "-q")
+
+    shutil.copy(ENTERPRISE_PATH, os.path.join(path, "bundles"))
+    git(path, "add", ".")
+    git(path, "commit", "-q", "-m", "v1")
+    git(path, "tag", "v1")
+
+    shutil.copy(CONTROLS_PATH, os.path.join(path, "bundles"))
+    with open(os.path.join(path, "bundles", "README.md"), "w") as file:
+        file.write("Not a bundle")
+    git(path, "add", ".")
+    git(path, "commit", "-q", "-m", "v2")
+    git(path, "tag", "v2")
+    yield path
+    git_source.close_git_repositories()
+
+
+def test_parse_git_path():
+    assert git_source.parse_git_path("git:~/src/cti@ATT&CK-v12.1:a/b/") == (
+        "~/src/cti",
+        "ATT&CK-v12.1",
+        "a/b",
+    )
+    with pytest.raises(ValueError):
+        git_source.parse_git_path("git:~/src/cti")
+
+
+def test_read_blob(repository):
+    r = git_source.get_git_repository(repository)
+    object_type, data = r.read_object("v1:bundles/enterprise.json")
+    assert object_type == git_source.BLOB
+    with open(ENTERPRISE_PATH, "rb") as file:
+        assert data == file.read()
+
+
+def test_read_tree(repository):
+    r = git_source.get_git_repository(repository)
+    object_type, _ = r.read_object("v2:bundles")
+    assert object_type == git_source.TREE
+    assert sorted(path for (path, _) in r.iter_blobs("v2", "bundles")) == [
+        "bundles/README.md",
+        "bundles/controls.json",
+        "bundles/enterprise.json",
+    ]
+    assert [path for (path, _) in r.iter_blobs("v1", "")] == ["bundles/enterprise.json"]
+    assert r.list_refs() == ["v1", "v2"]
+
+
+def test_objects_match_working_tree(repository):
+    src = f"git:{repository}@v2:bundles"
+    expected = list(converter.iter_stix2_objects([CONTROLS_PATH, ENTERPRISE_PATH]))
+    assert list(converter.iter_stix2_objects([src])) == expected
+    assert git_source.get_git_paths(repository, "bundles") == {
+        "v1": f"git:{repository}@v1:bundles",
+        "v2": src,
+    }
+
+
+@pytest.mark.parametrize(
+    "name", ["v3:bundles", "v1:bundles/controls.json", "v1:no such file.json"]
+)
+def test_unknown_objects(repository, name):
+    r = git_source.get_git_repository(repository)
+    with pytest.raises(ValueError, match="Git object not found"):
+        r.read_object(name)
+
+    # The reader is still usable afterwards.
+    assert r.read_object("v1:bundles")[0] == git_source.TREE
+
+
+def test_bad_repository_path(tmp_path):
+    with pytest.raises(ValueError, match="Not a git repository"):
+        git_source.get_git_repository(str(tmp_path / "missing"))
+    with pytest.raises(ValueError, match="Not a git repository"):
+        list(converter.iter_stix2_objects([f"git:{tmp_path}@v1:bundles"]))
+
+
+def test_exited_readers_are_replaced(repository):
+    r = git_source.get_git_repository(repository)
+    assert git_source.get_git_repository(repository) is r
+
+    r.close()
+    with pytest.raises(ValueError, match="exited"):
+        r.read_object("v1:bundles")
+
+    replacement = git_source.get_git_repository(repository)
+    assert replacement is not r
+    assert replacement.read_object("v1:bundles")[0] == git_source.TREE
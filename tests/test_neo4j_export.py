@@ -0,0 +1,295 @@
+import collections
+import threading
+
+import pytest
+
+from stix2_explorer import converter, neo4j_export
+from stix2_explorer.neo4j_export import Neo4jExporter
+
+
+class FakeResult:
+    def consume(self):
+        pass
+
+
+class FakeTransaction:
+    def __init__(self, session):
+        self.session = session
+
+    def run(self, query, **parameters):
+        self.session.driver.record(self.session, query, parameters, write=True)
+        return FakeResult()
+
+
+class FakeSession:
+    def __init__(self, driver, database):
+        self.driver = driver
+        self.database = database
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def run(self, query, **parameters):
+        self.driver.record(self, query, parameters, write=False)
+        return FakeResult()
+
+    def execute_write(self, f):
+        return f(FakeTransaction(self))
+
+
+class FakeDriver:
+    """
+    Records the Cypher and parameters of every query instead of sending them to Neo4j.
+    """
+
+    def __init__(self, on_write=None):
+        self.queries = []
+        self.sessions = []
+        self.on_write = on_write
+        self._lock = threading.Lock()
+
+    def session(self, database=None):
+        session = FakeSession(self, database)
+        with self._lock:
+            self.sessions.append(session)
+        return session
+
+    def record(self, session, query, parameters, write):
+        with self._lock:
+            self.queries.append(
+                {
+                    "session": session,
+                    "thread": threading.current_thread().name,
+                    "query": query,
+                    "parameters": parameters,
+                    "write": write,
+                }
+            )
+        if write and self.on_write is not None:
+            self.on_write()
+
+    def get_batches(self, text):
+        return [q for q in self.queries if q["write"] and text in q["query"]]
+
+
+@pytest.fixture(scope="module")
+def triples(rows):
+    return list(converter.convert_stix2_objects_to_triples(rows))
+
+
+@pytest.fixture(scope="module")
+def nodes(rows, triples):
+    return list(neo4j_export.iter_nodes(rows, triples))
+
+
+def get_rows(batches):
+    return [row for q in batches for row in q["parameters"]["rows"]]
+
+
+def test_export_sends_one_unwind_query_per_batch(rows, triples, nodes):
+    driver = FakeDriver()
+    exporter = Neo4jExporter(driver, database="stix", batch_size=7, concurrency=2)
+    stats = exporter.export(rows)
+    assert stats.nodes == len(nodes)
+    assert stats.relationships == len(triples)
+
+    # The uniqueness constraint is created before anything is written.
+    constraint = driver.queries[0]
+    assert not constraint["write"]
+    assert constraint["query"] == (
+        "CREATE CONSTRAINT object_id IF NOT EXISTS "
+        "FOR (n:Object) REQUIRE n.id IS UNIQUE"
+    )
+    assert all(s.database == "stix" for s in driver.sessions)
+
+    node_batches = driver.get_batches("MERGE (n:Object")
+    assert sorted(get_rows(node_batches), key=lambda n: n["id"]) == sorted(
+        nodes, key=lambda n: n["id"]
+    )
+    for q in node_batches:
+        assert set(q["parameters"]) == {"rows"}
+        assert 0 < len(q["parameters"]["rows"]) <= 7
+        label = neo4j_export.get_label(q["parameters"]["rows"][0]["type"])
+        assert q["query"] == (
+            f"UNWIND $rows AS row MERGE (n:Object {{id: row.id}}) "
+            f"SET n:{label}, n += row"
+        )
+        assert all(
+            neo4j_export.get_label(n["type"]) == label for n in q["parameters"]["rows"]
+        )
+
+    relationship_batches = driver.get_batches("MERGE (s)-[")
+    expected = collections.Counter(
+        (neo4j_export.get_relationship_type(p), s, o) for (s, p, o) in triples
+    )
+    actual = collections.Counter()
+    for q in relationship_batches:
+        assert 0 < len(q["parameters"]["rows"]) <= 7
+        relationship_type = q["query"].split("MERGE (s)-[:")[1].split("]")[0]
+        assert q["query"] == (
+            "UNWIND $rows AS row "
+            "MATCH (s:Object {id: row.s}) "
+            "MATCH (o:Object {id: row.o}) "
+            f"MERGE (s)-[:{relationship_type}]->(o)"
+        )
+        for row in q["parameters"]["rows"]:
+            actual[(relationship_type, row["s"], row["o"])] += 1
+    assert actual == expected
+
+    # Relationships are only written once every node exists.
+    positions = {id(q): i for i, q in enumerate(driver.queries)}
+    assert max(positions[id(q)] for q in node_batches) < min(
+        positions[id(q)] for q in relationship_batches
+    )
+
+
+def test_batches_are_written_in_parallel_sessions(rows):
+    concurrency = 3
+    barrier = threading.Barrier(concurrency, timeout=10)
+    driver = FakeDriver(on_write=barrier.wait)
+
+    # Every batch waits until as many batches are in flight as there are threads.
+    exporter = Neo4jExporter(driver, batch_size=1, concurrency=concurrency)
+    nodes = [
+        {"id": f"identity--{i}", "type": "identity", "name": None, "external_id": None}
+        for i in range(concurrency * 4)
+    ]
+    assert exporter.write_nodes(nodes) == len(nodes)
+
+    batches = driver.get_batches("MERGE (n:Object")
+    assert len(batches) == len(nodes)
+    assert len({id(q["session"]) for q in batches}) == len(batches)
+    assert len({q["thread"] for q in batches}) == concurrency
+    assert threading.current_thread().name not in {q["thread"] for q in batches}
+
+
+def sync(rows, manifest_path):
+    driver = FakeDriver()
+    stats = Neo4jExporter(driver, batch_size=7).sync(rows, manifest_path)
+    return driver, stats
+
+
+def test_manifest_round_trip(tmp_path, triples):
+    path = str(tmp_path / "manifest" / "neo4j.json.gz")
+    assert neo4j_export.Manifest.load(path) == neo4j_export.Manifest()
+
+    manifest = neo4j_export.Manifest(nodes={"a": "1", "b": "2"}, edges=triples[:5])
+    manifest.save(path)
+    assert neo4j_export.Manifest.load(path) == manifest
+
+
+def test_sync_pushes_only_changes(rows, triples, nodes, tmp_path):
+    manifest_path = str(tmp_path / "neo4j.json.gz")
+
+    # The first sync writes everything.
+    driver, stats = sync(rows, manifest_path)
+    assert driver.queries[0]["query"].startswith("CREATE CONSTRAINT")
+    assert stats.created_nodes == len(nodes)
+    assert stats.created_relationships == len(triples)
+    assert stats.updated_nodes == stats.deleted_nodes == 0
+    manifest = neo4j_export.Manifest.load(manifest_path)
+    assert set(manifest.nodes) == {n["id"] for n in nodes}
+    assert set(manifest.edges) == set(triples)
+
+    # Nothing changed, so nothing is sent.
+    driver, stats = sync(rows, manifest_path)
+    assert driver.queries == []
+    assert stats.created_nodes == stats.updated_nodes == stats.deleted_nodes == 0
+    assert stats.created_relationships == stats.deleted_relationships == 0
+
+    # Rename one group and remove one technique (and the relationships which use it).
+    group = next(o for o in rows if o["type"] == "intrusion-set")
+    technique = next(
+        o
+        for o in rows
+        if o["type"] == "attack-pattern"
+        and any(s == group["id"] and obj == o["id"] for (s, _, obj) in triples)
+    )
+    changed = []
+    for o in rows:
+        if o["id"] == technique["id"] or technique["id"] in (
+            o.get("source_ref"),
+            o.get("target_ref"),
+        ):
+            continue
+        if o["id"] == group["id"]:
+            o = dict(o, name="Renamed")
+        changed.append(o)
+    new_triples = set(converter.convert_stix2_objects_to_triples(changed))
+    removed_triples = set(triples) - new_triples
+    assert removed_triples
+
+    driver, stats = sync(changed, manifest_path)
+    assert not any(q["query"].startswith("CREATE CONSTRAINT") for q in driver.queries)
+    assert stats.created_nodes == 0
+    assert stats.updated_nodes == 1
+    assert stats.deleted_nodes == 1
+    assert stats.created_relationships == len(new_triples - set(triples))
+    assert stats.deleted_relationships == len(removed_triples)
+
+    [query] = {q["query"] for q in driver.get_batches("DETACH DELETE")}
+    assert query == "UNWIND $rows AS row MATCH (n:Object {id: row.id}) DETACH DELETE n"
+    assert get_rows(driver.get_batches("DETACH DELETE")) == [{"id": technique["id"]}]
+
+    deleted = set()
+    for q in driver.get_batches("DELETE r"):
+        relationship_type = q["query"].split("-[r:")[1].split("]")[0]
+        assert q["query"] == (
+            "UNWIND $rows AS row "
+            "MATCH (:Object {id: row.s})"
+            f"-[r:{relationship_type}]->"
+            "(:Object {id: row.o}) DELETE r"
+        )
+        deleted.update(
+            (row["s"], relationship_type, row["o"]) for row in q["parameters"]["rows"]
+        )
+    assert deleted == {
+        (s, neo4j_export.get_relationship_type(p), o) for (s, p, o) in removed_triples
+    }
+
+    # Only the renamed group is written again.
+    written = get_rows(driver.get_batches("MERGE (n:Object"))
+    assert written == [
+        n for n in neo4j_export.iter_nodes(changed, []) if n["id"] == group["id"]
+    ]
+    assert written[0]["name"] == "Renamed"
+
+    manifest = neo4j_export.Manifest.load(manifest_path)
+    assert technique["id"] not in manifest.nodes
+    assert set(manifest.edges) == new_triples
+
+
+@pytest.mark.parametrize(
+    "content", [b"", b"\x1f\x8b\x08\x00truncated", b"not gzip", b"\x1f\x8b"]
+)
+def test_corrupt_manifest(rows, tmp_path, content):
+    path = tmp_path / "neo4j.json.gz"
+    path.write_bytes(content)
+    with pytest.raises(ValueError, match="Corrupt Neo4j manifest"):
+        neo4j_export.Manifest.load(str(path))
+
+    driver = FakeDriver()
+    with pytest.raises(ValueError, match="Corrupt Neo4j manifest"):
+        Neo4jExporter(driver).sync(rows, str(path))
+    assert driver.queries == []
+
+
+def test_interrupted_save_keeps_manifest(tmp_path, triples, monkeypatch):
+    path = str(tmp_path / "neo4j.json.gz")
+    manifest = neo4j_export.Manifest(nodes={"a": "1"}, edges=triples[:5])
+    manifest.save(path)
+
+    def dump(data, file, **kwargs):
+        file.write('{"nodes":')
+        raise KeyboardInterrupt()
+
+    monkeypatch.setattr(neo4j_export.json, "dump", dump)
+    with pytest.raises(KeyboardInterrupt):
+        neo4j_export.Manifest(nodes={"b": "2"}).save(path)
+    monkeypatch.undo()
+
+    assert neo4j_export.Manifest.load(path) == manifest
+    assert [p.name for p in tmp_path.iterdir()] == ["neo4j.json.gz"]
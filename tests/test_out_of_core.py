@@ -0,0 +1,119 @@
+import os
+import random
+
+import pytest
+
+from stix2_explorer import converter, out_of_core
+from tests.conftest import PATHS
+
+# Small enough that every stage spills several runs to disk.
+MEMORY_LIMIT = 2048
+CHUNK_SIZE = 7
+
+
+@pytest.fixture()
+def spills(monkeypatch):
+    """
+    Count the runs spilled to disk.
+    """
+    spills = []
+    spill = out_of_core.ExternalSorter.spill
+
+    def count(self):
+        if self.records:
+            spills.append(len(self.records))
+        spill(self)
+
+    monkeypatch.setattr(out_of_core.ExternalSorter, "spill", count)
+    return spills
+
+
+def get_expected_triples(node_labels=None, **kwargs):
+    rows = list(converter.iter_stix2_objects(PATHS, **kwargs))
+    return sorted(
+        set(converter.convert_stix2_objects_to_triples(rows, node_labels=node_labels))
+    )
+
+
+@pytest.mark.parametrize("node_labels", converter.NODE_LABEL_TYPES)
+def test_triples_match_in_memory_triples(node_labels, tmp_path, spills):
+    triples = list(
+        out_of_core.convert_stix2_objects_to_triples(
+            PATHS,
+            node_labels=node_labels,
+            memory_limit=MEMORY_LIMIT,
+            chunk_size=CHUNK_SIZE,
+            temp_dir=str(tmp_path),
+        )
+    )
+    assert triples == get_expected_triples(node_labels)
+    assert len(spills) > 2
+
+    # Sorted runs are removed once the triples have been read.
+    assert os.listdir(tmp_path) == []
+
+
+def test_triples_match_with_default_limits():
+    triples = list(out_of_core.convert_stix2_objects_to_triples(PATHS))
+    assert triples == get_expected_triples()
+
+
+def test_deprecated_and_revoked_objects(tmp_path):
+    kwargs = {"include_deprecated": True, "include_revoked": True}
+    triples = list(
+        out_of_core.convert_stix2_objects_to_triples(
+            PATHS,
+            memory_limit=MEMORY_LIMIT,
+            chunk_size=CHUNK_SIZE,
+            temp_dir=str(tmp_path),
+            **kwargs,
+        )
+    )
+    assert triples == get_expected_triples(**kwargs)
+    assert triples != get_expected_triples()
+
+
+def test_digraph_matches_in_memory_digraph(rows, tmp_path):
+    g = out_of_core.convert_stix2_objects_to_digraph(
+        PATHS, memory_limit=MEMORY_LIMIT, chunk_size=CHUNK_SIZE, temp_dir=str(tmp_path)
+    )
+    expected = converter.convert_stix2_objects_to_digraph(rows)
+    assert sorted(g.edges(data="label")) == sorted(expected.edges(data="label"))
+
+    external_ids = converter.get_node_labels_by_external_id(rows)
+    for o in rows:
+        if o["id"] in g:
+            assert g.nodes[o["id"]]["type"] == o["type"]
+            assert g.nodes[o["id"]]["name"] == o.get("name")
+            assert g.nodes[o["id"]]["external_id"] == external_ids.get(o["id"])
+
+
+def test_external_sorter_sorts_and_deduplicates(tmp_path):
+    rng = random.Random(0)
+    records = [(str(rng.randrange(500)), str(rng.randrange(3))) for _ in range(2000)]
+    with out_of_core.ExternalSorter(memory_limit=1024, directory=str(tmp_path)) as s:
+        for record in records:
+            s.add(record)
+        assert len(s.runs) > 1
+        assert list(s) == sorted(set(records))
+    assert os.listdir(tmp_path) == []
+
+
+@pytest.mark.parametrize(
+    "size, expected",
+    [
+        (1024, 1024),
+        ("1024", 1024),
+        ("512M", 512 * 1024**2),
+        ("512MB", 512 * 1024**2),
+        ("4GiB", 4 * 1024**3),
+        ("1.5k", 1536),
+    ],
+)
+def test_parse_size(size, expected):
+    assert out_of_core.parse_size(size) == expected
+
+
+def test_parse_invalid_size():
+    with pytest.raises(ValueError):
+        out_of_core.parse_size("lots")
@@ -0,0 +1,195 @@
+import json
+
+import pytest
+from click.testing import CliRunner
+from stix2.datastore.filters import Filter
+
+from stix2_explorer import converter
+from stix2_explorer.cli import main
+from tests.conftest import PATHS
+
+
+@pytest.fixture(scope="module")
+def objects():
+    objects = []
+    for path in PATHS:
+        with open(path) as file:
+            objects += json.load(file)["objects"]
+    return objects
+
+
+def get_objects(objects, stix2_type):
+    return [o for o in objects if o["type"] == stix2_type]
+
+
+@pytest.mark.parametrize("projection", sorted(converter.PROJECTIONS))
+def test_profiles_keep_their_fields(objects, projection):
+    fields = converter.get_projection_fields(projection)
+    assert fields == converter.PROJECTIONS[projection]
+    assert converter.PROJECTION_BASE_FIELDS <= fields
+    assert "description" not in fields
+
+    for o in objects:
+        projected = converter.project_stix2_object(o, fields)
+        expected = set(o) & fields
+        if o["type"] == "malware":
+            # STIX 2.1 requires is_family, which neither profile lists.
+            expected.add("is_family")
+        assert set(projected) == expected, o["id"]
+        assert all(
+            projected[k] == o[k] for k in projected if k != "external_references"
+        )
+
+
+def test_graph_profile_keeps_more_than_matrix_profile(objects):
+    intrusion_set = get_objects(objects, "intrusion-set")[0]
+    assert "aliases" in converter.project_stix2_object(
+        intrusion_set, converter.get_projection_fields(converter.PROJECTION_GRAPH)
+    )
+    assert "aliases" not in converter.project_stix2_object(
+        intrusion_set, converter.get_projection_fields(converter.PROJECTION_MATRIX)
+    )
+
+
+def test_custom_field_lists(objects):
+    fields = converter.get_projection_fields(["description", "x_mitre_detection"])
+    assert fields == converter.PROJECTION_BASE_FIELDS | {
+        "description",
+        "x_mitre_detection",
+    }
+
+    technique = next(
+        o for o in get_objects(objects, "attack-pattern") if "x_mitre_detection" in o
+    )
+    projected = converter.project_stix2_object(technique, fields)
+    assert set(projected) == (set(technique) & fields) | {"name"}
+    assert projected["description"] == technique["description"]
+    assert "external_references" not in projected
+
+    # Fields which STIX 2 requires for the type are always kept.
+    relationship = get_objects(objects, "relationship")[0]
+    assert set(converter.project_stix2_object(relationship, fields)) == (
+        set(relationship) & (fields | {"relationship_type", "source_ref", "target_ref"})
+    )
+
+    # Custom types have no required fields.
+    tactic = get_objects(objects, "x-mitre-tactic")[0]
+    assert set(converter.project_stix2_object(tactic, fields)) == set(tactic) & fields
+
+
+def test_unknown_profile():
+    with pytest.raises(ValueError, match="Unknown projection"):
+        converter.get_projection_fields("everything")
+
+
+def test_nested_fields_are_projected():
+    o = {
+        "type": "attack-pattern",
+        "id": "attack-pattern--1",
+        "name": "Example",
+        "external_references": [
+            {
+                "source_name": "mitre-attack",
+                "external_id": "T1000",
+                "url": "https://attack.mitre.org/techniques/T1000",
+                "description": "Dropped",
+            },
+            {"source_name": "Citation", "description": "Dropped"},
+        ],
+    }
+    projected = converter.project_stix2_object(
+        o, converter.get_projection_fields(converter.PROJECTION_MATRIX)
+    )
+    assert projected["external_references"] == [
+        {
+            "source_name": "mitre-attack",
+            "external_id": "T1000",
+            "url": "https://attack.mitre.org/techniques/T1000",
+        }
+    ]
+
+    # Fields which are emptied by the projection are dropped.
+    o["external_references"] = o["external_references"][1:]
+    projected = converter.project_stix2_object(
+        o, converter.get_projection_fields(converter.PROJECTION_MATRIX)
+    )
+    assert "external_references" not in projected
+
+
+def test_dict_source(objects):
+    src = converter.create_stix2_memory_source(objects, projection="graph")
+    assert isinstance(src, converter.DictSource)
+    assert all(type(o) is dict for o in src.query())
+    assert sorted(o["id"] for o in src.query()) == sorted(o["id"] for o in objects)
+
+    techniques = src.query([Filter("type", "=", "attack-pattern")])
+    assert sorted(o["id"] for o in techniques) == sorted(
+        o["id"] for o in get_objects(objects, "attack-pattern")
+    )
+
+    technique = techniques[0]
+    assert src.query([Filter("id", "=", technique["id"])]) == [technique]
+    assert (
+        src.query([Filter("type", "=", "malware"), Filter("id", "=", technique["id"])])
+        == []
+    )
+    assert src.get(technique["id"]) == technique
+    assert src.get("attack-pattern--missing") is None
+
+    relationships = src.query(
+        [
+            Filter("type", "=", "relationship"),
+            Filter("relationship_type", "=", "mitigates"),
+        ]
+    )
+    assert relationships
+    assert all(o["relationship_type"] == "mitigates" for o in relationships)
+
+
+def test_dict_source_versions(objects):
+    technique = get_objects(objects, "attack-pattern")[0]
+    newer = dict(technique, modified="2099-01-01T00:00:00.000Z", name="Newer")
+    src = converter.DictSource([newer, technique])
+    assert [o["name"] for o in src.all_versions(technique["id"])] == [
+        technique["name"],
+        "Newer",
+    ]
+    assert src.get(technique["id"])["name"] == "Newer"
+    assert len(src.query([Filter("id", "=", technique["id"])])) == 2
+
+
+@pytest.mark.parametrize("projection", sorted(converter.PROJECTIONS))
+@pytest.mark.parametrize("node_labels", converter.NODE_LABEL_TYPES)
+def test_projections_keep_triples(rows, projection, node_labels):
+    projected = list(converter.iter_stix2_objects(PATHS, projection=projection))
+    assert [o["id"] for o in projected] == [o["id"] for o in rows]
+    triples = converter.convert_stix2_objects_to_triples(
+        projected, node_labels=node_labels
+    )
+    assert list(triples) == list(
+        converter.convert_stix2_objects_to_triples(rows, node_labels=node_labels)
+    )
+
+
+@pytest.mark.parametrize("node_label_type", converter.NODE_LABEL_TYPES)
+def test_list_relationships_with_projection(node_label_type):
+    include = []
+    for path in PATHS:
+        include += ["-i", path]
+
+    args = ["list-relationships", "--node-label-type", node_label_type]
+    outputs = []
+    for projection in ([], ["--projection", "graph"]):
+        result = CliRunner().invoke(main, include + ["--no-server"] + projection + args)
+        assert result.exit_code == 0, result.output
+        outputs.append(result.output)
+    assert outputs[0] == outputs[1] != ""
+
+
+def test_dict_source_versions_are_ordered_by_time(objects):
+    technique = get_objects(objects, "attack-pattern")[0]
+    newer = dict(technique, modified="2030-01-01T00:00:19.735Z", name="Newer")
+    older = dict(technique, modified="2030-01-01T00:00:19Z", name="Older")
+    src = converter.DictSource([newer, older])
+    assert [o["name"] for o in src.all_versions(technique["id"])] == ["Older", "Newer"]
+    assert src.get(technique["id"])["name"] == "Newer"
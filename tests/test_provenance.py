@@ -0,0 +1,124 @@
+import copy
+import json
+import uuid
+
+import pytest
+
+from stix2_explorer import converter, joins, provenance
+from tests.conftest import ENTERPRISE_PATH, PATHS
+
+
+@pytest.fixture()
+def second_source(tmp_path):
+    """
+    A data source with a copy of one relationship (the same object) and a second relationship with the same source, type, and target (a different object).
+    """
+    with open(ENTERPRISE_PATH) as file:
+        objects = json.load(file)["objects"]
+    relationship = next(o for o in objects if o["type"] == "relationship")
+    duplicate = copy.deepcopy(relationship)
+    duplicate["id"] = f"relationship--{uuid.UUID(int=5, version=4)}"
+
+    path = tmp_path / "second.json"
+    path.write_text(
+        json.dumps({"type": "bundle", "objects": [relationship, duplicate]})
+    )
+    return str(path), relationship, duplicate
+
+
+@pytest.fixture()
+def loaded(second_source):
+    path, relationship, duplicate = second_source
+    rows, p = provenance.load_stix2_objects_with_provenance(
+        {"enterprise": ENTERPRISE_PATH, "second": path}
+    )
+    return rows, p, relationship, duplicate
+
+
+@pytest.fixture()
+def decode_counts(monkeypatch):
+    """
+    Count how often each built-in decoder decodes the rows.
+    """
+    counts = {}
+    for decoder in converter.get_default_decoders():
+        cls = type(decoder)
+        f = cls.iter_edge_batches
+
+        def iter_edge_batches(self, rows, *args, f=f, cls=cls, **kwargs):
+            counts[cls] = counts.get(cls, 0) + 1
+            return f(self, rows, *args, **kwargs)
+
+        monkeypatch.setattr(cls, "iter_edge_batches", iter_edge_batches)
+    return counts
+
+
+def test_object_provenance(loaded):
+    rows, p, relationship, duplicate = loaded
+    assert p.get_names(relationship["id"]) == ["enterprise", "second"]
+    assert p.get_names(duplicate["id"]) == ["second"]
+    assert p.is_from(duplicate["id"], "second")
+    assert not p.is_from(duplicate["id"], "enterprise")
+
+    # Objects which appear in both data sources are only returned once.
+    assert sorted(o["id"] for o in rows) == sorted(set(o["id"] for o in rows))
+
+
+def test_edge_provenance_is_a_union_over_origins(loaded):
+    rows, p, relationship, _ = loaded
+    masks = provenance.get_edge_provenance(
+        provenance.iter_edge_batches(rows), provenance=p
+    )
+    assert list(masks) == list(converter.convert_stix2_objects_to_triples(rows))
+
+    k = (
+        relationship["source_ref"],
+        relationship["relationship_type"],
+        relationship["target_ref"],
+    )
+    assert p.registry.get_names(masks[k]) == ["enterprise", "second"]
+
+    enterprise = p.registry.get_mask("enterprise")
+    assert all(mask == enterprise for (triple, mask) in masks.items() if triple != k)
+
+
+def test_tables_decode_rows_once(loaded, decode_counts):
+    pytest.importorskip("pyarrow")
+    from stix2_explorer import columnar
+
+    rows, p, relationship, _ = loaded
+    tables = columnar.convert_stix2_objects_to_tables(rows, provenance=p)
+    assert set(decode_counts.values()) == {1}
+
+    triples = tables.triples.to_pydict()
+    assert list(zip(triples["subject"], triples["predicate"], triples["object"])) == (
+        list(converter.convert_stix2_objects_to_triples(rows))
+    )
+    masks = dict(
+        zip(
+            zip(triples["subject"], triples["predicate"], triples["object"]),
+            triples["provenance"],
+        )
+    )
+    k = (
+        relationship["source_ref"],
+        relationship["relationship_type"],
+        relationship["target_ref"],
+    )
+    assert masks[k] == p.registry.get_mask(["enterprise", "second"])
+
+
+def test_join_engine_decodes_rows_once(loaded, decode_counts):
+    rows, p, relationship, _ = loaded
+    engine = joins.JoinEngine(rows, provenance=p)
+    assert set(decode_counts.values()) == {1}
+    assert sorted(engine.store.match()) == sorted(
+        converter.convert_stix2_objects_to_triples(rows)
+    )
+
+
+def test_provenance_from_paths(rows):
+    loaded, p = provenance.load_stix2_objects_with_provenance(PATHS)
+    assert p.registry.names == PATHS
+    for o in loaded:
+        assert p.get_mask(o["id"])
@@ -0,0 +1,57 @@
+import gzip
+import os
+
+import pytest
+
+from stix2_explorer import converter, search
+
+
+@pytest.fixture()
+def cache_path(rows, tmp_path):
+    fingerprint = converter.get_corpus_fingerprint(rows)
+    return str(tmp_path / f"search-{fingerprint}.json.gz")
+
+
+def test_search_index_is_cached(rows, tmp_path, cache_path):
+    expected = search.create_search_index(rows)
+    index = search.get_search_index(rows, cache_dir=str(tmp_path))
+    assert os.path.exists(cache_path)
+    assert os.listdir(tmp_path) == [os.path.basename(cache_path)]
+
+    cached = search.get_search_index(rows, cache_dir=str(tmp_path))
+    assert cached.ids == index.ids == expected.ids
+    assert cached.search("T1000") == expected.search("T1000")
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        gzip.compress(b'{"ids": ["x"]')[:-8],
+        gzip.compress(b"not json"),
+        gzip.compress(b"{}"),
+        b"not gzip",
+        b"",
+    ],
+    ids=["truncated", "invalid-json", "missing-keys", "not-gzip", "empty"],
+)
+def test_corrupt_search_index_is_rebuilt(rows, tmp_path, cache_path, data):
+    with open(cache_path, "wb") as file:
+        file.write(data)
+
+    index = search.get_search_index(rows, cache_dir=str(tmp_path))
+    assert index.ids == search.create_search_index(rows).ids
+
+    # The corrupt copy is overwritten.
+    cached = search.SearchIndex.load(cache_path)
+    assert cached.ids == index.ids
+    assert os.listdir(tmp_path) == [os.path.basename(cache_path)]
+
+
+def test_failed_save_leaves_no_partial_index(rows, tmp_path, monkeypatch):
+    def dump(*args, **kwargs):
+        raise RuntimeError("crashed")
+
+    monkeypatch.setattr(search.json, "dump", dump)
+    with pytest.raises(RuntimeError):
+        search.get_search_index(rows, cache_dir=str(tmp_path))
+    assert os.listdir(tmp_path) == []
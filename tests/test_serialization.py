@@ -0,0 +1,65 @@
+import collections
+import datetime
+import json
+
+import pytest
+from stix2.utils import STIXdatetime
+
+from stix2_explorer import converter
+from stix2_explorer.serialization import JSONEncoder, to_python
+from tests.conftest import PATHS
+
+
+def via_json(o):
+    return json.loads(json.dumps(o, cls=JSONEncoder))
+
+
+@pytest.fixture(scope="module")
+def stix2_objects():
+    return converter.get_stix2_data_source(PATHS).query()
+
+
+def test_stix2_objects_match_json_round_trip(stix2_objects):
+    assert sum(1 for o in stix2_objects if not isinstance(o, dict)) > 100
+    for o in stix2_objects:
+        assert to_python(o) == via_json(o), o["id"]
+        assert converter.convert_stix2_object_to_dict(o) == via_json(o), o["id"]
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        None,
+        True,
+        1,
+        1.5,
+        "text",
+        [1, "a", None],
+        (1, 2),
+        {"a": {"b": [1, {"c": (2, 3)}]}},
+        collections.OrderedDict([("b", 1), ("a", 2)]),
+        {"a", "b", "c"},
+        datetime.datetime(2023, 1, 2, 3, 4, 5, 678000, tzinfo=datetime.timezone.utc),
+        STIXdatetime(2023, 1, 2, 3, 4, 5, tzinfo=datetime.timezone.utc),
+        {"t": [datetime.datetime(2023, 1, 1)]},
+    ],
+)
+def test_values_match_json_round_trip(value):
+    assert to_python(value) == via_json(value)
+
+
+def test_iterators_match_json_round_trip():
+    assert to_python(iter([1, "a"])) == via_json(iter([1, "a"])) == [1, "a"]
+    assert to_python({"k": (v for v in "ab")}) == {"k": ["a", "b"]}
+
+
+def test_objects_within_containers(stix2_objects):
+    o = stix2_objects[0]
+    assert to_python({"objects": [o]}) == via_json({"objects": [o]})
+
+
+def test_unsupported_types_are_rejected():
+    with pytest.raises(TypeError):
+        to_python(object())
+    with pytest.raises(TypeError):
+        via_json(object())
@@ -0,0 +1,177 @@
+import http.client
+import json
+import os
+import shutil
+import threading
+import time
+
+import pytest
+from click.testing import CliRunner
+
+from stix2_explorer import converter, server
+from stix2_explorer.cli import main
+from stix2_explorer.constants import MAX_RADIUS
+from tests.conftest import PATHS
+
+
+@pytest.fixture()
+def paths(tmp_path):
+    """
+    Copies of the fixture bundles, which tests are free to change.
+    """
+    directory = tmp_path / "data"
+    directory.mkdir()
+    return [shutil.copy(path, directory) for path in PATHS]
+
+
+@pytest.fixture()
+def running_server(paths):
+    """
+    A server which has loaded the given paths (as selected with tool -i <path>...).
+    """
+    data_sources = [converter.get_stix2_data_source(path) for path in paths]
+    corpus = server.Corpus.from_data_sources(data_sources)
+    httpd = server.create_server(corpus, server.get_server_key(include=paths), port=0)
+    thread = threading.Thread(target=server.serve, args=(httpd,), daemon=True)
+    thread.start()
+
+    # Commands are only forwarded once the server has recorded its address.
+    deadline = time.monotonic() + 10
+    while server.read_server_state() is None:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    yield httpd
+    httpd.shutdown()
+    thread.join()
+
+
+def get_args(paths, *args):
+    include = []
+    for path in paths:
+        include += ["-i", path]
+    return include + list(args)
+
+
+def invoke(*args):
+    result = CliRunner().invoke(main, list(args))
+    assert result.exit_code == 0, result.output
+    return result.output
+
+
+@pytest.mark.parametrize(
+    "args",
+    [
+        ["list-objects"],
+        ["list-relationships"],
+        ["list-relationships", "--node-label-type", "external-id"],
+        ["neighbours", "T1000", "--radius", "2", "--node-label-type", "name"],
+        ["to-dot", "--node-label-type", "name"],
+    ],
+)
+def test_forwarded_output_matches_local_output(
+    running_server, paths, rows, monkeypatch, args
+):
+    if args[0] == "neighbours":
+        external_ids = converter.get_node_labels_by_external_id(rows)
+        args[1] = next(k for (k, v) in external_ids.items() if v == args[1])
+
+    local = invoke(*get_args(paths, "--no-server", *args))
+    assert local
+
+    # The content must not be loaded again.
+    with monkeypatch.context() as m:
+        m.setattr(
+            converter,
+            "get_stix2_data_source",
+            lambda *args, **kwargs: pytest.fail("Content was loaded locally"),
+        )
+        forwarded = invoke(*get_args(paths, *args))
+    assert forwarded == local
+
+
+def test_changed_local_files_are_not_forwarded(running_server, paths):
+    key = server.get_server_key(include=paths)
+    assert server.get_client(key) is not None
+    before = invoke(*get_args(paths, "list-relationships"))
+
+    # Remove the mappings: the server still has them, but the files don't.
+    with open(paths[2], "w") as file:
+        json.dump({"type": "bundle", "id": "bundle--x", "objects": []}, file)
+
+    assert server.get_server_key(include=paths) != key
+    assert server.get_client(server.get_server_key(include=paths)) is None
+    after = invoke(*get_args(paths, "list-relationships"))
+    assert after == invoke(*get_args(paths, "--no-server", "list-relationships"))
+    assert after != before
+
+
+def test_server_key(paths, tmp_path):
+    key = server.get_server_key(include=paths)
+    assert key == server.get_server_key(include=list(paths))
+
+    # The modification time of a file is part of the key.
+    st = os.stat(paths[0])
+    os.utime(paths[0], ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert server.get_server_key(include=paths) != key
+
+    # So is every file within a directory.
+    directory = os.path.dirname(paths[0])
+    key = server.get_server_key(include=[directory])
+    with open(paths[1], "a") as file:
+        file.write("\n")
+    assert server.get_server_key(include=[directory]) != key
+
+    # Remote content is identified by its URL.
+    url = "https://example.com/enterprise-attack.json"
+    assert server.get_server_key(include=[url]) == server.get_server_key(include=[url])
+    assert server.get_server_key(include=[url]) != server.get_server_key(
+        include=[url + "?v=2"]
+    )
+
+
+def test_pages_are_slices_of_cached_results(running_server, rows):
+    client = server.Client(server.get_server_url(running_server), page_size=7)
+    corpus = running_server.corpus
+
+    objects = list(client.iter_objects(object_types=["attack-pattern"]))
+    assert [o["id"] for o in objects] == [
+        o["id"] for o in rows if o["type"] == "attack-pattern"
+    ]
+    assert corpus.get_objects(object_types=["attack-pattern"]) is corpus.get_objects(
+        object_types=["attack-pattern"]
+    )
+    assert [o["id"] for o in client.iter_objects()] == [o["id"] for o in rows]
+
+    triples = list(client.iter_triples())
+    assert triples == corpus.get_triples()
+
+    object_ids = [o["id"] for o in rows[:2]]
+    neighbours = list(client.iter_neighbour_triples(object_ids, radius=2))
+    assert neighbours == corpus.get_neighbour_triples(object_ids, radius=2)
+    assert corpus.get_neighbour_triples(object_ids, radius=2) is (
+        corpus.get_neighbour_triples(reversed(object_ids), radius=2)
+    )
+
+
+def test_neighbours_errors(running_server, paths, rows):
+    client = server.Client(server.get_server_url(running_server))
+    object_id = rows[0]["id"]
+
+    with pytest.raises(ValueError, match="At least one object ID"):
+        list(client.iter_neighbour_triples([]))
+    for radius in (0, MAX_RADIUS + 1):
+        with pytest.raises(ValueError, match="Radius"):
+            list(client.iter_neighbour_triples([object_id], radius=radius))
+    assert list(client.iter_neighbour_triples([object_id], radius=MAX_RADIUS))
+
+    host, port = running_server.server_address[:2]
+    connection = http.client.HTTPConnection(host, port)
+    connection.request("GET", "/neighbours")
+    response = connection.getresponse()
+    assert response.status == 400
+    connection.close()
+
+    result = CliRunner().invoke(
+        main, get_args(paths, "neighbours", object_id, "--radius", "1000")
+    )
+    assert result.exit_code == 2
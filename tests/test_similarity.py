@@ -0,0 +1,182 @@
+import itertools
+import math
+import os
+
+import pytest
+
+from stix2_explorer import converter, similarity
+
+A = "intrusion-set--a"
+B = "intrusion-set--b"
+C = "malware--c"
+D = "tool--d"
+
+T1 = "attack-pattern--1"
+T2 = "attack-pattern--2"
+T3 = "attack-pattern--3"
+T4 = "attack-pattern--4"
+
+TRIPLES = [
+    (A, "uses", T1),
+    (A, "uses", T2),
+    (A, "uses", T3),
+    (A, "uses", T3),
+    (B, "uses", T2),
+    (B, "uses", T3),
+    (C, "uses", T1),
+    (C, "uses", T4),
+    (D, "uses", T4),
+    (A, "mitigates", T4),
+    (A, "uses", "identity--x"),
+]
+
+
+def get_techniques(triples):
+    techniques = {}
+    for s, p, o in triples:
+        if p == "uses" and o.startswith("attack-pattern--"):
+            techniques.setdefault(s, set()).add(o)
+    return techniques
+
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b)
+
+
+def cosine(a, b):
+    return len(a & b) / math.sqrt(len(a) * len(b))
+
+
+def assert_matches_brute_force(s, sets, f):
+    assert set(s.ids) == set(sets)
+    positions = {v: i for i, v in enumerate(s.ids)}
+    dense = s.matrix.toarray()
+    for a, b in itertools.product(sets, repeat=2):
+        expected = 0 if a == b else f(sets[a], sets[b])
+        assert dense[positions[a], positions[b]] == pytest.approx(expected), (a, b)
+
+
+def test_incidence_matrix():
+    m = similarity.get_incidence_matrix(TRIPLES)
+    assert m.row_ids == [A, B, C, D]
+    assert m.column_ids == [T1, T2, T3, T4]
+    assert m.matrix.toarray().tolist() == [
+        [1, 1, 1, 0],
+        [0, 1, 1, 0],
+        [1, 0, 0, 1],
+        [0, 0, 0, 1],
+    ]
+    assert m.transpose().row_ids == m.column_ids
+
+
+@pytest.mark.parametrize(
+    "metric, f", [(similarity.JACCARD, jaccard), (similarity.COSINE, cosine)]
+)
+def test_similarity_matches_brute_force(metric, f, rows):
+    m = similarity.get_incidence_matrix(TRIPLES)
+    s = similarity.get_similarity_matrix(m, metric=metric)
+    assert_matches_brute_force(s, get_techniques(TRIPLES), f)
+
+    # And for the test corpus, in both directions.
+    triples = list(converter.convert_stix2_objects_to_triples(rows))
+    m = similarity.get_incidence_matrix(triples)
+    entities = get_techniques(triples)
+    assert_matches_brute_force(similarity.get_similarity_matrix(m, metric), entities, f)
+
+    techniques = {}
+    for entity, ids in entities.items():
+        for technique in ids:
+            techniques.setdefault(technique, set()).add(entity)
+    s = similarity.get_similarity_matrix(m.transpose(), metric)
+    assert_matches_brute_force(s, techniques, f)
+
+
+def test_unsupported_metric():
+    with pytest.raises(ValueError):
+        similarity.get_similarity_matrix(
+            similarity.get_incidence_matrix(TRIPLES), metric="euclidean"
+        )
+
+
+def test_top_k_neighbours():
+    m = similarity.get_incidence_matrix(TRIPLES)
+    s = similarity.get_similarity_matrix(m, metric=similarity.JACCARD)
+
+    neighbours = similarity.get_top_k_neighbours(s, k=10)
+    assert [(n.id, n.score) for n in neighbours[A]] == [
+        (B, pytest.approx(2 / 3)),
+        (C, pytest.approx(1 / 4)),
+    ]
+    assert [n.id for n in neighbours[C]] == [D, A]
+    assert [n.id for n in neighbours[D]] == [C]
+
+    # Ties are broken by position, and only the top k are kept.
+    s.matrix[s.ids.index(A), s.ids.index(C)] = 2 / 3
+    assert [n.id for n in similarity.get_top_k_neighbours(s, k=1)[A]] == [B]
+    assert [n.id for n in similarity.get_top_k_neighbours(s, k=2)[A]] == [B, C]
+
+    neighbours = similarity.get_top_k_neighbours(
+        s, object_ids=[C, "intrusion-set--missing"], neighbour_types=["intrusion-set"]
+    )
+    assert list(neighbours) == [C, "intrusion-set--missing"]
+    assert [n.id for n in neighbours[C]] == [A]
+    assert neighbours["intrusion-set--missing"] == []
+
+
+def test_top_k_neighbours_are_ordered(rows):
+    triples = converter.convert_stix2_objects_to_triples(rows)
+    s = similarity.get_similarity_matrix(similarity.get_incidence_matrix(triples))
+    for k in (1, 3, 10):
+        for object_id, neighbours in similarity.get_top_k_neighbours(s, k=k).items():
+            i = s.ids.index(object_id)
+            expected = sorted(
+                (
+                    (-score, j)
+                    for j, score in enumerate(s.matrix[i].toarray().ravel())
+                    if score
+                )
+            )[:k]
+            assert [(n.id, n.score) for n in neighbours] == [
+                (s.ids[j], pytest.approx(-score)) for (score, j) in expected
+            ]
+
+
+def test_save_and_load(tmp_path):
+    s = similarity.get_similarity_matrix(similarity.get_incidence_matrix(TRIPLES))
+    path = str(tmp_path / "cache" / "similarity.npz")
+    s.save(path)
+    assert os.listdir(tmp_path / "cache") == ["similarity.npz"]
+
+    loaded = similarity.SimilarityMatrix.load(path)
+    assert loaded.ids == s.ids
+    assert (loaded.matrix != s.matrix).nnz == 0
+
+
+def test_cached_similarity_matrix(rows, tmp_path, monkeypatch):
+    cache_dir = str(tmp_path / "cache")
+    expected = similarity.get_cached_similarity_matrix(rows, cache_dir=cache_dir)
+    assert len(os.listdir(cache_dir)) == 1
+
+    monkeypatch.setattr(
+        similarity,
+        "get_similarity_matrix",
+        lambda *args, **kwargs: pytest.fail("The cached matrix was not used"),
+    )
+    s = similarity.get_cached_similarity_matrix(rows, cache_dir=cache_dir)
+    assert s.ids == expected.ids
+
+
+@pytest.mark.parametrize("content", [b"", b"PK\x03\x04truncated", b"not a zip file"])
+def test_corrupt_cache_is_rebuilt(rows, tmp_path, content):
+    cache_dir = str(tmp_path / "cache")
+    expected = similarity.get_cached_similarity_matrix(rows, cache_dir=cache_dir)
+    [filename] = os.listdir(cache_dir)
+    path = os.path.join(cache_dir, filename)
+
+    with open(path, "wb") as file:
+        file.write(content)
+
+    s = similarity.get_cached_similarity_matrix(rows, cache_dir=cache_dir)
+    assert s.ids == expected.ids
+    assert (s.matrix != expected.matrix).nnz == 0
+    assert similarity.SimilarityMatrix.load(path).ids == expected.ids
@@ -0,0 +1,65 @@
+import copy
+import collections
+
+import pytest
+
+pytest.importorskip("duckdb")
+pytest.importorskip("pyarrow")
+
+from stix2_explorer import sql
+
+
+@pytest.fixture()
+def multi_tactic_rows(all_rows):
+    """
+    The test corpus (including deprecated and revoked objects) with every attack pattern in two tactics.
+    """
+    rows = copy.deepcopy(all_rows)
+    tactics = [o["x_mitre_shortname"] for o in rows if o["type"] == "x-mitre-tactic"]
+    for o in rows:
+        if o["type"] == "attack-pattern":
+            phase = o["kill_chain_phases"][0]["phase_name"]
+            other = next(t for t in tactics if t != phase)
+            o["kill_chain_phases"].append(
+                {"kill_chain_name": "mitre-attack", "phase_name": other}
+            )
+    return rows
+
+
+def test_controls_to_techniques_has_one_row_per_control_and_technique(
+    multi_tactic_rows,
+):
+    con = sql.get_duckdb_connection_from_stix2_objects(multi_tactic_rows)
+    columns, rows = sql.execute(con, "controls-to-techniques")
+    rows = [dict(zip(columns, row)) for row in rows]
+    assert rows
+
+    pairs = collections.Counter((r["control_id"], r["technique_id"]) for r in rows)
+    assert max(pairs.values()) == 1
+
+    mappings = con.execute("""
+        SELECT COUNT(*) FROM mappings
+        WHERE source_object_type = 'course-of-action'
+        AND target_object_type = 'attack-pattern'
+        AND source_object_external_id NOT LIKE 'M%'
+        """).fetchone()[0]
+    assert len(rows) == mappings
+
+    for r in rows:
+        assert len(r["tactic_id"].split("; ")) == 2
+        assert len(r["tactic_name"].split("; ")) == 2
+
+
+def test_mapping_stats(rows):
+    con = sql.get_duckdb_connection_from_stix2_objects(rows)
+    columns, stats = sql.execute(con, "mapping-stats")
+    stats = {tuple(row[:3]): row[3] for row in stats}
+    assert columns == [
+        "source_object_type",
+        "relationship",
+        "target_object_type",
+        "total",
+    ]
+    assert stats[("attack-pattern", "related-to", "x-mitre-tactic")] == sum(
+        o["type"] == "attack-pattern" for o in rows
+    )
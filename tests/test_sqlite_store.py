@@ -0,0 +1,132 @@
+import sqlite3
+
+import pytest
+from click.testing import CliRunner
+from stix2.datastore.filters import Filter
+
+from stix2_explorer import converter, sqlite_store
+from stix2_explorer.cli import main
+from tests.conftest import PATHS
+
+
+@pytest.fixture()
+def store(tmp_path, all_rows):
+    store = sqlite_store.SQLiteSource(str(tmp_path / "store.sqlite"), create=True)
+    store.add(all_rows)
+    yield store
+    store.close()
+
+
+@pytest.fixture()
+def limited_variables(monkeypatch):
+    """
+    Behave like SQLite builds which only allow 999 parameters per statement.
+    """
+    monkeypatch.setattr(sqlite_store, "MAX_VARIABLES", 10)
+    original = sqlite_store.SQLiteSource._select
+
+    def _select(self, where=None, params=(), **kwargs):
+        params = list(params)
+        if len(params) > 10:
+            raise sqlite3.OperationalError("too many SQL variables")
+        return original(self, where, params, **kwargs)
+
+    monkeypatch.setattr(sqlite_store.SQLiteSource, "_select", _select)
+
+
+def get_ids(rows):
+    return sorted(o["id"] for o in rows)
+
+
+def test_store_matches_memory(store, rows):
+    assert get_ids(converter.iter_stix2_objects(store)) == get_ids(rows)
+
+
+def test_long_id_lists_are_chunked(store, all_rows, limited_variables):
+    ids = [o["id"] for o in all_rows][:50]
+    types = ["attack-pattern", "intrusion-set", "relationship"]
+    expected = get_ids(o for o in all_rows[:50] if o["type"] in types)
+
+    assert get_ids(store.iter_objects(object_ids=ids + ids)) == sorted(set(ids))
+    assert get_ids(store.iter_objects(object_ids=ids, object_types=types)) == expected
+    assert get_ids(store.query([Filter("id", "in", ids)])) == sorted(set(ids))
+    assert get_ids(store.query([Filter("type", "!=", "relationship")])) == get_ids(
+        o for o in all_rows if o["type"] != "relationship"
+    )
+
+
+def test_long_external_id_lists_are_chunked(store, all_rows, limited_variables):
+    external_ids = [f"T{1000 + i}" for i in range(40)]
+    rows = list(store.iter_objects(external_ids=external_ids))
+    assert sorted(converter.get_external_id(o) for o in rows) == sorted(external_ids)
+
+
+@pytest.mark.parametrize(
+    "patterns",
+    [
+        ["apt1"],
+        ["APT*"],
+        ["apt?"],
+        ["apt[12]"],
+        ["apt[!12]"],
+        ["group [0-1]"],
+        ["*credential*", "mal?"],
+    ],
+)
+def test_names_match_like_memory(store, all_rows, patterns):
+    expected = converter.filter_stix2_objects(
+        all_rows,
+        object_names=patterns,
+        include_deprecated=True,
+        include_revoked=True,
+    )
+    assert get_ids(store.iter_objects(object_names=patterns)) == get_ids(expected)
+
+
+def test_iter_stix2_objects_pushes_filters_down(store, rows):
+    kwargs = {"object_types": ["intrusion-set"], "object_names": ["apt[!0]"]}
+    expected = converter.filter_stix2_objects(rows, **kwargs)
+    actual = converter.iter_stix2_objects(store, **kwargs)
+    assert get_ids(actual) == get_ids(expected) != []
+
+
+def test_create_sqlite_source(tmp_path, all_rows):
+    store = sqlite_store.create_sqlite_source(str(tmp_path / "copy.db"), PATHS)
+    assert get_ids(store.query()) == get_ids(all_rows)
+    store.close()
+
+
+def test_missing_files_are_not_created(tmp_path):
+    path = tmp_path / "typo.db"
+    with pytest.raises(ValueError, match="SQLite file not found"):
+        sqlite_store.SQLiteSource(str(path))
+    with pytest.raises(ValueError, match="SQLite file not found"):
+        converter.get_stix2_data_source(str(path))
+
+    result = CliRunner().invoke(main, ["-i", str(path), "list-objects"])
+    assert result.exit_code != 0
+    assert not path.exists()
+
+
+def test_stores_are_opened_read_only(tmp_path, all_rows):
+    path = str(tmp_path / "copy.db")
+    sqlite_store.create_sqlite_source(path, PATHS).close()
+
+    store = converter.get_stix2_data_source(path)
+    assert get_ids(store.query()) == get_ids(all_rows)
+    with pytest.raises(sqlite3.OperationalError, match="readonly"):
+        store.add(all_rows[:1])
+    store.close()
+
+
+def test_versions_are_ordered_by_time(tmp_path, all_rows):
+    technique = next(o for o in all_rows if o["type"] == "attack-pattern")
+    newer = dict(technique, modified="2030-01-01T00:00:19.735Z", name="Newer")
+    older = dict(technique, modified="2030-01-01T00:00:19Z", name="Older")
+
+    store = sqlite_store.SQLiteSource(str(tmp_path / "store.sqlite"), create=True)
+    store.add([newer, older, technique])
+    names = [o["name"] for o in store.all_versions(technique["id"])]
+    assert names == [technique["name"], "Older", "Newer"]
+    assert store.get(technique["id"])["name"] == "Newer"
+    store.close()
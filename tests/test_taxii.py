@@ -0,0 +1,227 @@
+import http.server
+import json
+import os
+import threading
+import urllib.parse
+
+import pytest
+
+from stix2_explorer import taxii
+from tests.conftest import ENTERPRISE_PATH
+
+MEDIA_TYPE = "application/taxii+json;version=2.1"
+COLLECTION_PATH = "/api1/collections/91a7b528-80eb-42ed-a74d-c6fbd5a26116/"
+
+
+class TAXIIServer(http.server.ThreadingHTTPServer):
+    """
+    A stand-in TAXII 2.1 server with a single collection which pages by offset.
+    """
+
+    def __init__(self, objects):
+        super().__init__(("127.0.0.1", 0), TAXIIRequestHandler)
+        self.entries = []
+        self.requests = []
+        self.send_date_added_last = True
+        self.add(objects)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address
+        return f"http://{host}:{port}{COLLECTION_PATH}"
+
+    def add(self, objects):
+        for o in objects:
+            i = len(self.entries)
+            date_added = (
+                f"2023-01-01T{i // 3600:02d}:{i // 60 % 60:02d}:{i % 60:02d}.000Z"
+            )
+            self.entries.append((date_added, o))
+
+
+class TAXIIRequestHandler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urllib.parse.urlsplit(self.path)
+        params = urllib.parse.parse_qs(url.query)
+        self.server.requests.append((url.path, params))
+
+        if url.path == COLLECTION_PATH:
+            return self._send(
+                {
+                    "id": COLLECTION_PATH.split("/")[-2],
+                    "title": "Enterprise ATT&CK",
+                    "can_read": True,
+                    "can_write": False,
+                    "media_types": ["application/stix+json;version=2.1"],
+                }
+            )
+        elif url.path != f"{COLLECTION_PATH}objects/":
+            return self.send_error(404)
+
+        entries = self.server.entries
+        if "added_after" in params:
+            entries = [e for e in entries if e[0] > params["added_after"][0]]
+        if "match[type]" in params:
+            types = params["match[type]"][0].split(",")
+            entries = [e for e in entries if e[1]["type"] in types]
+
+        offset = int(params.get("next", ["0"])[0])
+        limit = int(params["limit"][0])
+        page = entries[offset : offset + limit]
+        envelope = {"more": offset + limit < len(entries)}
+        if envelope["more"]:
+            envelope["next"] = str(offset + limit)
+        if page:
+            envelope["objects"] = [o for (_, o) in page]
+
+        headers = {}
+        if page and self.server.send_date_added_last:
+            headers[taxii.DATE_ADDED_LAST_HEADER] = page[-1][0]
+        self._send(envelope, headers)
+
+    def _send(self, data, headers=None):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", MEDIA_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def objects():
+    with open(ENTERPRISE_PATH) as file:
+        return json.load(file)["objects"]
+
+
+@pytest.fixture()
+def server(objects):
+    server = TAXIIServer(objects)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture()
+def state_path(tmp_path):
+    return str(tmp_path / "state" / "taxii-state.json")
+
+
+def get_object_requests(server):
+    return [params for (path, params) in server.requests if path.endswith("/objects/")]
+
+
+def read_state(state_path):
+    with open(state_path) as file:
+        return json.load(file)
+
+
+def test_pages_are_followed(server, objects, state_path):
+    src = taxii.TAXIICollectionSource(server.url, per_request=10, state_path=state_path)
+    assert list(src.iter_objects()) == objects
+
+    requests = get_object_requests(server)
+    assert len(requests) == -(-len(objects) // 10)
+    assert [params.get("next") for params in requests] == [None] + [
+        [str(i)] for i in range(10, len(objects), 10)
+    ]
+    assert all(params["limit"] == ["10"] for params in requests)
+
+    # Only incremental polls are recorded.
+    assert not os.path.exists(state_path)
+
+
+def test_filters_are_sent_as_match_parameters(server, objects, state_path):
+    src = taxii.TAXIICollectionSource(server.url, per_request=7, state_path=state_path)
+    rows = list(src.iter_objects(type=["attack-pattern"]))
+    assert rows == [o for o in objects if o["type"] == "attack-pattern"]
+    assert all(
+        params["match[type]"] == ["attack-pattern"]
+        for params in get_object_requests(server)
+    )
+
+
+def test_incremental_polls(server, objects, state_path):
+    src = taxii.TAXIICollectionSource(
+        "taxii+" + server.url, per_request=50, state_path=state_path
+    )
+    assert list(src.iter_objects(incremental=True)) == objects
+    date_added_last = server.entries[-1][0]
+    assert read_state(state_path) == {server.url: date_added_last}
+
+    # Nothing was added since the last poll.
+    assert list(src.iter_objects(incremental=True)) == []
+    assert get_object_requests(server)[-1]["added_after"] == [date_added_last]
+    assert read_state(state_path) == {server.url: date_added_last}
+
+    added = objects[:3]
+    server.add(added)
+    assert list(src.iter_objects(incremental=True)) == added
+    assert read_state(state_path) == {server.url: server.entries[-1][0]}
+
+    # Polls with different filters are tracked separately.
+    rows = list(src.iter_objects(incremental=True, type="attack-pattern"))
+    assert rows == [o for (_, o) in server.entries if o["type"] == "attack-pattern"]
+    state = read_state(state_path)
+    assert state[server.url] == server.entries[-1][0]
+    assert f"{server.url}?type=attack-pattern" in state
+
+
+def test_incremental_poll_without_date_added_last(server, objects, state_path):
+    server.send_date_added_last = False
+    src = taxii.TAXIICollectionSource(server.url, per_request=50, state_path=state_path)
+    assert list(src.iter_objects(incremental=True)) == objects
+    assert not os.path.exists(state_path)
+
+
+def test_state_is_only_saved_after_every_page_is_read(server, objects, state_path):
+    src = taxii.TAXIICollectionSource(server.url, per_request=10, state_path=state_path)
+    rows = src.iter_objects(incremental=True)
+    for _ in range(15):
+        next(rows)
+    rows.close()
+    assert not os.path.exists(state_path)
+
+
+def test_interrupted_state_save_keeps_state(server, objects, state_path, monkeypatch):
+    src = taxii.TAXIICollectionSource(server.url, per_request=50, state_path=state_path)
+    list(src.iter_objects(incremental=True))
+    state = read_state(state_path)
+
+    def dump(data, file, **kwargs):
+        file.write('{"')
+        raise KeyboardInterrupt()
+
+    server.add(objects[:3])
+    monkeypatch.setattr(taxii.json, "dump", dump)
+    with pytest.raises(KeyboardInterrupt):
+        list(src.iter_objects(incremental=True))
+    monkeypatch.undo()
+
+    assert read_state(state_path) == state
+    assert os.listdir(os.path.dirname(state_path)) == ["taxii-state.json"]
+
+
+def test_corrupt_state_polls_everything(server, objects, state_path):
+    os.makedirs(os.path.dirname(state_path))
+    with open(state_path, "w") as file:
+        file.write('{"http://')
+
+    src = taxii.TAXIICollectionSource(server.url, per_request=50, state_path=state_path)
+    assert list(src.iter_objects(incremental=True)) == objects
+    assert "added_after" not in get_object_requests(server)[0]
+    assert read_state(state_path) == {server.url: server.entries[-1][0]}
+
+
+def test_taxii_urls(server, objects):
+    assert taxii.is_taxii_url("taxii+" + server.url)
+    assert not taxii.is_taxii_url(server.url)
+    rows = list(taxii.iter_stix2_taxii_objects("taxii+" + server.url))
+    assert rows == objects
@@ -0,0 +1,96 @@
+import copy
+import json
+import uuid
+
+import pytest
+from click.testing import CliRunner
+
+from stix2_explorer import converter, triple_store
+from stix2_explorer.cli import main
+from tests.conftest import ENTERPRISE_PATH
+
+
+def get_object(rows, external_id):
+    external_ids = converter.get_node_labels_by_external_id(rows)
+    return next(o for o in rows if external_ids.get(o["id"]) == external_id)
+
+
+@pytest.fixture()
+def duplicate_bundle(tmp_path):
+    """
+    A bundle with a second copy of technique T1000 (under a different ID), which is used by a group.
+    """
+    with open(ENTERPRISE_PATH) as file:
+        objects = json.load(file)["objects"]
+    technique = copy.deepcopy(get_object(objects, "T1000"))
+    technique["id"] = f"attack-pattern--{uuid.UUID(int=1, version=4)}"
+    group = get_object(objects, "G0000")
+    relationship = {
+        "type": "relationship",
+        "id": f"relationship--{uuid.UUID(int=2, version=4)}",
+        "spec_version": "2.1",
+        "created": "2023-01-01T00:00:00.000Z",
+        "modified": "2023-01-01T00:00:00.000Z",
+        "relationship_type": "uses",
+        "source_ref": group["id"],
+        "target_ref": technique["id"],
+    }
+    path = tmp_path / "duplicate.json"
+    path.write_text(
+        json.dumps({"type": "bundle", "objects": [technique, relationship]})
+    )
+    return str(path)
+
+
+def test_query_matches_triples(rows):
+    store = triple_store.convert_stix2_objects_to_triple_store(rows)
+    triples = list(converter.convert_stix2_objects_to_triples(rows))
+    results = list(store.query(triple_store.parse_patterns("?s uses ?o")))
+    assert sorted((r["s"], r["o"]) for r in results) == sorted(
+        (s, o) for (s, p, o) in triples if p == "uses"
+    )
+
+
+def test_query_expands_shared_external_ids(rows, duplicate_bundle):
+    rows = rows + list(converter.iter_stix2_objects(duplicate_bundle))
+    object_ids = converter.get_object_ids_by_external_id(rows)
+    assert len(object_ids["T1000"]) == 2
+
+    store = triple_store.convert_stix2_objects_to_triple_store(rows)
+    patterns = triple_store.parse_patterns("?g uses T1000")
+    results = list(store.query(patterns, aliases=object_ids))
+
+    expected = []
+    for technique_id in object_ids["T1000"]:
+        expected += store.query([("?g", "uses", technique_id)])
+    assert results == expected
+    assert get_object(rows, "G0000")["id"] in [r["g"] for r in results]
+
+
+def test_query_command_expands_shared_external_ids(rows, duplicate_bundle):
+    runner = CliRunner()
+    args = ["-i", ENTERPRISE_PATH, "-i", duplicate_bundle, "query", "?g uses T1000"]
+    result = runner.invoke(main, args + ["--node-label-type", "external-id"])
+    assert result.exit_code == 0, result.output
+    groups = [json.loads(line)["g"] for line in result.output.splitlines()]
+
+    external_ids = converter.get_node_labels_by_external_id(rows)
+    technique_id = get_object(rows, "T1000")["id"]
+    expected = [
+        external_ids[s]
+        for (s, p, o) in converter.convert_stix2_objects_to_triples(rows)
+        if p == "uses" and o == technique_id
+    ]
+    assert sorted(groups) == sorted(expected + ["G0000"])
+
+
+def test_similar_rejects_ambiguous_external_ids(duplicate_bundle):
+    pytest.importorskip("scipy")
+    runner = CliRunner()
+    args = ["-i", ENTERPRISE_PATH, "-i", duplicate_bundle, "similar", "T1000"]
+    result = runner.invoke(main, args + ["--no-cache"])
+    assert result.exit_code == 2
+    assert "more than one object" in result.output
+
+    result = runner.invoke(main, args[:-1] + ["T1001", "--no-cache"])
+    assert result.exit_code == 0, result.output
@@ -0,0 +1,154 @@
+import json
+
+import pytest
+
+from stix2_explorer import converter, versioned_store
+from stix2_explorer.versioned_store import VersionedStore
+from tests.conftest import ENTERPRISE_PATH
+
+
+def by_id(rows):
+    return sorted(rows, key=lambda o: o["id"])
+
+
+@pytest.fixture(scope="module")
+def versions():
+    """
+    Three releases: the bundle as is, then with one technique renamed and a few objects removed, then with those objects restored.
+    """
+    with open(ENTERPRISE_PATH) as file:
+        v1 = json.load(file)["objects"]
+
+    changed = next(o for o in v1 if o["type"] == "attack-pattern")
+    removed = [o for o in v1 if o["type"] == "intrusion-set"][:2] + [
+        o for o in v1 if o["type"] == "relationship"
+    ][:3]
+    removed_ids = {o["id"] for o in removed}
+    v2 = [
+        (
+            dict(o, name="Renamed", modified="2024-01-01T00:00:00.000Z")
+            if o["id"] == changed["id"]
+            else o
+        )
+        for o in v1
+        if o["id"] not in removed_ids
+    ]
+    v3 = v2 + removed
+    return {
+        "v1": v1,
+        "v2": v2,
+        "v3": v3,
+        "changed": changed["id"],
+        "removed": removed_ids,
+    }
+
+
+@pytest.fixture(scope="module")
+def store(versions):
+    store = VersionedStore()
+    for name in ("v1", "v2", "v3"):
+        store.add_version(name, versions[name])
+    return store
+
+
+def test_deltas(store, versions):
+    assert store.names == ["v1", "v2", "v3"]
+    assert len(store) == 3
+
+    v1, v2, v3 = store.versions
+    assert set(v1.upserts) == {o["id"] for o in versions["v1"]}
+    assert v1.deletes == []
+
+    assert list(v2.upserts) == [versions["changed"]]
+    assert set(v2.deletes) == versions["removed"]
+
+    assert set(v3.upserts) == versions["removed"]
+    assert v3.deletes == []
+
+    # Restored objects are stored once, and so is every unchanged object.
+    assert all(v3.upserts[k] == v1.upserts[k] for k in versions["removed"])
+    assert len(store.objects) == len(versions["v1"]) + 1
+
+
+@pytest.mark.parametrize("version", ["v1", "v2", "v3", None])
+def test_objects_as_of_version(store, versions, version):
+    expected = versions[version or "v3"]
+    assert by_id(store.iter_objects(version)) == by_id(expected)
+    assert by_id(
+        store.iter_stix2_objects(
+            version=version, include_deprecated=True, include_revoked=True
+        )
+    ) == by_id(expected)
+    assert by_id(store.iter_stix2_objects(version=version)) == by_id(
+        converter.filter_stix2_objects(rows=expected)
+    )
+    assert set(store.get_index(version)) == {o["id"] for o in expected}
+
+
+def test_filtered_objects_as_of_version(store, versions):
+    rows = list(store.iter_stix2_objects(version="v2", object_types=["attack-pattern"]))
+    assert rows
+    assert all(o["type"] == "attack-pattern" for o in rows)
+    [renamed] = store.iter_stix2_objects(version="v2", object_ids=[versions["changed"]])
+    assert renamed["name"] == "Renamed"
+    [original] = store.iter_stix2_objects(
+        version="v1", object_ids=[versions["changed"]]
+    )
+    assert original["name"] != "Renamed"
+
+
+def test_digraph_as_of_version(store, versions):
+    for version in ("v1", "v2"):
+        g = store.get_digraph(version)
+        expected = converter.convert_stix2_objects_to_digraph(versions[version])
+        assert sorted(g.edges) == sorted(expected.edges)
+
+
+def test_duplicate_and_unknown_versions(store):
+    with pytest.raises(ValueError, match="already exists"):
+        store.add_version("v1", [])
+    with pytest.raises(ValueError, match="Unknown version"):
+        store.get_index("v4")
+
+
+def test_save_and_load(store, versions, tmp_path):
+    store.save(str(tmp_path))
+    loaded = VersionedStore.load(str(tmp_path))
+    assert loaded.names == store.names
+    assert loaded.versions == store.versions
+    assert loaded.objects == store.objects
+    assert loaded._head == store._head
+    for version in store.names:
+        assert list(loaded.iter_objects(version)) == list(store.iter_objects(version))
+
+    # The latest version is rebuilt from the deltas, so more versions can be added.
+    v4 = [o for o in versions["v3"] if o["id"] not in versions["removed"]]
+    version = loaded.add_version("v4", v4)
+    assert version.upserts == {}
+    assert set(version.deletes) == versions["removed"]
+
+
+def test_create_versioned_store(tmp_path, versions):
+    paths = {}
+    for name in ("v1", "v2", "v3"):
+        path = str(tmp_path / f"{name}.json")
+        with open(path, "w") as file:
+            json.dump(
+                {"type": "bundle", "id": "bundle--x", "objects": versions[name]}, file
+            )
+        paths[name] = path
+
+    store = versioned_store.create_versioned_store(paths)
+    assert store.names == ["v1", "v2", "v3"]
+    assert by_id(store.iter_objects("v2")) == by_id(versions["v2"])
+
+
+def test_latest_version_is_found_whatever_the_precision(versions):
+    technique = next(o for o in versions["v1"] if o["type"] == "attack-pattern")
+    older = dict(technique, modified="2030-01-01T00:00:19Z", name="Older")
+    newer = dict(technique, modified="2030-01-01T00:00:19.735Z", name="Newer")
+
+    store = VersionedStore()
+    store.add_version("v1", [newer, older])
+    [o] = store.iter_objects()
+    assert o["name"] == "Newer"
@@ -0,0 +1,50 @@
+import csv
+import gzip
+import io
+
+from stix2_explorer import writers
+
+
+def read_csv(blob: bytes):
+    return list(csv.reader(io.StringIO(blob.decode("utf-8"))))
+
+
+def test_csv_encoder_joins_plain_rows():
+    encode = writers.get_csv_encoder()
+    assert encode([("a", "b", "c"), ["d", "e", "f"]]) == b"a,b,c\nd,e,f\n"
+
+
+def test_csv_encoder_quotes_special_characters():
+    encode = writers.get_csv_encoder()
+    rows = [("a,b", 'c"d', "e\nf"), ("", "x", "")]
+    assert read_csv(encode(rows)) == [list(row) for row in rows]
+
+
+def test_csv_encoder_accepts_generator_rows():
+    encode = writers.get_csv_encoder()
+    rows = [(v for v in ("a", "b")), (v for v in ("c,d", "e"))]
+    assert read_csv(encode(rows)) == [["a", "b"], ["c,d", "e"]]
+
+
+def test_csv_encoder_accepts_non_string_values():
+    encode = writers.get_csv_encoder()
+    rows = [(1, None, 2.5), ("a", None, True), (None,)]
+    assert encode(rows) == b'1,,2.5\na,,True\n""\n'
+
+
+def test_write_csv_matches_csv_module(tmp_path):
+    rows = [("a", 1, None), ("b,c", "d", "e")]
+    path = str(tmp_path / "rows.csv.gz")
+    writers.write_csv(rows=iter(rows), path=path)
+
+    expected = io.StringIO()
+    csv.writer(expected, lineterminator="\n").writerows(rows)
+    with gzip.open(path, "rb") as file:
+        assert file.read().decode("utf-8") == expected.getvalue()
+
+
+def test_write_jsonl(tmp_path):
+    path = str(tmp_path / "rows.jsonl")
+    writers.write_jsonl(rows=({"i": i} for i in range(3)), path=path, batch_size=2)
+    with open(path) as file:
+        assert file.read().replace(" ", "") == '{"i":0}\n{"i":1}\n{"i":2}\n'